@@ -123,6 +123,9 @@ LOGOUT_REDIRECT_URL = 'login'
 # Claude API
 CLAUDE_API_KEY = os.getenv('CLAUDE_API_KEY')
 
+# Linking index file shared by all workers; written by build_linking_index
+LINKING_INDEX_PATH = os.getenv('LINKING_INDEX_PATH', BASE_DIR / 'linking_index.bin')
+
 # Crispy Forms
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
@@ -2,7 +2,7 @@ from django.contrib import admin
 from .models import (
     WordPressSite, PublishedPost, UploadedImage,
     InternalLinkRule, LinkingProfile,ContentStage, 
-    UserContentStrategy
+    UserContentStrategy, PublishIntent, WebhookEvent, SitePublication, RelinkJob
 )
 @admin.register(WordPressSite)
 class WordPressSiteAdmin(admin.ModelAdmin):
@@ -17,6 +17,33 @@ class UploadedImageAdmin(admin.ModelAdmin):
     list_filter = ['uploaded_at']
 
 
+@admin.register(PublishIntent)
+class PublishIntentAdmin(admin.ModelAdmin):
+    list_display = ['post', 'wordpress_site', 'status', 'attempts', 'next_attempt_at', 'updated_at']
+    list_filter = ['status', 'wordpress_site']
+    search_fields = ['post__title', 'last_error']
+
+
+@admin.register(SitePublication)
+class SitePublicationAdmin(admin.ModelAdmin):
+    list_display = ['post', 'wordpress_site', 'status', 'wordpress_post_id', 'published_at']
+    list_filter = ['status', 'wordpress_site']
+    search_fields = ['post__title', 'error_message']
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['wordpress_site', 'event', 'wordpress_post_id', 'status', 'attempts', 'received_at']
+    list_filter = ['status', 'event', 'wordpress_site']
+    search_fields = ['wordpress_post_id', 'delivery_id', 'error_message']
+
+
+@admin.register(RelinkJob)
+class RelinkJobAdmin(admin.ModelAdmin):
+    list_display = ['user', 'wordpress_site', 'status', 'posts', 'changed', 'posts_per_second', 'created_at']
+    list_filter = ['status']
+
+
 @admin.register(InternalLinkRule)
 class InternalLinkRuleAdmin(admin.ModelAdmin):
     list_display = ['keyword', 'target_post', 'user', 'priority', 'is_active']
@@ -5,5 +5,4 @@ class PublisherConfig(AppConfig):
     name = 'publisher'
     
     def ready(self):
-        # Import signal handlers if you have any
-        pass
\ No newline at end of file
+        from . import signals  # noqa: F401
\ No newline at end of file
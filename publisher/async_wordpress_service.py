@@ -0,0 +1,420 @@
+import asyncio
+import json
+import time
+import weakref
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+from urllib.parse import urlsplit
+
+import httpx
+
+from .wordpress_service import (
+    BATCH_DEFAULT_MAX_ITEMS, CREATED_POST_FIELDS, MEDIA_FIELDS, UPDATED_POST_FIELDS, USER_FIELDS, WordPressService
+)
+
+
+# Connection pool limits for each WordPress host
+MAX_CONNECTIONS_PER_HOST = 10
+MAX_KEEPALIVE_PER_HOST = 5
+
+# Pooled clients, one per host per event loop. httpx clients are bound to the
+# loop they were first used on, so each loop keeps its own set.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_client(site_url: str) -> httpx.AsyncClient:
+    """Return the pooled AsyncClient for a site's host on the running loop"""
+    loop = asyncio.get_running_loop()
+    host = urlsplit(site_url).netloc
+    loop_clients = _clients.setdefault(loop, {})
+
+    client = loop_clients.get(host)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS_PER_HOST,
+                max_keepalive_connections=MAX_KEEPALIVE_PER_HOST
+            )
+        )
+        loop_clients[host] = client
+    return client
+
+
+async def close_clients():
+    """Close every pooled client on the running loop (call on shutdown)"""
+    loop = asyncio.get_running_loop()
+    loop_clients = _clients.pop(loop, {})
+    for client in loop_clients.values():
+        await client.aclose()
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class AsyncWordPressService(WordPressService):
+    """asyncio-native WordPress REST API client
+
+    Mirrors WordPressService, but every network method is overridden as a
+    coroutine sharing one pooled connection per host, so many publishes
+    can run on a single event loop. Content formatting, request bodies and
+    response parsing are inherited unchanged from WordPressService;
+    formatting runs in a worker thread so it does not block the loop.
+    """
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return get_client(self.site_url)
+
+    async def test_connection(self) -> Dict[str, Any]:
+        """Test the WordPress connection and get user info"""
+        try:
+            response = await self.client.get(
+                f"{self.api_base}/users/me",
+                headers=self.auth_header,
+                params={'_fields': USER_FIELDS},
+                timeout=10
+            )
+
+            if response.status_code == 200:
+                user_data = response.json()
+                return {
+                    'success': True,
+                    'user': user_data,
+                    'capabilities': user_data.get('capabilities', {}),
+                    'name': user_data.get('name', 'Unknown')
+                }
+            elif response.status_code == 401:
+                return {
+                    'success': False,
+                    'error': 'Authentication failed. Check username and application password.'
+                }
+            else:
+                return {
+                    'success': False,
+                    'error': f"Connection failed: Status {response.status_code}"
+                }
+        except httpx.TimeoutException:
+            return {'success': False, 'error': 'Connection timeout. Site may be slow or unreachable.'}
+        except httpx.ConnectError:
+            return {'success': False, 'error': 'Cannot connect to site. Check the URL.'}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    async def create_post(self, title: str, content: str, status: str = 'publish',
+                          featured_media_id: Optional[int] = None,
+                          categories: Optional[List[int]] = None,
+                          tags: Optional[List[int]] = None,
+                          excerpt: Optional[str] = None,
+                          slug: Optional[str] = None,
+                          meta: Optional[Dict] = None,
+                          format: str = 'standard',
+                          date: Optional[str] = None) -> Dict[str, Any]:
+        """Create a WordPress post with enhanced HTML content support"""
+
+        # Formatting is CPU-bound: run it off the event loop
+        post_data = await asyncio.to_thread(
+            self._build_post_data, title, content, status, featured_media_id,
+            categories, tags, excerpt, slug, meta, format, date
+        )
+
+        try:
+            response = await self.client.post(
+                f"{self.api_base}/posts",
+                headers={**self.auth_header, 'Content-Type': 'application/json'},
+                params={'_fields': CREATED_POST_FIELDS},
+                content=json.dumps(post_data),
+                timeout=30
+            )
+
+            if response.status_code == 201:
+                result = self._created_post_result(response.json())
+                result['field_hashes'] = self._hash_fields(post_data)
+                return result
+            else:
+                return self._error_result(response)
+
+        except httpx.TimeoutException:
+            return {'success': False, 'error': 'Request timeout. Try again or check server.'}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    async def update_post(self, post_id: int, field_hashes: Optional[Dict[str, str]] = None,
+                          **kwargs) -> Dict[str, Any]:
+        """Update an existing WordPress post, sending only changed fields"""
+        try:
+            # Prepare content if provided
+            if 'content' in kwargs:
+                kwargs['content'] = await asyncio.to_thread(self.format_content, kwargs['content'])
+
+            changed, new_hashes = self._diff_fields(kwargs, field_hashes)
+            if not changed:
+                return {
+                    'success': True,
+                    'skipped': True,
+                    'post_id': post_id,
+                    'field_hashes': new_hashes,
+                    'update_stats': self._update_stats(kwargs, changed)
+                }
+
+            response = await self.client.post(
+                f"{self.api_base}/posts/{post_id}",
+                headers={**self.auth_header, 'Content-Type': 'application/json'},
+                params={'_fields': UPDATED_POST_FIELDS},
+                content=json.dumps(changed),
+                timeout=30
+            )
+
+            if response.status_code == 200:
+                result = self._updated_post_result(response.json())
+                result['field_hashes'] = new_hashes
+                result['sent_fields'] = sorted(changed)
+                result['update_stats'] = self._update_stats(kwargs, changed)
+                return result
+            else:
+                return self._error_result(response)
+
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    async def create_draft(self, title: str, content: str, **kwargs) -> Dict[str, Any]:
+        """Create a draft post in WordPress"""
+        return await self.create_post(title, content, status='draft', **kwargs)
+
+    async def schedule_post(self, title: str, content: str,
+                            publish_date: datetime, **kwargs) -> Dict[str, Any]:
+        """Schedule a post for future publication"""
+        return await self.create_post(title, content, **self._schedule_kwargs(publish_date, kwargs))
+
+    async def get_categories(self) -> Dict[str, Any]:
+        """Get all categories from WordPress"""
+        return await self._get_terms('categories', 'Failed to fetch categories')
+
+    async def get_tags(self) -> Dict[str, Any]:
+        """Get all tags from WordPress"""
+        return await self._get_terms('tags', 'Failed to fetch tags')
+
+    async def upload_media(self, path: str, filename: str, alt_text: str = "") -> Dict[str, Any]:
+        """Upload a single image to WordPress"""
+        try:
+            # Read the file off the loop so large images don't block other publishes
+            file_bytes = await asyncio.to_thread(_read_file, path)
+            response = await self.client.post(
+                f"{self.api_base}/media",
+                headers=self.auth_header,
+                params={'_fields': MEDIA_FIELDS},
+                files={'file': (filename, file_bytes, self._get_mime_type(filename))},
+                data={'alt_text': alt_text},
+                timeout=30
+            )
+            if response.status_code == 201:
+                return self._media_result(response.json())
+            else:
+                return {
+                    'success': False,
+                    'error': f"Failed with status {response.status_code}",
+                    'status_code': response.status_code,
+                    'retry_after': self._parse_retry_after(response)
+                }
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    async def bulk_upload_media(self, image_paths) -> List[Dict[str, Any]]:
+        """Upload multiple images concurrently"""
+        return list(await asyncio.gather(
+            *(self.upload_media(path, filename) for path, filename in image_paths)
+        ))
+
+    async def create_post_with_images(self, title, content, images, **kwargs):
+        """Create post with proper image handling, uploading images concurrently"""
+        results = await asyncio.gather(*(
+            self.upload_media(img['path'], img['filename'], img.get('alt_text', ''))
+            for img in images
+        ))
+
+        featured_media_id = None
+        for i, (img, result) in enumerate(zip(images, results)):
+            if not result['success']:
+                continue
+
+            # Set first successful upload as featured
+            if i == 0 or img.get('is_featured'):
+                featured_media_id = result['media_id']
+
+            placeholder = f"[IMAGE: {img.get('alt_text', '')}]"
+            if placeholder in content:
+                content = content.replace(
+                    placeholder, self._uploaded_image_block(result, img.get('alt_text', '')), 1
+                )
+
+        return await self.create_post(
+            title=title,
+            content=content,
+            featured_media_id=featured_media_id,
+            **kwargs
+        )
+
+    async def _get_terms(self, key: str, error: str) -> Dict[str, Any]:
+        try:
+            response = await self.client.get(
+                f"{self.api_base}/{key}",
+                headers=self.auth_header,
+                params={'per_page': 100},
+                timeout=10
+            )
+
+            if response.status_code == 200:
+                return self._terms_result(key, response.json())
+            else:
+                return {'success': False, 'error': error}
+
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    async def upload_media_batch(self, images_data):
+        """Upload multiple images to WordPress concurrently"""
+        return list(await asyncio.gather(*(self._upload_with_metadata(img_data) for img_data in images_data)))
+
+    async def _upload_with_metadata(self, img_data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            file_bytes = await asyncio.to_thread(_read_file, img_data['path'])
+            response = await self.client.post(
+                f"{self.api_base}/media",
+                headers=self.auth_header,
+                params={'_fields': MEDIA_FIELDS},
+                files={'file': (img_data['filename'], file_bytes, 'image/jpeg')},
+                data=self._media_metadata(img_data),
+                timeout=30
+            )
+            return self._batch_upload_result(img_data, response)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    async def check_health(self, timeout: float = 10) -> Dict[str, Any]:
+        """Time a lightweight authenticated request, for the health monitor"""
+        started = time.perf_counter()
+        try:
+            response = await self.client.get(
+                f"{self.api_base}/users/me",
+                headers=self.auth_header,
+                params={'_fields': 'id'},
+                timeout=timeout
+            )
+        except Exception as e:
+            return {
+                'success': False,
+                'status_code': None,
+                'latency_ms': (time.perf_counter() - started) * 1000,
+                'error': str(e)
+            }
+        return self._health_result(response, started)
+
+    async def get_posts(self, page: int = 1, per_page: int = 100,
+                        modified_after: Optional[str] = None) -> Dict[str, Any]:
+        """Get one page of published posts, oldest modification first"""
+        try:
+            response = await self.client.get(
+                f"{self.api_base}/posts",
+                headers=self.auth_header,
+                params=self._posts_page_params(page, per_page, modified_after),
+                timeout=30
+            )
+            return self._posts_page_result(response)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    async def get_post(self, post_id: int) -> Dict[str, Any]:
+        """Get a single post"""
+        try:
+            response = await self.client.get(f"{self.api_base}/posts/{post_id}", headers=self.auth_header, timeout=30)
+            if response.status_code == 200:
+                return {'success': True, 'post': response.json()}
+            return self._error_result(response)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    async def get_batch_limit(self) -> int:
+        """Return the site's batch size limit, or 0 if /batch/v1 is unsupported"""
+        if self._batch_limit is None:
+            try:
+                response = await self.client.options(self.batch_url, headers=self.auth_header, timeout=10)
+            except Exception:
+                # Don't cache transient failures
+                return 0
+            self._batch_limit = self._parse_batch_limit(response)
+        return self._batch_limit or 0
+
+    async def batch(self, sub_requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send sub-requests through /batch/v1, chunked at the server limit"""
+        limit = await self.get_batch_limit() or BATCH_DEFAULT_MAX_ITEMS
+        responses = []
+
+        for start in range(0, len(sub_requests), limit):
+            chunk = sub_requests[start:start + limit]
+            try:
+                response = await self.client.post(
+                    self.batch_url,
+                    headers={**self.auth_header, 'Content-Type': 'application/json'},
+                    content=json.dumps({'validation': 'normal', 'requests': chunk}),
+                    timeout=60
+                )
+            except Exception as e:
+                responses.extend({'status': 0, 'body': {'message': str(e)}} for _ in chunk)
+                continue
+            responses.extend(self._batch_chunk_responses(response, chunk))
+
+        return responses
+
+    async def create_posts(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create several posts, batching them when the site supports it"""
+        if not posts:
+            return []
+        if not await self.get_batch_limit():
+            return list(await asyncio.gather(*(self.create_post(**kwargs) for kwargs in posts)))
+
+        bodies = await asyncio.to_thread(
+            lambda: [self._build_post_data(**{'status': 'publish', **kwargs}) for kwargs in posts]
+        )
+        responses = await self.batch(self._post_sub_requests(bodies))
+
+        results = []
+        for kwargs, body, response in zip(posts, bodies, responses):
+            if self._batch_not_allowed(response):
+                result = await self.create_post(**kwargs)
+            else:
+                result = self._batched_post_result(body, response)
+            results.append(result)
+        return results
+
+    async def create_terms(self, taxonomy: str, names: List[str]) -> List[Dict[str, Any]]:
+        """Create categories or tags by name, batching when supported"""
+        if not names:
+            return []
+
+        if await self.get_batch_limit():
+            responses = await self.batch(self._term_sub_requests(taxonomy, names))
+        else:
+            responses = [None] * len(names)
+
+        results = []
+        for name, response in zip(names, responses):
+            if response is None or self._batch_not_allowed(response):
+                response = await self._create_term(taxonomy, name)
+            results.append(self._term_result(name, response))
+        return results
+
+    async def _create_term(self, taxonomy: str, name: str) -> Dict[str, Any]:
+        """Create one term, returning it in batch sub-response form"""
+        try:
+            response = await self.client.post(
+                f"{self.api_base}/{taxonomy}",
+                headers={**self.auth_header, 'Content-Type': 'application/json'},
+                content=json.dumps({'name': name}),
+                timeout=30
+            )
+            return self._sub_response(response)
+        except Exception as e:
+            return {'status': 0, 'body': {'message': str(e)}}
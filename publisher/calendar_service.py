@@ -0,0 +1,236 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Any, List, Optional
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import PublishedPost, PublishIntent, WordPressSite
+from .publishing_service import PublishingService, SiteThrottle
+from .related_posts_service import refresh_neighbourhood
+from .wordpress_service import WordPressService
+
+
+# Posts are pushed to WordPress as 'future' this far ahead of their slot
+PUSH_HORIZON = timedelta(hours=24)
+
+# The earliest slot the calendar hands out, measured from now
+MIN_LEAD_TIME = timedelta(minutes=30)
+
+
+class RequestPacer:
+    """Space requests to one site to stay under its requests-per-minute limit"""
+
+    def __init__(self, per_minute: int):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_at)
+            self._next_at = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class PublishingCalendar:
+    """Spread posts over per-site daily slots and push them as scheduled posts
+
+    ``plan`` gives each post a slot. A site with ``max_posts_per_day`` N
+    gets N evenly spaced slots per UTC day, so no day is ever over its
+    limit. ``push_due`` then sends posts whose slot is within the push
+    horizon: featured media first, then one ``create_post`` with
+    status='future', paced to the site's ``max_requests_per_minute``.
+    WordPress publishes each post at its slot with no further requests.
+    """
+
+    def __init__(self, publishing_service: Optional[PublishingService] = None):
+        self.publishing_service = publishing_service or PublishingService()
+
+    def plan(self, posts, start: Optional[datetime] = None) -> Dict[str, Any]:
+        """Assign the next free calendar slot on its site to each post, in order"""
+        summary = {'scheduled': 0, 'skipped': 0, 'first_slot': None, 'last_slot': None}
+        earliest = max(start or timezone.now(), timezone.now() + MIN_LEAD_TIME)
+
+        posts_by_site = defaultdict(list)
+        for post in posts:
+            if not post.wordpress_site_id or post.status in ('publishing', 'published') or post.wordpress_post_id:
+                summary['skipped'] += 1
+            else:
+                posts_by_site[post.wordpress_site_id].append(post)
+
+        for site_id, site_posts in posts_by_site.items():
+            site = site_posts[0].wordpress_site
+            taken = set(
+                PublishedPost.objects.filter(
+                    wordpress_site_id=site_id, scheduled_for__gte=self._day_start(earliest)
+                ).exclude(id__in=[post.id for post in site_posts]).values_list('scheduled_for', flat=True)
+            )
+
+            slots = self._free_slots(site, earliest, taken)
+            for post in site_posts:
+                slot = next(slots)
+                post.scheduled_for = slot
+                post.status = 'scheduled'
+                post.error_message = ''
+                with transaction.atomic():
+                    post.save(update_fields=['scheduled_for', 'status', 'error_message'])
+                    # A queued post's outbox intent would publish it now, ignoring the slot
+                    PublishIntent.objects.filter(post=post, status='pending').delete()
+                summary['scheduled'] += 1
+                if summary['first_slot'] is None or slot < summary['first_slot']:
+                    summary['first_slot'] = slot
+                if summary['last_slot'] is None or slot > summary['last_slot']:
+                    summary['last_slot'] = slot
+
+        return summary
+
+    def unschedule(self, post: PublishedPost) -> bool:
+        """Take a post off the calendar if it has not been pushed yet"""
+        return PublishedPost.objects.filter(
+            pk=post.pk, status='scheduled', wordpress_post_id=''
+        ).update(status='draft', scheduled_for=None) == 1
+
+    def push_due(self, horizon: timedelta = PUSH_HORIZON) -> Dict[str, Any]:
+        """Send posts whose slot is within ``horizon`` to WordPress as 'future' posts"""
+        summary = {'pushed': 0, 'failed': 0, 'published': 0, 'errors': []}
+        now = timezone.now()
+
+        # Pushed posts whose slot has passed are live now
+        summary['published'] = self._mark_published(now)
+
+        stale_claim = now - PublishedPost.PUBLISH_CLAIM_TIMEOUT
+        due = PublishedPost.objects.filter(
+            Q(status='scheduled') | Q(status='publishing', publish_started_at__lt=stale_claim),
+            wordpress_post_id='',
+            wordpress_site__isnull=False,
+            scheduled_for__isnull=False,
+            scheduled_for__lte=now + horizon
+        ).select_related('wordpress_site').order_by('scheduled_for')
+
+        posts_by_site = defaultdict(list)
+        for post in due:
+            if PublishedPost.claim_for_publishing(post.pk):
+                # Resolve the image here: worker threads never touch the DB
+                posts_by_site[post.wordpress_site_id].append((post, post.images.first()))
+
+        if not posts_by_site:
+            return summary
+
+        with ThreadPoolExecutor(max_workers=len(posts_by_site), thread_name_prefix='wp-calendar') as executor:
+            futures = [
+                executor.submit(self._push_site, site_posts[0][0].wordpress_site, site_posts)
+                for site_posts in posts_by_site.values()
+            ]
+            for future in futures:
+                for post, result in future.result():
+                    self._apply_push_result(post, result, summary)
+
+        return summary
+
+    def _push_site(self, site: WordPressSite, site_posts) -> List[tuple]:
+        """Push one site's posts in slot order, paced; network only"""
+        wp = self.publishing_service.get_wordpress_service(site)
+        pacer = RequestPacer(site.max_requests_per_minute)
+        throttle = SiteThrottle(self.publishing_service.base_delay, self.publishing_service.max_delay)
+        results = []
+        for post, image in site_posts:
+            try:
+                results.append((post, self._push_post(wp, post, image, pacer, throttle)))
+            except Exception as e:
+                results.append((post, {'success': False, 'error': str(e)}))
+        return results
+
+    def _push_post(self, wp: WordPressService, post: PublishedPost, image,
+                   pacer: RequestPacer, throttle: SiteThrottle) -> Dict[str, Any]:
+        media_result = None
+        featured_media_id = None
+        if image and image.wordpress_media_id:
+            featured_media_id = int(image.wordpress_media_id)
+        elif image:
+            # Pre-upload media so the scheduled publish itself is a single request
+            pacer.wait()
+            media_result = self.publishing_service._with_backoff(
+                throttle, wp.upload_media, image.image.path, os.path.basename(image.image.name),
+                image.alt_text
+            )
+            if media_result['success']:
+                featured_media_id = media_result['media_id']
+                media_result['image'] = image
+
+        pacer.wait()
+        result = self.publishing_service._with_backoff(
+            throttle,
+            wp.schedule_post,
+            title=post.title,
+            content=self.publishing_service._post_content(post),
+            publish_date=post.scheduled_for,
+            featured_media_id=featured_media_id
+        )
+        result['media'] = media_result
+        return result
+
+    def _apply_push_result(self, post: PublishedPost, result: Dict[str, Any], summary: Dict[str, Any]):
+        media = result.get('media')
+        if media and media.get('success') and media.get('image'):
+            image = media['image']
+            image.wordpress_media_id = str(media['media_id'])
+            image.wordpress_url = media['url']
+            image.save(update_fields=['wordpress_media_id', 'wordpress_url'])
+
+        post.status = 'scheduled'
+        post.publish_started_at = None
+        if result['success']:
+            post.wordpress_post_id = str(result['post_id'])
+            post.wordpress_url = result['url']
+            post.published_field_hashes = result.get('field_hashes', {})
+            post.error_message = ''
+            summary['pushed'] += 1
+        else:
+            # Stays on the calendar; the next run tries again
+            post.error_message = result['error']
+            summary['failed'] += 1
+            summary['errors'].append({'post_id': post.id, 'title': post.title, 'error': result['error']})
+        post.save(update_fields=[
+            'status', 'publish_started_at', 'wordpress_post_id', 'wordpress_url',
+            'published_field_hashes', 'error_message'
+        ])
+
+    def _mark_published(self, now: datetime) -> int:
+        live = list(PublishedPost.objects.filter(
+            status='scheduled', scheduled_for__lte=now
+        ).exclude(wordpress_post_id='').values_list('id', flat=True))
+        if not live:
+            return 0
+        marked = PublishedPost.objects.filter(id__in=live, status='scheduled').update(
+            status='published', published_at=F('scheduled_for')
+        )
+        # A bulk update sends no post_save; bring related-posts lists in line here
+        refresh_neighbourhood(live)
+        return marked
+
+    def _free_slots(self, site: WordPressSite, earliest: datetime, taken: set):
+        """Yield free slots for a site, from ``earliest`` on, forever"""
+        per_day = max(1, site.max_posts_per_day)
+        spacing = timedelta(days=1) / per_day
+        day = self._day_start(earliest)
+        while True:
+            for i in range(per_day):
+                # Centre slots in their share of the day
+                slot = day + spacing * i + spacing / 2
+                if slot >= earliest and slot not in taken:
+                    taken.add(slot)
+                    yield slot
+            day += timedelta(days=1)
+
+    def _day_start(self, moment: datetime) -> datetime:
+        return moment.astimezone(dt_timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
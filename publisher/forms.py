@@ -57,7 +57,7 @@ class WordPressSiteForm(forms.ModelForm):
     """Form for adding/editing WordPress sites"""
     class Meta:
         model = WordPressSite
-        fields = ['name', 'url', 'username', 'app_password']
+        fields = ['name', 'url', 'username', 'app_password', 'max_posts_per_day', 'max_requests_per_minute']
         widgets = {
             'name': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -80,6 +80,8 @@ class WordPressSiteForm(forms.ModelForm):
                 'required': True,
                 'help_text': 'Generate this in WordPress under Users → Profile → Application Passwords'
             }),
+            'max_posts_per_day': forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
+            'max_requests_per_minute': forms.NumberInput(attrs={'class': 'form-control', 'min': 0}),
         }
         labels = {
             'name': 'Site Name',
@@ -609,12 +611,14 @@ class CustomLoginForm(AuthenticationForm):
 class WordPressSiteForm(forms.ModelForm):
     class Meta:
         model = WordPressSite
-        fields = ['name', 'url', 'username', 'app_password']
+        fields = ['name', 'url', 'username', 'app_password', 'max_posts_per_day', 'max_requests_per_minute']
         widgets = {
             'name': forms.TextInput(attrs={'class': 'form-control'}),
             'url': forms.URLInput(attrs={'class': 'form-control', 'placeholder': 'https://example.com'}),
             'username': forms.TextInput(attrs={'class': 'form-control'}),
             'app_password': forms.PasswordInput(attrs={'class': 'form-control'}),
+            'max_posts_per_day': forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
+            'max_requests_per_minute': forms.NumberInput(attrs={'class': 'form-control', 'min': 0}),
         }
 
 class ContentGenerationForm(forms.Form):
@@ -0,0 +1,287 @@
+import hashlib
+import json
+import re
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+from django.core.cache import cache
+
+
+# Bump when the serializer's output changes, so cached markup is rebuilt
+SERIALIZER_VERSION = 1
+
+# Serialized markup only changes with the content, so keep it for a while
+BLOCK_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+
+# Comments, and opening/closing tags (attribute values may contain '>')
+_TOKEN_RE = re.compile(
+    r'<!--(?P<comment>.*?)-->'
+    r'|<(?P<close>/?)(?P<tag>[a-zA-Z][\w-]*)(?P<attrs>(?:[^>"\']|"[^"]*"|\'[^\']*\')*)>',
+    re.S
+)
+_BLOCK_COMMENT_RE = re.compile(r'\s*(/?)wp:([a-z][\w/-]*)(.*?)(/?)\s*$', re.S)
+_CLASS_RE = re.compile(r'\bclass=(["\'])(.*?)\1', re.S)
+_IMAGE_ID_RE = re.compile(r'\bwp-image-(\d+)\b')
+
+VOID_TAGS = {'area', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+INLINE_TAGS = {
+    'a', 'abbr', 'b', 'br', 'cite', 'code', 'em', 'i', 'kbd', 'mark', 'q',
+    's', 'small', 'span', 'strong', 'sub', 'sup', 'time', 'u'
+}
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+
+
+class Node:
+    """A top-level piece of HTML: text, a comment, an element or a block"""
+
+    __slots__ = ('kind', 'source', 'tag', 'attrs', 'inner')
+
+    def __init__(self, kind: str, source: str, tag: str = '', attrs: str = '', inner: str = ''):
+        self.kind = kind
+        self.source = source
+        self.tag = tag
+        self.attrs = attrs
+        self.inner = inner
+
+    def has_class(self, name: str) -> bool:
+        match = _CLASS_RE.search(self.attrs)
+        return bool(match) and name in match.group(2).split()
+
+
+class GutenbergSerializer:
+    """Convert generated post HTML into Gutenberg block markup
+
+    Paragraphs, headings, lists, tables, quotes, images and buttons become
+    their native blocks. Anything else is kept verbatim in a Custom HTML
+    block, and existing ``<!-- wp:... -->`` blocks pass through untouched.
+    """
+
+    def serialize(self, html: str) -> str:
+        """Serialize a document into block markup"""
+        return '\n\n'.join(self._blocks(html))
+
+    def _blocks(self, html: str) -> List[str]:
+        blocks = []
+        inline = []
+
+        def flush():
+            text = ''.join(inline).strip()
+            inline.clear()
+            if text:
+                blocks.append(self._block('paragraph', f'<p>{text}</p>'))
+
+        for node in self.parse(html):
+            if node.kind == 'text':
+                # Loose text and inline tags form a paragraph per line
+                lines = node.source.split('\n')
+                inline.append(lines[0])
+                for line in lines[1:]:
+                    flush()
+                    inline.append(line)
+            elif node.kind == 'element' and node.tag in INLINE_TAGS:
+                inline.append(node.source)
+            else:
+                flush()
+                block = self._serialize_node(node)
+                if block:
+                    blocks.append(block)
+        flush()
+        return blocks
+
+    def parse(self, html: str) -> List[Node]:
+        """Split HTML into its top-level nodes"""
+        nodes = []
+        pos = 0
+        length = len(html)
+
+        while pos < length:
+            match = _TOKEN_RE.search(html, pos)
+            if not match:
+                nodes.append(Node('text', html[pos:]))
+                break
+            if match.start() > pos:
+                nodes.append(Node('text', html[pos:match.start()]))
+
+            if match.group('comment') is not None:
+                node, pos = self._parse_comment(html, match)
+            elif match.group('close'):
+                # Stray closing tag: keep it with the surrounding text
+                node, pos = Node('text', match.group(0)), match.end()
+            else:
+                node, pos = self._parse_element(html, match)
+            nodes.append(node)
+
+        return nodes
+
+    def _parse_comment(self, html: str, match: re.Match) -> Tuple[Node, int]:
+        block = _BLOCK_COMMENT_RE.match(match.group('comment'))
+        if not block or block.group(1):
+            return Node('comment', match.group(0)), match.end()
+        if block.group(4):
+            # Self-closing block, e.g. <!-- wp:more /-->
+            return Node('block', match.group(0)), match.end()
+
+        name = block.group(2)
+        depth = 1
+        for token in _TOKEN_RE.finditer(html, match.end()):
+            comment = token.group('comment')
+            if comment is None:
+                continue
+            inner = _BLOCK_COMMENT_RE.match(comment)
+            if not inner or inner.group(2) != name or inner.group(4):
+                continue
+            depth += -1 if inner.group(1) else 1
+            if not depth:
+                return Node('block', html[match.start():token.end()]), token.end()
+
+        # Unterminated block: leave the rest of the document inside it
+        return Node('block', html[match.start():]), len(html)
+
+    def _parse_element(self, html: str, match: re.Match) -> Tuple[Node, int]:
+        tag = match.group('tag').lower()
+        attrs = match.group('attrs')
+        if tag in VOID_TAGS or attrs.rstrip().endswith('/'):
+            return Node('element', match.group(0), tag, attrs.rstrip(' /')), match.end()
+
+        depth = 1
+        for token in _TOKEN_RE.finditer(html, match.end()):
+            if token.group('tag') is None or token.group('tag').lower() != tag:
+                continue
+            if token.group('close'):
+                depth -= 1
+            elif not token.group('attrs').rstrip().endswith('/'):
+                depth += 1
+            if not depth:
+                return Node(
+                    'element', html[match.start():token.end()], tag, attrs,
+                    html[match.end():token.start()]
+                ), token.end()
+
+        # Unclosed element: treat the opening tag as text and carry on
+        return Node('text', match.group(0)), match.end()
+
+    def _serialize_node(self, node: Node) -> Optional[str]:
+        if node.kind in ('block', 'comment'):
+            return node.source
+        tag = node.tag
+
+        if tag == 'p':
+            return self._block('paragraph', node.source)
+        if tag in HEADING_TAGS:
+            level = int(tag[1])
+            html = f'<{tag}{self._with_class(node.attrs, "wp-block-heading")}>{node.inner}</{tag}>'
+            return self._block('heading', html, {'level': level} if level != 2 else None)
+        if tag in ('ul', 'ol'):
+            return self._list_block(node)
+        if tag == 'blockquote':
+            inner = '\n\n'.join(self._blocks(node.inner))
+            html = f'<blockquote{self._with_class(node.attrs, "wp-block-quote")}>{inner}</blockquote>'
+            return self._block('quote', html)
+        if tag == 'table':
+            table = f'<table{self._without_class(node.attrs, "wp-block-table")}>{node.inner}</table>'
+            return self._block('table', f'<figure class="wp-block-table">{table}</figure>')
+        if tag == 'figure':
+            if '<table' in node.inner:
+                html = f'<figure{self._with_class(node.attrs, "wp-block-table")}>{node.inner}</figure>'
+                return self._block('table', html)
+            if '<img' in node.inner:
+                return self._image_block(node.attrs, node.inner)
+        if tag == 'img':
+            return self._image_block(' class="wp-block-image"', node.source)
+        if tag == 'div' and node.has_class('wp-block-buttons'):
+            return self._buttons_block(node.source, node.inner)
+        if tag == 'div' and node.has_class('wp-block-button'):
+            return self._buttons_block(
+                '<div class="wp-block-buttons">' + node.source + '</div>', node.source
+            )
+
+        return self._block('html', node.source)
+
+    def _list_block(self, node: Node) -> str:
+        items = []
+        for child in self.parse(node.inner):
+            if child.kind == 'element' and child.tag == 'li':
+                items.append(self._block('list-item', f'<li{child.attrs}>{self._list_item(child.inner)}</li>'))
+            elif child.source.strip():
+                items.append(child.source.strip())
+
+        html = f'<{node.tag}{self._with_class(node.attrs, "wp-block-list")}>' + '\n\n'.join(items) + f'</{node.tag}>'
+        return self._block('list', html, {'ordered': True} if node.tag == 'ol' else None)
+
+    def _list_item(self, inner: str) -> str:
+        """List item content, with nested lists as inner list blocks"""
+        if '<ul' not in inner and '<ol' not in inner:
+            return inner
+        return ''.join(
+            self._list_block(child)
+            if child.kind == 'element' and child.tag in ('ul', 'ol') else child.source
+            for child in self.parse(inner)
+        )
+
+    def _image_block(self, attrs: str, inner: str) -> str:
+        block_attrs = {}
+        image_id = _IMAGE_ID_RE.search(inner)
+        if image_id:
+            block_attrs['id'] = int(image_id.group(1))
+        classes = _CLASS_RE.search(attrs)
+        for name in classes.group(2).split() if classes else ():
+            if name.startswith('size-'):
+                block_attrs['sizeSlug'] = name[len('size-'):]
+        html = f'<figure{self._with_class(attrs, "wp-block-image")}>{inner}</figure>'
+        return self._block('image', html, block_attrs or None)
+
+    def _buttons_block(self, source: str, inner: str) -> str:
+        buttons = []
+        for child in self.parse(inner):
+            if child.kind == 'element' and child.tag == 'div' and child.has_class('wp-block-button'):
+                buttons.append(self._block('button', child.source))
+            elif child.source.strip():
+                buttons.append(child.source.strip())
+
+        open_tag = source[:source.index('>') + 1]
+        close_tag = source[source.rindex('</'):]
+        return self._block('buttons', open_tag + '\n'.join(buttons) + close_tag)
+
+    def _block(self, name: str, html: str, attrs: Optional[Dict[str, Any]] = None) -> str:
+        """Wrap HTML in a block's comment delimiters"""
+        attrs_json = f' {json.dumps(attrs, separators=(",", ":"))}' if attrs else ''
+        return f'<!-- wp:{name}{attrs_json} -->\n{html}\n<!-- /wp:{name} -->'
+
+    def _with_class(self, attrs: str, name: str) -> str:
+        match = _CLASS_RE.search(attrs)
+        if not match:
+            return f'{attrs} class="{name}"'
+        classes = match.group(2).split()
+        if name in classes:
+            return attrs
+        value = ' '.join([name] + classes)
+        return f'{attrs[:match.start()]}class="{value}"{attrs[match.end():]}'
+
+    def _without_class(self, attrs: str, name: str) -> str:
+        match = _CLASS_RE.search(attrs)
+        if not match:
+            return attrs
+        classes = [c for c in match.group(2).split() if c != name]
+        if classes:
+            return f'{attrs[:match.start()]}class="{" ".join(classes)}"{attrs[match.end():]}'
+        return (attrs[:match.start()].rstrip() + attrs[match.end():])
+
+
+def block_cache_key(content: str) -> str:
+    """Cache key for the block markup of a piece of content"""
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    return f'gutenberg:v{SERIALIZER_VERSION}:{digest}'
+
+
+def serialize_blocks(content: str, prepare: Optional[Callable[[str], str]] = None) -> str:
+    """Serialize content to block markup, reusing the cached result for the same content
+
+    ``prepare`` formats the content before it is serialized. The cache is
+    keyed on the content as given, so a hit skips both steps.
+    """
+    key = block_cache_key(content)
+    blocks = cache.get(key)
+    if blocks is None:
+        html = prepare(content) if prepare else content
+        blocks = GutenbergSerializer().serialize(html)
+        cache.set(key, blocks, BLOCK_CACHE_TIMEOUT)
+    return blocks
@@ -0,0 +1,140 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, Any, List, Iterable, Optional
+
+from django.utils import timezone
+
+from .models import SiteHealthCheck, WordPressSite
+from .wordpress_service import WordPressService
+
+
+# Checks older than this are pruned
+HEALTH_HISTORY = timedelta(days=7)
+
+# Window the publish scheduler looks at
+HEALTH_WINDOW = timedelta(hours=1)
+
+# A site whose latest checks all failed is treated as down and skipped
+DOWN_AFTER_FAILURES = 3
+
+# Above either threshold a site is degraded and gets one publish worker
+SLOW_P95_MS = 3000
+DEGRADED_ERROR_RATE = 0.25
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def site_health(site_ids: Iterable[int], window: timedelta = HEALTH_WINDOW) -> Dict[int, Dict[str, Any]]:
+    """Latency percentiles, error rate and state for each site over a recent window
+
+    Sites with no checks in the window are reported as 'unknown' and
+    publish at full concurrency.
+    """
+    site_ids = list(site_ids)
+    checks = defaultdict(list)
+    for check in SiteHealthCheck.objects.filter(
+        wordpress_site_id__in=site_ids, checked_at__gte=timezone.now() - window
+    ).order_by('-checked_at').values('wordpress_site_id', 'ok', 'latency_ms', 'checked_at'):
+        checks[check['wordpress_site_id']].append(check)
+
+    health = {}
+    for site_id in site_ids:
+        site_checks = checks.get(site_id, [])
+        latencies = [c['latency_ms'] for c in site_checks if c['ok'] and c['latency_ms'] is not None]
+        failures = sum(not c['ok'] for c in site_checks)
+
+        consecutive_failures = 0
+        for check in site_checks:
+            if check['ok']:
+                break
+            consecutive_failures += 1
+
+        stats = {
+            'checks': len(site_checks),
+            'error_rate': failures / len(site_checks) if site_checks else 0.0,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'consecutive_failures': consecutive_failures,
+            'last_checked_at': site_checks[0]['checked_at'] if site_checks else None,
+        }
+        stats['state'] = _health_state(stats)
+        health[site_id] = stats
+
+    return health
+
+
+def _health_state(stats: Dict[str, Any]) -> str:
+    if not stats['checks']:
+        return 'unknown'
+    if stats['consecutive_failures'] >= DOWN_AFTER_FAILURES:
+        return 'down'
+    if stats['error_rate'] >= DEGRADED_ERROR_RATE or (stats['p95_ms'] or 0) > SLOW_P95_MS:
+        return 'degraded'
+    return 'healthy'
+
+
+def site_concurrency(stats: Optional[Dict[str, Any]], max_per_site: int) -> int:
+    """Publish workers to use for a site: 0 when down, 1 when degraded"""
+    state = stats['state'] if stats else 'unknown'
+    if state == 'down':
+        return 0
+    if state == 'degraded':
+        return 1
+    return max_per_site
+
+
+class HealthMonitor:
+    """Probe all active sites concurrently and record the results"""
+
+    def __init__(self, max_workers: int = 8, timeout: float = 10):
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+    def get_wordpress_service(self, site: WordPressSite) -> WordPressService:
+        """Build a WordPress client for a site"""
+        return WordPressService(
+            site_url=site.url,
+            username=site.username,
+            app_password=site.app_password
+        )
+
+    def probe_all(self, sites=None) -> List[SiteHealthCheck]:
+        """Probe each site once, in parallel, and store one check per site"""
+        sites = list(sites if sites is not None else WordPressSite.objects.filter(is_active=True))
+        if not sites:
+            return []
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(sites)), thread_name_prefix='wp-health'
+        ) as executor:
+            results = list(executor.map(
+                lambda site: self.get_wordpress_service(site).check_health(self.timeout), sites
+            ))
+
+        checks = [
+            SiteHealthCheck(
+                wordpress_site=site,
+                ok=result['success'],
+                status_code=result['status_code'],
+                latency_ms=result['latency_ms'],
+                error_message=result['error'][:1000]
+            )
+            for site, result in zip(sites, results)
+        ]
+        return SiteHealthCheck.objects.bulk_create(checks)
+
+    def prune(self) -> int:
+        """Delete checks older than the retained history"""
+        deleted, _ = SiteHealthCheck.objects.filter(
+            checked_at__lt=timezone.now() - HEALTH_HISTORY
+        ).delete()
+        return deleted
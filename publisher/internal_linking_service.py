@@ -1,10 +1,20 @@
+import random
 import re
 from typing import List, Dict, Tuple, Optional
-from django.db.models import Q, Count
+from django.db.models import Q
+from .keyword_index_service import STOP_WORDS, is_term
+from .link_graph_service import record_links, remove_post_links, sync_post_links
+from .link_insertion_service import LinkCandidate, LinkInserter
 from .models import PublishedPost, InternalLinkRule, LinkingProfile
-import random
+from .relevance_service import SAME_CATEGORY_BOOST, Bm25Index
+from .rule_matcher_service import get_rule_matcher
 from collections import defaultdict
 
+# Posts with more incoming links than this rank lower
+OVERLINKED_AFTER = 10
+OVERLINKED_PENALTY = 0.8
+
+
 class InternalLinkingService:
     """Service to manage automatic internal linking between posts"""
     
@@ -23,44 +33,43 @@ class InternalLinkingService:
         # Extract keywords from topic and content
         keywords = self._extract_keywords(topic, content)
         
-        # Build query
-        query = Q(status='published') & Q(user=self.user)
+        # Build query. Candidates come from this user's postings, so the
+        # user filter is implied, and leaving it out keeps the lookup on the
+        # primary key instead of the (user, status) index.
+        query = Q(status='published')
         
         # Exclude current post if editing
+        current_post = None
         if current_post_id:
             query &= ~Q(id=current_post_id)
+            current_post = PublishedPost.objects.filter(id=current_post_id).only(
+                'published_at', 'main_category'
+            ).first()
         
         # Exclude newer posts if preference is set
-        if not self.profile.link_to_newer_posts and current_post_id:
-            try:
-                current_post = PublishedPost.objects.get(id=current_post_id)
-                query &= Q(published_at__lt=current_post.published_at)
-            except PublishedPost.DoesNotExist:
-                pass
-        
-        # Search by keywords
-        keyword_query = Q()
-        for keyword in keywords[:10]:  # Use top 10 keywords
-            keyword_query |= (
-                Q(title__icontains=keyword) |
-                Q(topic__icontains=keyword) |
-                Q(keywords__icontains=keyword) |
-                Q(focus_keyword__iexact=keyword)
-            )
-        
-        posts = PublishedPost.objects.filter(query & keyword_query).distinct()
-        
-        # Score and sort posts
-        scored_posts = []
-        for post in posts[:50]:  # Limit initial set for performance
-            score = self._calculate_relevance_score(post, keywords, topic)
-            scored_posts.append((score, post))
-        
-        # Sort by relevance
-        scored_posts.sort(key=lambda x: x[0], reverse=True)
-        
-        # Return top matches
-        return [post for score, post in scored_posts[:limit]]
+        if not self.profile.link_to_newer_posts and current_post and current_post.published_at:
+            query &= Q(published_at__lt=current_post.published_at)
+        
+        same_category = ''
+        if self.profile.prefer_same_category and current_post:
+            same_category = current_post.main_category
+
+        def boost(row) -> float:
+            factor = 1.0
+            if same_category and row.main_category == same_category:
+                factor *= SAME_CATEGORY_BOOST
+            # Penalize posts with too many incoming links
+            if row.inbound_count > OVERLINKED_AFTER:
+                factor *= OVERLINKED_PENALTY
+            return factor
+
+        # BM25 over the keyword postings ranks every post sharing a term
+        terms = [keyword for keyword in keywords[:10] if is_term(keyword)]
+        post_ids = Bm25Index(self.user.id).rank_posts(
+            terms, limit, PublishedPost.objects.filter(query), boost
+        )
+        posts = PublishedPost.objects.in_bulk(post_ids)
+        return [posts[post_id] for post_id in post_ids]
     
     def get_linking_suggestions(self, topic: str, content: str) -> Dict[str, any]:
         """Get suggestions for internal links"""
@@ -85,22 +94,20 @@ class InternalLinkingService:
             for post in relevant_posts
         ]
         
-        # Check for manual linking rules
+        # Check for manual linking rules: one pass of the compiled matcher
+        # finds every rule whose keyword is in the content
         rules = InternalLinkRule.objects.filter(
-            user=self.user,
-            is_active=True
+            id__in=get_rule_matcher(self.user.id).find_rule_ids(content)
         ).select_related('target_post')
         
-        content_lower = content.lower()
         for rule in rules:
-            if rule.keyword.lower() in content_lower:
-                if rule.target_post.wordpress_url:
-                    suggestions['manual_rules'].append({
-                        'keyword': rule.keyword,
-                        'target_url': rule.target_post.wordpress_url,
-                        'target_title': rule.target_post.title,
-                        'priority': rule.priority
-                    })
+            if rule.target_post.wordpress_url:
+                suggestions['manual_rules'].append({
+                    'keyword': rule.keyword,
+                    'target_url': rule.target_post.wordpress_url,
+                    'target_title': rule.target_post.title,
+                    'priority': rule.priority
+                })
         
         # Generate automatic linking suggestions
         keywords = self._extract_keywords(topic, content)
@@ -122,8 +129,12 @@ class InternalLinkingService:
         return suggestions
     
     def auto_insert_internal_links(self, content: str, topic: str,
-                                  current_post_id: Optional[int] = None) -> Tuple[str, List[Dict]]:
-        """Automatically insert internal links into content"""
+                                  current_post_id: Optional[int] = None,
+                                  rng: Optional[random.Random] = None) -> Tuple[str, List[Dict]]:
+        """Automatically insert internal links into content
+
+        Pass a seeded ``rng`` to make anchor text variation repeatable.
+        """
         
         if not self.profile.auto_link_enabled:
             return content, []
@@ -134,71 +145,35 @@ class InternalLinkingService:
         if not relevant_posts:
             return content, []
         
-        # Track inserted links
-        inserted_links = []
-        modified_content = content
-        
-        # First, apply manual linking rules
+        # Manual linking rules come first, only those whose keyword occurs
         rules = InternalLinkRule.objects.filter(
-            user=self.user,
-            is_active=True
+            id__in=get_rule_matcher(self.user.id).find_rule_ids(content)
         ).select_related('target_post').order_by('-priority')
+        candidates = [
+            LinkCandidate(rule.target_post.wordpress_url, rule.target_post.title, [rule.keyword],
+                          {'type': 'rule', 'rule_id': rule.id})
+            for rule in rules
+            if self.used_links[rule.id] < rule.max_usage and rule.target_post.wordpress_url
+        ]
         
-        for rule in rules:
-            if self.used_links[rule.id] >= rule.max_usage:
-                continue
-            
-            if rule.keyword.lower() in modified_content.lower():
-                if rule.target_post.wordpress_url:
-                    # Insert link
-                    modified_content, inserted = self._insert_link(
-                        modified_content,
-                        rule.keyword,
-                        rule.target_post.wordpress_url,
-                        rule.target_post.title
-                    )
-                    if inserted:
-                        self.used_links[rule.id] += 1
-                        inserted_links.append({
-                            'type': 'rule',
-                            'keyword': rule.keyword,
-                            'url': rule.target_post.wordpress_url,
-                            'title': rule.target_post.title
-                        })
-        
-        # Then, add automatic links for remaining posts
-        links_added = len(inserted_links)
-        for post in relevant_posts:
-            if links_added >= self.profile.max_internal_links:
-                break
-            
-            if not post.wordpress_url:
-                continue
-            
-            # Find suitable anchor text
-            anchor_texts = self._generate_anchor_texts(post, self._extract_keywords(topic, content))
-            
-            for anchor in anchor_texts:
-                if anchor.lower() in modified_content.lower():
-                    modified_content, inserted = self._insert_link(
-                        modified_content,
-                        anchor,
-                        post.wordpress_url,
-                        post.title,
-                        vary_anchor=self.profile.vary_anchor_text
-                    )
-                    if inserted:
-                        links_added += 1
-                        inserted_links.append({
-                            'type': 'auto',
-                            'keyword': anchor,
-                            'url': post.wordpress_url,
-                            'title': post.title
-                        })
-                        break
-            
-            if links_added >= self.profile.max_internal_links:
-                break
+        # Then automatic links to the relevant posts, best first
+        keywords = self._extract_keywords(topic, content)
+        candidates += [
+            LinkCandidate(post.wordpress_url, post.title, self._generate_anchor_texts(post, keywords),
+                          {'type': 'auto'})
+            for post in relevant_posts if post.wordpress_url
+        ]
+        
+        inserter = LinkInserter(
+            min_words_between=self.profile.min_words_between_links,
+            max_links=self.profile.max_internal_links,
+            vary_anchor=self.profile.vary_anchor_text,
+            rng=rng
+        )
+        modified_content, inserted_links = inserter.insert(content, candidates)
+        for link in inserted_links:
+            if link['type'] == 'rule':
+                self.used_links[link['rule_id']] += 1
         
         return modified_content, inserted_links
     
@@ -210,19 +185,13 @@ class InternalLinkingService:
         # Remove HTML tags
         text = re.sub(r'<[^>]+>', '', text)
         
-        # Remove common words (simple stop words)
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-                     'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were',
-                     'been', 'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
-                     'would', 'could', 'should', 'may', 'might', 'must', 'can', 'could'}
-        
         # Extract words
         words = re.findall(r'\b[a-z]+\b', text)
         
         # Count frequency
         word_freq = defaultdict(int)
         for word in words:
-            if len(word) > 3 and word not in stop_words:
+            if len(word) > 3 and word not in STOP_WORDS:
                 word_freq[word] += 1
         
         # Sort by frequency
@@ -230,40 +199,6 @@ class InternalLinkingService:
         
         return [word for word, freq in keywords[:20]]
     
-    def _calculate_relevance_score(self, post: PublishedPost, 
-                                  keywords: List[str], topic: str) -> float:
-        """Calculate relevance score between posts"""
-        score = 0.0
-        
-        # Topic similarity
-        topic_lower = topic.lower()
-        post_topic_lower = post.topic.lower()
-        
-        if topic_lower == post_topic_lower:
-            score += 10
-        elif topic_lower in post_topic_lower or post_topic_lower in topic_lower:
-            score += 5
-        
-        # Keyword matching
-        post_keywords = post.keywords.lower().split(',') if post.keywords else []
-        for keyword in keywords[:10]:
-            if keyword in post_keywords:
-                score += 2
-            if keyword in post.title.lower():
-                score += 3
-            if keyword == post.focus_keyword.lower():
-                score += 5
-        
-        # Category matching
-        if self.profile.prefer_same_category and post.main_category:
-            score += 3
-        
-        # Penalize posts with too many incoming links
-        if post.link_to_this_count > 10:
-            score *= 0.8
-        
-        return score
-    
     def _generate_anchor_texts(self, post: PublishedPost, 
                               context_keywords: List[str]) -> List[str]:
         """Generate varied anchor texts for a post"""
@@ -295,55 +230,18 @@ class InternalLinkingService:
         # Remove duplicates and return
         return list(dict.fromkeys(anchors))[:5]
     
-    def _insert_link(self, content: str, anchor_text: str, url: str, 
-                    title: str, vary_anchor: bool = True) -> Tuple[str, bool]:
-        """Insert a link into content at the first occurrence of anchor text"""
-        
-        # Check if anchor text already has a link
-        pattern = re.compile(
-            rf'<a[^>]*>{re.escape(anchor_text)}</a>',
-            re.IGNORECASE
-        )
-        if pattern.search(content):
-            return content, False
-        
-        # Vary anchor text if requested
-        if vary_anchor and random.random() > 0.5:
-            # Sometimes use variations
-            variations = [
-                f"learn more about {anchor_text}",
-                f"see our guide on {anchor_text}",
-                f"check out {anchor_text}",
-                anchor_text
-            ]
-            anchor_display = random.choice(variations)
-        else:
-            anchor_display = anchor_text
-        
-        # Create link HTML
-        link_html = f'<a href="{url}" title="{title}" class="internal-link">{anchor_display}</a>'
-        
-        # Find and replace first occurrence (case-insensitive)
-        pattern = re.compile(re.escape(anchor_text), re.IGNORECASE)
-        modified_content, count = pattern.subn(link_html, content, count=1)
-        
-        return modified_content, count > 0
-    
     def update_link_statistics(self, post_id: int, linked_posts: List[int]):
-        """Update link statistics for posts"""
-        # Update link_to_this_count for linked posts
-        PublishedPost.objects.filter(id__in=linked_posts).update(
-            link_to_this_count=models.F('link_to_this_count') + 1
-        )
-        
-        # Store internal links in the post
-        try:
-            post = PublishedPost.objects.get(id=post_id)
-            post.internal_links = {'linked_to': linked_posts}
-            post.save(update_fields=['internal_links'])
-        except PublishedPost.DoesNotExist:
-            pass
+        """Record the posts a post links to, in link order"""
+        record_links(post_id, linked_posts)
     
+    def sync_links_from_content(self, post: PublishedPost) -> List[int]:
+        """Re-derive a post's internal links from its HTML"""
+        return sync_post_links(post)
+
+    def remove_post_links(self, post: PublishedPost):
+        """Drop a post from the link graph, in both directions"""
+        remove_post_links(post)
+
     def create_linking_rules_from_post(self, post: PublishedPost):
         """Automatically create linking rules from a published post"""
         if not self.profile.auto_create_rules:
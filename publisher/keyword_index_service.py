@@ -0,0 +1,70 @@
+import re
+from collections import Counter
+from typing import Iterable, List
+
+from django.db import transaction
+
+from .linking_index_service import mark_changed
+from .models import KeywordPosting, PublishedPost
+
+
+# Post fields whose words are indexed; saving any other field skips reindexing
+INDEXED_FIELDS = ('title', 'topic', 'keywords', 'focus_keyword')
+
+STOP_WORDS = {
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were',
+    'been', 'be', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
+    'would', 'could', 'should', 'may', 'might', 'must', 'can',
+}
+
+MAX_TERM_LENGTH = 64
+
+_WORD_RE = re.compile(r'\b[a-z]+\b')
+
+
+def is_term(word: str) -> bool:
+    """Whether a lowercase word is worth indexing or searching for"""
+    return 3 < len(word) <= MAX_TERM_LENGTH and word not in STOP_WORDS
+
+
+def post_term_counts(post: PublishedPost) -> Counter:
+    """Term frequencies of a post's indexed fields: its sparse term vector"""
+    text = ' '.join(getattr(post, field) or '' for field in INDEXED_FIELDS).lower()
+    return Counter(word for word in _WORD_RE.findall(text) if is_term(word))
+
+
+def _postings(post: PublishedPost, counts: Counter) -> List[KeywordPosting]:
+    doc_length = sum(counts.values())
+    return [
+        KeywordPosting(user_id=post.user_id, post_id=post.pk, term=term, tf=tf, doc_length=doc_length)
+        for term, tf in counts.items()
+    ]
+
+
+def index_post(post: PublishedPost) -> bool:
+    """Bring one post's postings in line with its fields; returns whether they changed"""
+    counts = post_term_counts(post)
+    doc_length = sum(counts.values())
+    existing = {
+        term: (tf, length)
+        for term, tf, length in KeywordPosting.objects.filter(post=post).values_list('term', 'tf', 'doc_length')
+    }
+    if existing == {term: (tf, doc_length) for term, tf in counts.items()}:
+        return False
+    with transaction.atomic():
+        KeywordPosting.objects.filter(post=post).delete()
+        KeywordPosting.objects.bulk_create(_postings(post, counts))
+        mark_changed([post.pk])
+    return True
+
+
+def index_posts(posts: Iterable[PublishedPost], batch_size: int = 1000) -> int:
+    """Rebuild postings for many posts at once; returns postings written"""
+    posts = list(posts)
+    postings = [posting for post in posts for posting in _postings(post, post_term_counts(post))]
+    with transaction.atomic():
+        KeywordPosting.objects.filter(post__in=[post.pk for post in posts]).delete()
+        KeywordPosting.objects.bulk_create(postings, batch_size=batch_size)
+        mark_changed(post.pk for post in posts)
+    return len(postings)
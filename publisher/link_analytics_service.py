@@ -0,0 +1,159 @@
+import time
+from datetime import timedelta
+from typing import Any, Dict, List
+
+import numpy as np
+from django.utils import timezone
+
+from .models import PostLink, PublishedPost, SiteLinkReport
+
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-9  # L1 change between iterations
+PAGERANK_MAX_ITERATIONS = 100
+
+# Posts listed per section of the report
+REPORT_SIZE = 20
+
+# The analysis job refreshes reports well within this; older ones are recomputed on read
+LINK_REPORT_MAX_AGE = timedelta(hours=24)
+
+
+class LinkGraph:
+    """A site's published posts and the links between them, as index arrays
+
+    Edge i runs from node ``sources[i]`` to node ``targets[i]``; node j is
+    post ``post_ids[j]``. Several links between the same two posts count as
+    one edge. Edges are kept sorted by source, so ``offsets`` slices out
+    each node's outbound edges as in a CSR matrix.
+    """
+
+    def __init__(self, post_ids: np.ndarray, sources: np.ndarray, targets: np.ndarray):
+        self.post_ids = post_ids
+        self.n = len(post_ids)
+        pairs = np.unique(sources * max(self.n, 1) + targets)
+        self.sources, self.targets = np.divmod(pairs, max(self.n, 1))
+        self.out_degree = np.bincount(self.sources, minlength=self.n)
+        self.in_degree = np.bincount(self.targets, minlength=self.n)
+        self.offsets = np.concatenate(([0], np.cumsum(self.out_degree)))
+
+    @classmethod
+    def for_site(cls, site_id: int) -> 'LinkGraph':
+        posts = PublishedPost.objects.filter(wordpress_site_id=site_id, status='published')
+        post_ids = np.fromiter(posts.order_by('id').values_list('id', flat=True), dtype=np.int64)
+        edges = np.array(
+            PostLink.objects.filter(source__in=posts, target__in=posts).values_list('source_id', 'target_id'),
+            dtype=np.int64
+        ).reshape(-1, 2)
+        return cls(post_ids, np.searchsorted(post_ids, edges[:, 0]), np.searchsorted(post_ids, edges[:, 1]))
+
+    def pagerank(self, damping: float = PAGERANK_DAMPING, tolerance: float = PAGERANK_TOLERANCE,
+                 max_iterations: int = PAGERANK_MAX_ITERATIONS) -> np.ndarray:
+        """PageRank by power iteration; dead ends spread their rank evenly"""
+        if not self.n:
+            return np.empty(0)
+        rank = np.full(self.n, 1.0 / self.n)
+        share = 1.0 / self.out_degree[self.sources]
+        dead_ends = self.out_degree == 0
+        for _ in range(max_iterations):
+            spread = np.bincount(self.targets, weights=rank[self.sources] * share, minlength=self.n)
+            updated = (1 - damping) / self.n + damping * (spread + rank[dead_ends].sum() / self.n)
+            converged = np.abs(updated - rank).sum() < tolerance
+            rank = updated
+            if converged:
+                break
+        return rank
+
+    def distances_from(self, start: np.ndarray) -> np.ndarray:
+        """Clicks from the nearest ``start`` node (a boolean mask) to each node; -1 if unreachable"""
+        distance = np.full(self.n, -1, dtype=np.int64)
+        frontier = np.flatnonzero(start)
+        distance[frontier] = 0
+        level = 0
+        while len(frontier):
+            level += 1
+            # Gather the outbound edges of every frontier node at once
+            counts = self.out_degree[frontier]
+            total = int(counts.sum())
+            if not total:
+                break
+            starts = np.repeat(self.offsets[frontier] - np.cumsum(counts) + counts, counts)
+            reached = np.unique(self.targets[starts + np.arange(total)])
+            frontier = reached[distance[reached] < 0]
+            distance[frontier] = level
+        return distance
+
+
+def analyze_site_links(site_id: int) -> Dict[str, Any]:
+    """Authority, orphans, dead ends and pillar distances for one site's posts"""
+    started = time.perf_counter()
+    graph = LinkGraph.for_site(site_id)
+    rank = graph.pagerank()
+    pillars = np.isin(
+        graph.post_ids,
+        list(PublishedPost.objects.filter(
+            wordpress_site_id=site_id, status='published', pillar_post=True
+        ).values_list('id', flat=True))
+    )
+    distance = graph.distances_from(pillars)
+
+    orphans = np.flatnonzero(graph.in_degree == 0)
+    dead_ends = np.flatnonzero(graph.out_degree == 0)
+    unreachable = np.flatnonzero(distance < 0)
+    # Authority relative to the average post, so 1.0 means average
+    authority = rank * graph.n
+
+    top = np.argsort(-rank, kind='stable')[:REPORT_SIZE]
+    farthest = np.argsort(-np.where(distance < 0, np.iinfo(np.int64).max, distance), kind='stable')[:REPORT_SIZE]
+    listed = [orphans[:REPORT_SIZE], dead_ends[:REPORT_SIZE], top, farthest if pillars.any() else []]
+    titles = dict(PublishedPost.objects.filter(
+        id__in=[int(graph.post_ids[i]) for nodes in listed for i in nodes]
+    ).values_list('id', 'title'))
+
+    def entries(nodes) -> List[Dict[str, Any]]:
+        return [
+            {
+                'id': int(graph.post_ids[i]),
+                'title': titles.get(int(graph.post_ids[i]), ''),
+                'authority': round(float(authority[i]), 3),
+                'inbound': int(graph.in_degree[i]),
+                'outbound': int(graph.out_degree[i]),
+                'pillar_distance': int(distance[i]) if distance[i] >= 0 else None,
+            }
+            for i in nodes
+        ]
+
+    reachable = distance[distance >= 0]
+    return {
+        'site_id': site_id,
+        'posts': graph.n,
+        'links': len(graph.sources),
+        'pillars': int(pillars.sum()),
+        'orphans': len(orphans),
+        'dead_ends': len(dead_ends),
+        'unreachable_from_pillars': len(unreachable) if pillars.any() else None,
+        'pillar_distance_counts': {int(d): int(c) for d, c in zip(*np.unique(reachable, return_counts=True))},
+        'top_authority': entries(top),
+        'orphan_posts': entries(orphans[:REPORT_SIZE]),
+        'dead_end_posts': entries(dead_ends[:REPORT_SIZE]),
+        'farthest_from_pillars': entries(farthest) if pillars.any() else [],
+        'computed_at': timezone.now().isoformat(),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def refresh_link_report(site_id: int) -> Dict[str, Any]:
+    """Analyze a site's link graph and store the report for the dashboard"""
+    report = analyze_site_links(site_id)
+    SiteLinkReport.objects.update_or_create(
+        wordpress_site_id=site_id, defaults={'report': report, 'computed_at': timezone.now()}
+    )
+    return report
+
+
+def get_link_report(site_id: int) -> Dict[str, Any]:
+    """The stored link report for a site, analyzing it if there is none or it is too old"""
+    stored = SiteLinkReport.objects.filter(
+        wordpress_site_id=site_id, computed_at__gte=timezone.now() - LINK_REPORT_MAX_AGE
+    ).values_list('report', flat=True).first()
+    return stored if stored is not None else refresh_link_report(site_id)
@@ -0,0 +1,139 @@
+import html
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
+
+from django.db import transaction
+from django.db.models import Count, Exists, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .linking_index_service import mark_changed
+from .models import PostLink, PublishedPost
+
+
+# Post fields links are read from; saving any other field leaves the links alone
+LINK_FIELDS = ('html_content', 'edited_content', 'content')
+
+# URLs resolved to posts per query
+URL_BATCH_SIZE = 500
+
+_LINK_RE = re.compile(r'<a\s[^>]*?href=["\']([^"\']+)["\'][^>]*>(.*?)</a>', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def _url_key(href: str) -> str:
+    return href.split('#')[0].rstrip('/')
+
+
+def _post_anchors(post: PublishedPost) -> List[tuple]:
+    """(url key, anchor text) of each link in the post's HTML, in order"""
+    content = post.html_content or post.edited_content or post.content or ''
+    return [
+        (_url_key(href), html.unescape(_TAG_RE.sub('', text)).strip()[:255])
+        for href, text in _LINK_RE.findall(content)
+    ]
+
+
+def _resolve_urls(user_id: int, keys: Set[str]) -> Dict[str, int]:
+    """Post id by url key, for the user's posts living at those URLs"""
+    keys = sorted(key for key in keys if key)
+    resolved = {}
+    for start in range(0, len(keys), URL_BATCH_SIZE):
+        batch = keys[start:start + URL_BATCH_SIZE]
+        urls = batch + [key + '/' for key in batch]
+        for pk, url in PublishedPost.objects.filter(user_id=user_id, wordpress_url__in=urls).values_list('id', 'wordpress_url'):
+            resolved[_url_key(url)] = pk
+    return resolved
+
+
+def _edges(post: PublishedPost, anchors: List[tuple], resolved: Dict[str, int]) -> List[PostLink]:
+    links = []
+    for key, anchor in anchors:
+        target_id = resolved.get(key)
+        if target_id and target_id != post.pk:
+            links.append(PostLink(source_id=post.pk, target_id=target_id, anchor=anchor, position=len(links)))
+    return links
+
+
+def set_outbound_links(post_id: int, links: List[PostLink]) -> bool:
+    """Replace a post's outbound links; returns whether they changed"""
+    current = list(PostLink.objects.filter(source_id=post_id).order_by('position').values_list('target_id', 'anchor'))
+    if current == [(link.target_id, link.anchor) for link in links]:
+        return False
+    with transaction.atomic():
+        PostLink.objects.filter(source_id=post_id).delete()
+        PostLink.objects.bulk_create(links)
+        # Inbound counts moved on both the old and the new targets
+        mark_changed({target_id for target_id, _ in current} | {link.target_id for link in links})
+    return True
+
+
+def sync_post_links(post: PublishedPost) -> List[int]:
+    """Re-derive a post's outbound links from its HTML; returns the linked post ids"""
+    anchors = _post_anchors(post)
+    links = _edges(post, anchors, _resolve_urls(post.user_id, {key for key, _ in anchors}))
+    set_outbound_links(post.pk, links)
+    return sorted({link.target_id for link in links})
+
+
+def index_links(posts: Iterable[PublishedPost], batch_size: int = 1000) -> int:
+    """Re-derive the outbound links of many posts at once; returns links written"""
+    posts = list(posts)
+    anchors = {post.pk: _post_anchors(post) for post in posts}
+
+    keys_by_user = defaultdict(set)
+    for post in posts:
+        keys_by_user[post.user_id].update(key for key, _ in anchors[post.pk])
+    resolved = {user_id: _resolve_urls(user_id, keys) for user_id, keys in keys_by_user.items()}
+
+    links = [link for post in posts for link in _edges(post, anchors[post.pk], resolved[post.user_id])]
+    with transaction.atomic():
+        previous = PostLink.objects.filter(source__in=[post.pk for post in posts])
+        mark_changed(set(previous.values_list('target_id', flat=True)) | {link.target_id for link in links})
+        previous.delete()
+        PostLink.objects.bulk_create(links, batch_size=batch_size)
+    return len(links)
+
+
+def record_links(post_id: int, target_ids: List[int], anchors: List[str] = None) -> bool:
+    """Set a post's outbound links from ids known by the caller, in link order"""
+    anchors = anchors or [''] * len(target_ids)
+    links = [
+        PostLink(source_id=post_id, target_id=target_id, anchor=anchor[:255], position=position)
+        for position, (target_id, anchor) in enumerate(zip(target_ids, anchors)) if target_id != post_id
+    ]
+    return set_outbound_links(post_id, links)
+
+
+def remove_post_links(post: PublishedPost) -> int:
+    """Drop a post from the link graph, in both directions; returns links removed"""
+    links = PostLink.objects.filter(Q(source=post) | Q(target=post))
+    mark_changed([post.pk, *links.filter(source=post).values_list('target_id', flat=True)])
+    deleted, _ = links.delete()
+    return deleted
+
+
+def _link_count(field: str):
+    links = PostLink.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+    return Coalesce(Subquery(links.annotate(count=Count('*')).values('count'), output_field=IntegerField()), 0)
+
+
+def inbound_link_count():
+    """Expression counting the links pointing at each post of a queryset"""
+    return _link_count('target')
+
+
+def outbound_link_count():
+    """Expression counting the links each post of a queryset makes"""
+    return _link_count('source')
+
+
+def with_link_counts(posts):
+    """Annotate posts with inbound_count and outbound_count"""
+    return posts.annotate(inbound_count=inbound_link_count(), outbound_count=outbound_link_count())
+
+
+def orphan_posts(user_id: int):
+    """Published posts no other published post links to"""
+    linked = PostLink.objects.filter(target=OuterRef('pk'), source__status='published')
+    return PublishedPost.objects.filter(user_id=user_id, status='published').filter(~Exists(linked))
@@ -0,0 +1,209 @@
+import html
+import random
+import re
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+
+# Text inside these elements is never linked: existing links, headings,
+# and anything that is not running prose
+SKIP_ELEMENTS = {
+    'a', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'script', 'style', 'code', 'pre', 'button', 'label', 'select', 'textarea',
+}
+
+# Marks the links LinkInserter writes, so relinking can find and replace them
+LINK_CLASS = 'internal-link'
+
+# Phrases varied anchors are prefixed with. Links written before the
+# original text was kept in data-anchor are restored by dropping these.
+ANCHOR_PREFIXES = ('learn more about ', 'see our guide on ', 'check out ')
+
+_INSERTED_LINK_RE = re.compile(
+    rf'<a\s([^>]*\bclass="{LINK_CLASS}"[^>]*)>(.*?)</a>', re.IGNORECASE | re.DOTALL
+)
+_DATA_ANCHOR_RE = re.compile(r'\bdata-anchor="([^"]*)"')
+_ANCHOR_PREFIX_RE = re.compile('^(?:' + '|'.join(re.escape(prefix) for prefix in ANCHOR_PREFIXES) + ')')
+_TOKEN_RE = re.compile(r'(<!--.*?-->|<[^>]*>)', re.DOTALL)
+_TAG_RE = re.compile(r'<\s*(/?)\s*([a-zA-Z][a-zA-Z0-9]*)([^>]*?)(/?)\s*>', re.DOTALL)
+_HREF_RE = re.compile(r'\bhref\s*=\s*["\']([^"\']*)["\']', re.IGNORECASE)
+# Words, and character references so they are not counted as words
+_WORD_RE = re.compile(r'&#?\w+;|\w+')
+
+
+def _url_key(url: str) -> str:
+    return url.split('#')[0].rstrip('/')
+
+
+def _count_words(text: str, start: int = 0, end: int = None) -> int:
+    return sum(1 for word in _WORD_RE.findall(text, start, len(text) if end is None else end) if word[0] != '&')
+
+
+class LinkCandidate(NamedTuple):
+    """A post that may be linked to, with the phrases that may carry the link
+
+    ``info`` is copied into the result for each link placed.
+    """
+    url: str
+    title: str
+    phrases: List[str]
+    info: Optional[Dict[str, Any]] = None
+
+
+class _Occurrence(NamedTuple):
+    position: int  # words before the match in the whole document
+    token: int
+    start: int
+    end: int
+    text: str
+
+
+class LinkInserter:
+    """Place internal links in HTML without touching its markup
+
+    The document is split into tags and text nodes once, counting words as
+    it goes, which gives every existing link a word position. All candidate
+    phrases are then found in the linkable text nodes with one regex, links
+    are chosen in candidate order, at most one per target URL, each at
+    least ``min_words_between`` words from every other link, and written
+    back in a single rewrite of the text nodes.
+    """
+
+    def __init__(self, min_words_between: int = 0, max_links: Optional[int] = None,
+                 vary_anchor: bool = False, rng: random.Random = None):
+        self.min_words_between = max(min_words_between, 0)
+        self.max_links = max_links
+        self.vary_anchor = vary_anchor
+        self.rng = rng or random.Random()
+
+    def insert(self, content: str, candidates: List[LinkCandidate]) -> Tuple[str, List[Dict[str, Any]]]:
+        """(new content, the links placed, in candidate order)"""
+        tokens = _TOKEN_RE.split(content)
+        text_nodes, link_positions, linked_urls = self._walk(tokens)
+        occurrences = self._find(tokens, text_nodes, candidates)
+
+        taken = sorted(link_positions)
+        chosen: List[Tuple[LinkCandidate, str, _Occurrence]] = []
+        spans: Dict[int, List[Tuple[int, int]]] = {}
+        for candidate in candidates:
+            if self.max_links is not None and len(chosen) >= self.max_links:
+                break
+            url = _url_key(candidate.url)
+            if not url or url in linked_urls:
+                continue
+            placed = self._place(candidate, occurrences, taken, spans)
+            if placed:
+                phrase, occurrence = placed
+                chosen.append((candidate, phrase, occurrence))
+                linked_urls.add(url)
+                insort(taken, occurrence.position)
+                spans.setdefault(occurrence.token, []).append((occurrence.start, occurrence.end))
+
+        return self._rewrite(tokens, chosen), [
+            {
+                **(candidate.info or {}),
+                'keyword': phrase,
+                'url': candidate.url,
+                'title': candidate.title,
+                'position': occurrence.position,
+            }
+            for candidate, phrase, occurrence in chosen
+        ]
+
+    def _walk(self, tokens: List[str]):
+        """Linkable text nodes as (token index, word offset), existing link positions and URLs"""
+        text_nodes = []
+        link_positions = []
+        linked_urls = set()
+        skip_depth: Dict[str, int] = {}
+        words = 0
+        for index, token in enumerate(tokens):
+            if index % 2 == 0:
+                if token and not any(skip_depth.values()):
+                    text_nodes.append((index, words))
+                words += _count_words(token)
+                continue
+
+            tag = _TAG_RE.match(token)
+            if not tag:
+                continue
+            closing, name, attributes, self_closing = tag.groups()
+            name = name.lower()
+            if name == 'a' and not closing:
+                link_positions.append(words)
+                href = _HREF_RE.search(attributes)
+                if href:
+                    linked_urls.add(_url_key(html.unescape(href.group(1))))
+            if name in SKIP_ELEMENTS and not self_closing:
+                skip_depth[name] = max(skip_depth.get(name, 0) + (-1 if closing else 1), 0)
+        return text_nodes, link_positions, linked_urls
+
+    def _find(self, tokens: List[str], text_nodes: List[Tuple[int, int]],
+              candidates: List[LinkCandidate]) -> Dict[str, List[_Occurrence]]:
+        """Whole-word occurrences of every candidate phrase, by lowercased phrase, in document order"""
+        phrases = {
+            html.escape(phrase.strip(), quote=False).lower()
+            for candidate in candidates for phrase in candidate.phrases if phrase.strip()
+        }
+        occurrences: Dict[str, List[_Occurrence]] = {}
+        if not phrases:
+            return occurrences
+        pattern = re.compile(
+            r'(?<!\w)(?:' + '|'.join(re.escape(p) for p in sorted(phrases, key=len, reverse=True)) + r')(?!\w)',
+            re.IGNORECASE
+        )
+        for index, offset in text_nodes:
+            text = tokens[index]
+            counted_to, words = 0, offset
+            for match in pattern.finditer(text):
+                words += _count_words(text, counted_to, match.start())
+                counted_to = match.start()
+                occurrences.setdefault(match.group(0).lower(), []).append(
+                    _Occurrence(words, index, match.start(), match.end(), match.group(0))
+                )
+        return occurrences
+
+    def _place(self, candidate: LinkCandidate, occurrences: Dict[str, List[_Occurrence]],
+               taken: List[int], spans: Dict[int, List[Tuple[int, int]]]):
+        """The candidate's first phrase occurrence that keeps its distance from every link"""
+        for phrase in candidate.phrases:
+            for occurrence in occurrences.get(html.escape(phrase.strip(), quote=False).lower(), []):
+                if any(start < occurrence.end and occurrence.start < end
+                       for start, end in spans.get(occurrence.token, [])):
+                    continue
+                i = bisect_left(taken, occurrence.position)
+                neighbours = taken[max(i - 1, 0):i + 1]
+                if all(abs(occurrence.position - position) >= self.min_words_between for position in neighbours):
+                    return phrase, occurrence
+        return None
+
+    def _rewrite(self, tokens: List[str], chosen) -> str:
+        by_token: Dict[int, list] = {}
+        for candidate, _, occurrence in chosen:
+            by_token.setdefault(occurrence.token, []).append((occurrence, candidate))
+        for index, placed in by_token.items():
+            text = tokens[index]
+            # Right to left, so earlier offsets stay valid
+            for occurrence, candidate in sorted(placed, key=lambda item: item[0].start, reverse=True):
+                text = text[:occurrence.start] + self._link_html(candidate, occurrence.text) + text[occurrence.end:]
+            tokens[index] = text
+        return ''.join(tokens)
+
+    def _link_html(self, candidate: LinkCandidate, text: str) -> str:
+        attributes = f'href="{html.escape(candidate.url)}" title="{html.escape(candidate.title)}" class="{LINK_CLASS}"'
+        if self.vary_anchor and self.rng.random() > 0.5:
+            # Sometimes use variations; the original text is kept so
+            # strip_internal_links can put it back
+            varied = self.rng.choice(ANCHOR_PREFIXES) + text
+            return f'<a {attributes} data-anchor="{html.escape(text)}">{varied}</a>'
+        return f'<a {attributes}>{text}</a>'
+
+
+def strip_internal_links(content: str) -> str:
+    """Remove the links LinkInserter placed, restoring the text they replaced"""
+    def original_text(match) -> str:
+        anchor = _DATA_ANCHOR_RE.search(match.group(1))
+        if anchor:
+            return html.unescape(anchor.group(1))
+        return _ANCHOR_PREFIX_RE.sub('', match.group(2), count=1)
+    return _INSERTED_LINK_RE.sub(original_text, content)
@@ -0,0 +1,311 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import (
+    InternalLinkRule, KeywordPosting, LinkingIndexChange, LinkingProfile, PostLink, PublishedPost,
+)
+
+
+MAGIC = b'LNKIDX01'
+ALIGNMENT = 64
+
+# How often a process checks whether the index file was rebuilt
+RELOAD_CHECK_INTERVAL = 5.0  # seconds
+
+# Changes are read back from this long before a build started, so one
+# whose transaction was still open while the build read the tables counts
+CHANGE_MARGIN = timedelta(minutes=1)
+
+_current: Optional['LinkingIndex'] = None
+_current_key: Optional[tuple] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _strings(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """UTF-8 blob and offsets for a list of strings"""
+    encoded = [value.encode() for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+class LinkingIndex:
+    """Read-only view of a linking index file, mapped into memory
+
+    Every array is a view straight onto the mapping, so the pages are
+    shared by all processes that open the same file, however many there
+    are. Terms are grouped by user and sorted; each term's postings are a
+    slice of the postings arrays, as in a CSR matrix.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'{path} is not a linking index')
+        header_length, = struct.unpack_from('<Q', self._map, len(MAGIC))
+        start = len(MAGIC) + 8
+        self.header = json.loads(self._map[start:start + header_length])
+        data_start = _aligned(start + header_length)
+
+        for name, (offset, dtype, shape) in self.header['arrays'].items():
+            count = int(np.prod(shape))
+            view = np.frombuffer(self._map, dtype=dtype, count=count, offset=data_start + offset)
+            setattr(self, name, view.reshape(shape))
+
+        self.built_at = datetime.fromisoformat(self.header['built_at'])
+        self.max_post_id = self.header['max_post_id']
+        self.rule_versions = self.header['rule_versions']
+
+    def _string(self, blob: np.ndarray, offsets: np.ndarray, i: int) -> bytes:
+        return blob[offsets[i]:offsets[i + 1]].tobytes()
+
+    def _user_slot(self, user_id: int) -> int:
+        slot = int(np.searchsorted(self.users, user_id))
+        return slot if slot < len(self.users) and self.users[slot] == user_id else -1
+
+    def _term_slot(self, user_slot: int, term: str) -> int:
+        lo, hi = int(self.user_terms[user_slot]), int(self.user_terms[user_slot + 1])
+        end = hi
+        target = term.encode()
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._string(self.term_text, self.term_offsets, mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < end and self._string(self.term_text, self.term_offsets, lo) == target:
+            return lo
+        return -1
+
+    def postings(self, user_id: int, terms: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(post ids, term position in ``terms``, tf, doc length), one row per posting"""
+        user_slot = self._user_slot(user_id)
+        ranges = []
+        if user_slot >= 0:
+            for position, term in enumerate(terms):
+                slot = self._term_slot(user_slot, term)
+                if slot >= 0:
+                    ranges.append((position, int(self.posting_offsets[slot]), int(self.posting_offsets[slot + 1])))
+        if not ranges:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0), np.empty(0)
+        return (
+            np.concatenate([self.posting_posts[lo:hi] for _, lo, hi in ranges]),
+            np.repeat([position for position, _, _ in ranges], [hi - lo for _, lo, hi in ranges]),
+            np.concatenate([self.posting_tf[lo:hi] for _, lo, hi in ranges]).astype(np.float64),
+            np.concatenate([self.posting_doc_length[lo:hi] for _, lo, hi in ranges]).astype(np.float64),
+        )
+
+    def corpus_stats(self, user_id: int) -> Optional[Tuple[int, float]]:
+        """(indexed posts, average indexed length) when the index was built"""
+        slot = self._user_slot(user_id)
+        if slot < 0:
+            return None
+        return int(self.user_posts[slot]), float(self.user_avgdl[slot])
+
+    def inbound_counts(self, post_ids: List[int]) -> Dict[int, int]:
+        """Inbound link count of the given posts the index holds"""
+        if not len(self.post_ids):
+            return {}
+        ids = np.asarray(post_ids, dtype=np.int64)
+        slots = np.minimum(np.searchsorted(self.post_ids, ids), len(self.post_ids) - 1)
+        found = self.post_ids[slots] == ids
+        return dict(zip(ids[found].tolist(), self.post_inbound[slots[found]].tolist()))
+
+    def changed_post_ids(self) -> List[int]:
+        """Posts whose rows here went out of date after the build"""
+        return list(LinkingIndexChange.objects.filter(
+            changed_at__gte=self.built_at - CHANGE_MARGIN
+        ).values_list('post_id', flat=True).distinct())
+
+    def rules(self, user_id: int) -> List[Tuple[int, str]]:
+        """(rule id, keyword) of the user's active rules when the index was built"""
+        lo, hi = np.searchsorted(self.rule_users, [user_id, user_id + 1])
+        return [
+            (int(self.rule_ids[i]), self._string(self.rule_text, self.rule_offsets, i).decode())
+            for i in range(lo, hi)
+        ]
+
+
+def get_linking_index() -> Optional[LinkingIndex]:
+    """This process's mapping of the current index file, or None without one
+
+    The file is re-checked every few seconds; a rebuilt file (a new inode,
+    moved into place) is mapped afresh, and the old mapping goes away once
+    no request holds arrays from it.
+    """
+    global _current, _current_key, _checked_at
+    path = getattr(settings, 'LINKING_INDEX_PATH', None)
+    if not path:
+        return None
+
+    now = time.monotonic()
+    with _lock:
+        if now - _checked_at < RELOAD_CHECK_INTERVAL:
+            return _current
+        _checked_at = now
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            _current, _current_key = None, None
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if key != _current_key:
+            try:
+                _current = LinkingIndex(path)
+            except (OSError, ValueError):
+                _current = None
+            _current_key = key
+        return _current
+
+
+def mark_changed(post_ids: Iterable[int]):
+    """Record posts whose postings or inbound links changed, for readers of the built index"""
+    LinkingIndexChange.objects.bulk_create([LinkingIndexChange(post_id=post_id) for post_id in set(post_ids)])
+
+
+def _write(path, arrays: Dict[str, np.ndarray], header: dict):
+    """Write arrays to ``path`` through a temporary file and an atomic rename"""
+    layout = {}
+    offset = 0
+    for name, values in arrays.items():
+        offset = _aligned(offset)
+        layout[name] = (offset, values.dtype.str, list(values.shape))
+        offset += values.nbytes
+    encoded = json.dumps({**header, 'arrays': layout}).encode()
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(encoded)))
+        f.write(encoded)
+        data_start = _aligned(f.tell())
+        for name, values in arrays.items():
+            f.seek(data_start + layout[name][0])
+            f.write(np.ascontiguousarray(values).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def build_linking_index(path) -> Dict[str, int]:
+    """Write the linking index for every user to ``path``; returns its sizes"""
+    # Rule versions are read before the rules, so a rule saved during the
+    # build leaves a stale version and is read from the DB instead
+    started = timezone.now()
+    rule_users = set(InternalLinkRule.objects.filter(is_active=True).values_list('user_id', flat=True))
+    versions = dict(LinkingProfile.objects.filter(user_id__in=rule_users).values_list('user_id', 'rules_version'))
+    rule_versions = {str(user_id): versions.get(user_id, 0) for user_id in rule_users}
+    max_post_id = PublishedPost.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    term_users = array('q')
+    terms: List[str] = []
+    posting_offsets = array('q', [0])
+    posting_posts, posting_tf, posting_doc_length = array('q'), array('I'), array('I')
+    current = None
+    rows = KeywordPosting.objects.filter(post_id__lte=max_post_id).order_by('user_id', 'term', 'post_id')
+    for user_id, term, post_id, tf, doc_length in rows.values_list(
+        'user_id', 'term', 'post_id', 'tf', 'doc_length'
+    ).iterator(chunk_size=10000):
+        if (user_id, term) != current:
+            if current is not None:
+                posting_offsets.append(len(posting_posts))
+            current = (user_id, term)
+            term_users.append(user_id)
+            terms.append(term)
+        posting_posts.append(post_id)
+        posting_tf.append(tf)
+        posting_doc_length.append(doc_length)
+    if current is not None:
+        posting_offsets.append(len(posting_posts))
+
+    term_users = np.frombuffer(term_users, dtype=np.int64)
+    posting_offsets = np.frombuffer(posting_offsets, dtype=np.int64)
+    posting_posts = np.frombuffer(posting_posts, dtype=np.int64)
+    posting_tf = np.frombuffer(posting_tf, dtype=np.uint32)
+    posting_doc_length = np.frombuffer(posting_doc_length, dtype=np.uint32)
+
+    # Lookups bisect on Python byte order, whatever the database collation
+    order = sorted(range(len(terms)), key=lambda i: (term_users[i], terms[i].encode()))
+    if order != list(range(len(terms))):
+        order = np.asarray(order, dtype=np.int64)
+        counts = np.diff(posting_offsets)[order]
+        gather = np.repeat(posting_offsets[order] - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        posting_posts, posting_tf, posting_doc_length = (
+            posting_posts[gather], posting_tf[gather], posting_doc_length[gather]
+        )
+        posting_offsets = np.concatenate(([0], np.cumsum(counts)))
+        term_users = term_users[order]
+        terms = [terms[i] for i in order]
+    term_text, term_offsets = _strings(terms)
+
+    users, first_term = np.unique(term_users, return_index=True)
+    # The same figures as Bm25Index.corpus_stats
+    stats = {
+        row['user_id']: (row['posts'], row['terms'] / row['posts'] if row['posts'] else 0.0)
+        for row in KeywordPosting.objects.filter(post_id__lte=max_post_id).values('user_id').annotate(
+            posts=Count('post', distinct=True), terms=Sum('tf')
+        ).order_by()
+    }
+
+    post_ids = np.fromiter(
+        PublishedPost.objects.filter(id__lte=max_post_id).order_by('id').values_list('id', flat=True).iterator(chunk_size=10000),
+        dtype=np.int64
+    )
+    inbound = dict(
+        PostLink.objects.values('target_id').annotate(count=Count('id')).order_by().values_list('target_id', 'count')
+    )
+
+    rules = list(InternalLinkRule.objects.filter(is_active=True).order_by('user_id', 'id').values_list(
+        'id', 'user_id', 'keyword'
+    ))
+    rule_text, rule_offsets = _strings([keyword.lower() for _, _, keyword in rules])
+
+    arrays = {
+        'users': users.astype(np.int64),
+        'user_terms': np.append(first_term, len(terms)).astype(np.int64),
+        'user_posts': np.array([stats[user_id][0] for user_id in users.tolist()], dtype=np.int64),
+        'user_avgdl': np.array([stats[user_id][1] for user_id in users.tolist()], dtype=np.float64),
+        'term_text': term_text,
+        'term_offsets': term_offsets,
+        'posting_offsets': posting_offsets,
+        'posting_posts': posting_posts,
+        'posting_tf': posting_tf,
+        'posting_doc_length': posting_doc_length,
+        'post_ids': post_ids,
+        'post_inbound': np.array([inbound.get(post_id, 0) for post_id in post_ids.tolist()], dtype=np.int32),
+        'rule_ids': np.array([rule_id for rule_id, _, _ in rules], dtype=np.int64),
+        'rule_users': np.array([user_id for _, user_id, _ in rules], dtype=np.int64),
+        'rule_text': rule_text,
+        'rule_offsets': rule_offsets,
+    }
+    try:
+        previous = LinkingIndex(path).built_at
+    except (OSError, ValueError):
+        previous = started
+    _write(path, arrays, {
+        'built_at': started.isoformat(),
+        'max_post_id': max_post_id,
+        'rule_versions': rule_versions,
+    })
+    # Processes still mapping the previous file read back to its build
+    LinkingIndexChange.objects.filter(changed_at__lt=min(previous, started) - CHANGE_MARGIN).delete()
+    return {'terms': len(terms), 'postings': len(posting_posts), 'posts': len(post_ids), 'rules': len(rules)}
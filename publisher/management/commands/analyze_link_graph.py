@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from publisher.link_analytics_service import refresh_link_report
+from publisher.models import WordPressSite
+
+
+class Command(BaseCommand):
+    help = 'Compute PageRank, orphans, dead ends and pillar distances per site and store them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--site', type=int, help='Only analyze this site id')
+        parser.add_argument('--once', action='store_true', help='Analyze once and exit')
+        parser.add_argument('--interval', type=float, default=3600, help='Seconds between runs')
+
+    def handle(self, *args, **options):
+        sites = WordPressSite.objects.filter(is_active=True)
+        if options['site']:
+            sites = sites.filter(id=options['site'])
+
+        while True:
+            for site in sites:
+                report = refresh_link_report(site.id)
+                self.stdout.write(
+                    f"{site.name}: posts={report['posts']} links={report['links']} "
+                    f"orphans={report['orphans']} dead_ends={report['dead_ends']} "
+                    f"unreachable={report['unreachable_from_pillars']} ({report['seconds']:.2f}s)"
+                )
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
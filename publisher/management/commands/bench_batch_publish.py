@@ -0,0 +1,92 @@
+import json
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+
+from publisher import wordpress_service
+from publisher.wordpress_service import WordPressService
+
+
+class FakeResponse:
+    """Minimal stand-in for requests.Response"""
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+        self.headers = {}
+        self.text = json.dumps(body)
+
+    def json(self):
+        return self._body
+
+
+class FakeWordPress:
+    """Answers WordPressService calls in memory and counts round trips"""
+
+    def __init__(self, batch_limit):
+        self.batch_limit = batch_limit
+        self.round_trips = 0
+        self.next_id = 1
+
+    def options(self, url, **kwargs):
+        self.round_trips += 1
+        if not self.batch_limit:
+            return FakeResponse(404, {'code': 'rest_no_route'})
+        return FakeResponse(200, {
+            'endpoints': [{'args': {'requests': {'maxItems': self.batch_limit}}}]
+        })
+
+    def post(self, url, data=None, **kwargs):
+        self.round_trips += 1
+        body = json.loads(data) if data else {}
+        if url.endswith('/batch/v1'):
+            return FakeResponse(207, {
+                'responses': [self._create(item['path'], item['body']) for item in body['requests']]
+            })
+        path = '/wp/v2/' + url.split('/wp-json/wp/v2/', 1)[1]
+        result = self._create(path, body)
+        return FakeResponse(result['status'], result['body'])
+
+    def _create(self, path, body):
+        object_id = self.next_id
+        self.next_id += 1
+        # Routes may carry a query string, such as _fields
+        if path.split('?', 1)[0].endswith('/posts'):
+            return {'status': 201, 'body': {
+                'id': object_id, 'link': f'https://example.com/?p={object_id}',
+                'guid': {'rendered': f'https://example.com/?p={object_id}'},
+                'slug': f'post-{object_id}', 'status': body.get('status', 'publish')
+            }}
+        return {'status': 201, 'body': {
+            'id': object_id, 'name': body['name'], 'slug': body['name'].lower()
+        }}
+
+
+class Command(BaseCommand):
+    help = 'Compare HTTP round trips for bulk publishing with and without the batch API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100, help='Posts per bulk publish')
+        parser.add_argument('--terms', type=int, default=40, help='Tags to create')
+        parser.add_argument('--batch-limit', type=int, default=25, help="Server's maxItems")
+
+    def handle(self, *args, **options):
+        posts = [
+            {'title': f'Post {i}', 'content': f'<p>Body of post {i}</p>'}
+            for i in range(options['posts'])
+        ]
+        tags = [f'Tag {i}' for i in range(options['terms'])]
+
+        self.stdout.write(f"{'mode':<12}{'posts':>8}{'tags':>8}{'round trips':>14}")
+        for mode, limit in (('per-object', 0), ('batch', options['batch_limit'])):
+            fake = FakeWordPress(limit)
+            with mock.patch.object(wordpress_service.requests, 'options', fake.options), \
+                    mock.patch.object(wordpress_service.requests, 'post', fake.post):
+                wp = WordPressService('https://example.com', 'bench', 'bench')
+                post_results = wp.create_posts(posts)
+                tag_results = wp.create_terms('tags', tags)
+
+            failed = sum(not r['success'] for r in post_results + tag_results)
+            if failed:
+                self.stdout.write(self.style.ERROR(f'{mode}: {failed} operations failed'))
+            self.stdout.write(f"{mode:<12}{len(posts):>8}{len(tags):>8}{fake.round_trips:>14}")
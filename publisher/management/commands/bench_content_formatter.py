@@ -0,0 +1,139 @@
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from publisher.wordpress_service import WordPressService
+
+
+VOCABULARY = (
+    'gaming laptop keyboard monitor review best budget price performance battery '
+    'display refresh rate mechanical switches ergonomic chair headset wireless'
+).split()
+
+
+def legacy_prepare_content(wp, content):
+    """The multi-pass formatter this benchmark compares against"""
+    content = re.sub(r'<p>\s*</p>', '', content)
+
+    lines = content.split('\n')
+    formatted_lines = []
+    in_tag = False
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('<'):
+            in_tag = True
+            formatted_lines.append(line)
+        elif line.endswith('>'):
+            in_tag = False
+            formatted_lines.append(line)
+        elif not in_tag and not line.startswith('<'):
+            formatted_lines.append(f'<p>{line}</p>')
+        else:
+            formatted_lines.append(line)
+    content = '\n'.join(formatted_lines)
+
+    content = re.sub(
+        r'\[IMAGE:\s*(.*?)\]',
+        lambda m: wp._create_wordpress_image_block(m.group(1)),
+        content
+    )
+    content = re.sub(r'<table([^>]*)>', r'<table\1 class="wp-block-table">', content)
+    content = re.sub(r'<blockquote([^>]*)>', r'<blockquote\1 class="wp-block-quote">', content)
+    content = re.sub(
+        r'<a\s+([^>]*href=["\'][^"\']*["\'][^>]*)>',
+        lambda m: wp._format_affiliate_link(m.group(0), m.group(1)),
+        content
+    )
+    content = re.sub(r'\n{3,}', '\n\n', content)
+    return content.strip()
+
+
+def synthetic_post(words, links_per_paragraph, rng):
+    """A pillar-style post: paragraphs full of links, headings, tables, images"""
+    def sentence(n):
+        return ' '.join(rng.choice(VOCABULARY) for _ in range(n))
+
+    blocks = []
+    written = 0
+    while written < words:
+        kind = rng.random()
+        if kind < 0.55:
+            parts = [sentence(15)]
+            for i in range(links_per_paragraph):
+                rel = ' rel="sponsored"' if rng.random() < 0.2 else ''
+                parts.append(f'<a href="https://amzn.to/{rng.randrange(10**6)}"{rel}>{sentence(2)}</a> {sentence(8)}')
+            blocks.append(f'<p>{" ".join(parts)}</p>')
+            written += 15 + 10 * links_per_paragraph
+        elif kind < 0.65:
+            blocks.append(f'<h2>{sentence(6)}</h2>')
+        elif kind < 0.72:
+            blocks.append(sentence(30))
+            written += 30
+        elif kind < 0.76:
+            blocks.append(f'[IMAGE: {sentence(4)}]')
+        elif kind < 0.82:
+            rows = ''.join(f'<tr><td>{sentence(2)}</td><td>{sentence(2)}</td></tr>' for _ in range(5))
+            blocks.append(f'<table>\n<tbody>{rows}</tbody>\n</table>')
+        elif kind < 0.87:
+            blocks.append(f'<blockquote>{sentence(20)}</blockquote>\n<p> </p>')
+            written += 20
+        else:
+            # Multi-line button markup, as produced by the affiliate link inserter
+            blocks.append(
+                f'<div class="wp-block-button">\n    <a class="wp-block-button__link" '
+                f'href="https://amzn.to/{rng.randrange(10**6)}" target="_blank"\n'
+                f'       rel="noopener noreferrer nofollow">\n       Check Price\n    </a>\n</div>'
+            )
+    return '\n\n'.join(blocks)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the WordPress content formatter on large synthetic posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=20)
+        parser.add_argument('--words', type=int, default=5000)
+        parser.add_argument('--links', type=int, default=3, help='Links per paragraph')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        wp = WordPressService('https://example.com', 'bench', 'bench')
+        posts = [
+            synthetic_post(options['words'], options['links'], rng)
+            for _ in range(options['posts'])
+        ]
+
+        mismatches = sum(
+            legacy_prepare_content(wp, post) != wp._prepare_content_for_wordpress(post)
+            for post in posts
+        )
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f'{mismatches} posts formatted differently'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Output identical to the multi-pass formatter'))
+
+        size_kb = sum(len(post) for post in posts) / len(posts) / 1024
+        self.stdout.write(f"{len(posts)} posts, {size_kb:.0f} KB each on average")
+
+        timings = {}
+        for name, func in (
+            ('multi-pass', lambda post: legacy_prepare_content(wp, post)),
+            ('single-scan', wp._prepare_content_for_wordpress),
+        ):
+            best = None
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                for post in posts:
+                    func(post)
+                elapsed = (time.perf_counter() - start) / len(posts)
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+            self.stdout.write(f"{name:<12}{best * 1000:>8.2f} ms/post")
+
+        self.stdout.write(f"speedup     {timings['multi-pass'] / timings['single-scan']:>8.2f}x")
@@ -0,0 +1,46 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from publisher.link_analytics_service import LinkGraph
+
+
+class Command(BaseCommand):
+    help = 'Benchmark PageRank and pillar distances on a synthetic link graph'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--edges', default='100000,1000000', help='Comma-separated edge counts')
+        parser.add_argument('--pillars', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        n = options['posts']
+        self.stdout.write(f"{'posts':>8}{'edges':>10}{'build ms':>10}{'pagerank ms':>13}{'bfs ms':>9}{'unreachable':>13}")
+        for n_edges in (int(e) for e in options['edges'].split(',')):
+            rng = np.random.default_rng(options['seed'])
+            # Half the links go to a few popular posts, Zipf-like; the rest anywhere
+            sources = rng.integers(0, n, n_edges)
+            targets = np.where(
+                rng.random(n_edges) < 0.5, np.minimum(rng.zipf(1.5, n_edges), n) - 1, rng.integers(0, n, n_edges)
+            )
+            pillars = np.zeros(n, dtype=bool)
+            pillars[rng.choice(n, options['pillars'], replace=False)] = True
+
+            started = time.perf_counter()
+            graph = LinkGraph(np.arange(n, dtype=np.int64), sources, targets)
+            build_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            graph.pagerank()
+            pagerank_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            distance = graph.distances_from(pillars)
+            bfs_ms = (time.perf_counter() - started) * 1000
+
+            self.stdout.write(
+                f"{n:>8}{len(graph.sources):>10}{build_ms:>10.1f}{pagerank_ms:>13.1f}{bfs_ms:>9.1f}"
+                f"{int((distance < 0).sum()):>13}"
+            )
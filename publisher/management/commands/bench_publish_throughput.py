@@ -0,0 +1,95 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from publisher.async_wordpress_service import AsyncWordPressService, close_clients
+from publisher.models import PublishedPost
+from publisher.publishing_service import PublishingService, SiteThrottle
+from publisher.wordpress_service import WordPressService
+from publisher.wordpress_stub import StubConfig, WordPressStubServer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark publishing throughput against the local WordPress stub'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100)
+        parser.add_argument('--paragraphs', type=int, default=1, help='Paragraphs of body text per post')
+        parser.add_argument('--workers', type=int, default=3, help='Concurrent requests per site')
+        parser.add_argument('--latency-ms', type=float, default=50)
+        parser.add_argument('--jitter-ms', type=float, default=0)
+        parser.add_argument('--error-rate', type=float, default=0)
+        parser.add_argument('--error-status', type=int, default=503)
+        parser.add_argument('--rate-limit', type=int, default=0, help='Requests per second before 429 (0 = off)')
+        parser.add_argument('--batch-max-items', type=int, default=25)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--modes', default='sequential,threaded,batch,async',
+            help='Comma-separated subset of sequential, threaded, batch, async'
+        )
+
+    def handle(self, *args, **options):
+        config = StubConfig(
+            latency_ms=options['latency_ms'],
+            jitter_ms=options['jitter_ms'],
+            error_rate=options['error_rate'],
+            error_status=options['error_status'],
+            rate_limit=options['rate_limit'],
+            batch_max_items=options['batch_max_items'],
+            seed=options['seed']
+        )
+        # Unsaved posts: the send path below never touches the database
+        posts = [
+            PublishedPost(title=f'Benchmark post {i}', content=f'<p>Body of post {i}</p>' * options['paragraphs'])
+            for i in range(options['posts'])
+        ]
+        publishing = PublishingService(max_per_site=options['workers'], base_delay=0.05, max_delay=2.0)
+
+        self.stdout.write(f"{'mode':<12}{'posts':>7}{'ok':>7}{'secs':>8}{'posts/s':>9}{'requests':>10}{'429s':>6}{'B out/post':>12}{'B in/post':>11}")
+        for mode in options['modes'].split(','):
+            with WordPressStubServer(config) as server:
+                started = time.perf_counter()
+                results = getattr(self, f'_run_{mode}')(server.url, posts, publishing, options['workers'])
+                elapsed = time.perf_counter() - started
+                stub = server.stub
+
+            ok = sum(result['success'] for result in results)
+            self.stdout.write(
+                f"{mode:<12}{len(posts):>7}{ok:>7}{elapsed:>8.2f}{len(posts) / elapsed:>9.1f}"
+                f"{stub.requests:>10}{stub.status_counts.get(429, 0):>6}"
+                f"{stub.bytes_received / len(posts):>12.0f}{stub.bytes_sent / len(posts):>11.0f}"
+            )
+
+    def _run_sequential(self, url, posts, publishing, workers):
+        wp = WordPressService(url, 'stub', 'stub')
+        throttle = SiteThrottle(publishing.base_delay, publishing.max_delay)
+        return [publishing._send_post(wp, post, None, throttle) for post in posts]
+
+    def _run_threaded(self, url, posts, publishing, workers):
+        wp = WordPressService(url, 'stub', 'stub')
+        throttle = SiteThrottle(publishing.base_delay, publishing.max_delay)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda post: publishing._send_post(wp, post, None, throttle), posts))
+
+    def _run_batch(self, url, posts, publishing, workers):
+        wp = WordPressService(url, 'stub', 'stub')
+        throttle = SiteThrottle(publishing.base_delay, publishing.max_delay)
+        return publishing._send_batch(wp, posts, throttle)
+
+    def _run_async(self, url, posts, publishing, workers):
+        async def run():
+            wp = AsyncWordPressService(url, 'stub', 'stub')
+            limit = asyncio.Semaphore(workers)
+
+            async def send(post):
+                async with limit:
+                    return await wp.create_post(title=post.title, content=post.content)
+
+            try:
+                return await asyncio.gather(*(send(post) for post in posts))
+            finally:
+                await close_clients()
+
+        return asyncio.run(run())
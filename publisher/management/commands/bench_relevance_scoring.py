@@ -0,0 +1,102 @@
+import heapq
+import math
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from publisher.relevance_service import BM25_B, BM25_K1, bm25_idf, bm25_scores, top_k
+
+
+class Command(BaseCommand):
+    help = 'Benchmark BM25 scoring and top-k, NumPy against a Python loop, on a synthetic corpus'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--docs', default='10000,100000', help='Comma-separated corpus sizes')
+        parser.add_argument('--vocab', type=int, default=50000)
+        parser.add_argument('--doc-terms', type=int, default=40, help='Terms drawn per post')
+        parser.add_argument('--query-terms', type=int, default=10)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('-k', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'docs':>8}{'rows/query':>12}{'python ms':>11}{'numpy ms':>10}{'speedup':>9}{'same top-k':>12}")
+        for n_docs in (int(n) for n in options['docs'].split(',')):
+            rng = np.random.default_rng(options['seed'])
+            index, doc_length = self._corpus(rng, n_docs, options['vocab'], options['doc_terms'])
+            avgdl = float(doc_length.mean())
+            queries = [
+                np.unique(self._zipf(rng, options['vocab'], options['query_terms']))
+                for _ in range(options['queries'])
+            ]
+            python_index = {term: (ids.tolist(), tf.tolist()) for term, (ids, tf) in index.items()}
+            python_length = doc_length.tolist()
+
+            python_ms = numpy_ms = 0.0
+            agree = 0
+            rows = 0
+            for query in queries:
+                terms = [int(term) for term in query if int(term) in index]
+                if not terms:
+                    continue
+                rows += sum(len(index[term][0]) for term in terms)
+
+                started = time.perf_counter()
+                expected = self._python_top_k(python_index, python_length, terms, n_docs, avgdl, options['k'])
+                python_ms += (time.perf_counter() - started) * 1000
+
+                started = time.perf_counter()
+                got = self._numpy_top_k(index, doc_length, terms, n_docs, avgdl, options['k'])
+                numpy_ms += (time.perf_counter() - started) * 1000
+
+                agree += set(expected) == set(got)
+
+            count = max(1, len(queries))
+            self.stdout.write(
+                f"{n_docs:>8}{rows / count:>12.0f}{python_ms / count:>11.2f}{numpy_ms / count:>10.2f}"
+                f"{python_ms / numpy_ms:>8.1f}x{agree:>8}/{count}"
+            )
+
+    def _zipf(self, rng, vocab: int, size: int) -> np.ndarray:
+        # Word frequencies in text are roughly Zipfian; clip the tail to the vocabulary
+        return np.minimum(rng.zipf(1.3, size), vocab) - 1
+
+    def _corpus(self, rng, n_docs: int, vocab: int, doc_terms: int):
+        """Inverted index {term: (doc ids, tf)} and per-doc lengths"""
+        docs = np.repeat(np.arange(n_docs), doc_terms)
+        terms = self._zipf(rng, vocab, n_docs * doc_terms)
+        pairs, tf = np.unique(terms.astype(np.int64) * n_docs + docs, return_counts=True)
+        pair_terms, pair_docs = np.divmod(pairs, n_docs)
+        doc_length = np.full(n_docs, doc_terms, dtype=np.float64)
+
+        index = {}
+        bounds = np.flatnonzero(np.diff(pair_terms)) + 1
+        starts = np.concatenate(([0], bounds))
+        for start, ids, term_tf in zip(starts, np.split(pair_docs, bounds), np.split(tf, bounds)):
+            index[int(pair_terms[start])] = (ids, term_tf.astype(np.float64))
+        return index, doc_length
+
+    def _python_top_k(self, index, doc_length, terms, n_docs, avgdl, k):
+        scores = {}
+        for term in terms:
+            ids, tfs = index[term]
+            df = len(ids)
+            idf = math.log1p((n_docs - df + 0.5) / (df + 0.5))
+            for doc, tf in zip(ids, tfs):
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_length[doc] / avgdl)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return [doc for doc, _ in heapq.nlargest(k, scores.items(), key=lambda item: item[1])]
+
+    def _numpy_top_k(self, index, doc_length, terms, n_docs, avgdl, k):
+        postings = [index[term] for term in terms]
+        doc_ids = np.concatenate([ids for ids, _ in postings])
+        tf = np.concatenate([term_tf for _, term_tf in postings])
+        term_index = np.repeat(np.arange(len(terms)), [len(ids) for ids, _ in postings])
+        df = np.array([len(ids) for ids, _ in postings])
+
+        ids, doc_index = np.unique(doc_ids, return_inverse=True)
+        scores = bm25_scores(
+            doc_index, term_index, tf, doc_length[doc_ids], bm25_idf(df, n_docs), avgdl, len(ids)
+        )
+        return ids[top_k(scores, k)].tolist()
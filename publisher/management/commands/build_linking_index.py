@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from publisher.linking_index_service import build_linking_index
+
+
+class Command(BaseCommand):
+    help = 'Write the linking index file that web workers map into memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='Index file (default: LINKING_INDEX_PATH)')
+        parser.add_argument('--once', action='store_true', help='Build once and exit')
+        parser.add_argument('--interval', type=float, default=600, help='Seconds between rebuilds')
+
+    def handle(self, *args, **options):
+        path = options['path'] or getattr(settings, 'LINKING_INDEX_PATH', None)
+        if not path:
+            raise CommandError('No index path: pass --path or set LINKING_INDEX_PATH')
+
+        while True:
+            started = time.perf_counter()
+            sizes = build_linking_index(path)
+            self.stdout.write(
+                f"{path}: terms={sizes['terms']} postings={sizes['postings']} posts={sizes['posts']} "
+                f"rules={sizes['rules']} in {time.perf_counter() - started:.2f}s"
+            )
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
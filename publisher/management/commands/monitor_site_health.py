@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from publisher.health_service import HealthMonitor, site_health
+
+
+class Command(BaseCommand):
+    help = 'Probe every active WordPress site on an interval and record latency and errors'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Probe once and exit')
+        parser.add_argument('--interval', type=float, default=60, help='Seconds between probes')
+        parser.add_argument('--workers', type=int, default=8, help='Sites probed in parallel')
+        parser.add_argument('--timeout', type=float, default=10, help='Per-probe timeout in seconds')
+
+    def handle(self, *args, **options):
+        monitor = HealthMonitor(max_workers=options['workers'], timeout=options['timeout'])
+
+        while True:
+            checks = monitor.probe_all()
+            monitor.prune()
+
+            health = site_health([check.wordpress_site_id for check in checks])
+            for check in checks:
+                stats = health[check.wordpress_site_id]
+                p95 = f"{stats['p95_ms']:.0f}ms" if stats['p95_ms'] is not None else '-'
+                line = (
+                    f"{check.wordpress_site.name}: {stats['state']} "
+                    f"latency={check.latency_ms:.0f}ms p95={p95} "
+                    f"errors={stats['error_rate']:.0%}"
+                )
+                if check.ok:
+                    self.stdout.write(line)
+                else:
+                    self.stdout.write(self.style.WARNING(f"{line} - {check.error_message}"))
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from publisher.outbox_service import OutboxWorker
+
+
+class Command(BaseCommand):
+    help = 'Publish queued posts to WordPress, retrying failed sites with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain once and exit')
+        parser.add_argument('--interval', type=float, default=10, help='Seconds between drains')
+        parser.add_argument('--limit', type=int, default=100, help='Max intents per drain')
+
+    def handle(self, *args, **options):
+        worker = OutboxWorker()
+
+        while True:
+            summary = worker.drain(limit=options['limit'])
+            if any(summary[key] for key in ('published', 'retrying', 'dead', 'deferred', 'circuit_open', 'site_down')):
+                self.stdout.write(
+                    f"published={summary['published']} retrying={summary['retrying']} "
+                    f"dead={summary['dead']} deferred={summary['deferred']} "
+                    f"circuit_open={summary['circuit_open']} site_down={summary['site_down']}"
+                )
+                for error in summary['errors']:
+                    self.stdout.write(self.style.WARNING(f"  {error['title']}: {error['error']}"))
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
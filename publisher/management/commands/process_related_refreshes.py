@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from publisher.related_posts_service import REFRESH_BATCH_SIZE, refresh_queued
+
+
+class Command(BaseCommand):
+    help = 'Refresh the related-posts lists affected by saved posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process once and exit')
+        parser.add_argument('--interval', type=float, default=10, help='Seconds between runs')
+        parser.add_argument('--limit', type=int, default=REFRESH_BATCH_SIZE, help='Max queued posts per run')
+
+    def handle(self, *args, **options):
+        while True:
+            summary = refresh_queued(limit=options['limit'])
+            if summary['queued']:
+                self.stdout.write(
+                    f"queued={summary['queued']} posts={summary['posts']} rewritten={summary['rewritten']}"
+                )
+
+            if options['once']:
+                break
+            # Keep draining a backlog; sleep only once the queue is empty
+            if summary['queued'] < options['limit']:
+                time.sleep(options['interval'])
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from publisher.relink_service import RELINK_WORKERS, run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run relink jobs requested from the internal linking dashboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process once and exit')
+        parser.add_argument('--interval', type=float, default=30, help='Seconds between runs')
+        parser.add_argument('--limit', type=int, default=5, help='Max jobs per run')
+        parser.add_argument('--workers', type=int, default=RELINK_WORKERS)
+
+    def handle(self, *args, **options):
+        while True:
+            summary = run_pending_jobs(limit=options['limit'], workers=options['workers'])
+            if summary['jobs'] or summary['errors']:
+                self.stdout.write(f"jobs={summary['jobs']} posts={summary['posts']} changed={summary['changed']}")
+                for error in summary['errors']:
+                    self.stdout.write(self.style.WARNING(f"  job {error['job_id']}: {error['error']}"))
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
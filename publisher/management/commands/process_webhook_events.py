@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from publisher.webhook_service import WebhookProcessor
+
+
+class Command(BaseCommand):
+    help = 'Apply received WordPress webhook events to local posts and the link graph'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process once and exit')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between runs')
+        parser.add_argument('--limit', type=int, default=100, help='Max events per run')
+
+    def handle(self, *args, **options):
+        processor = WebhookProcessor()
+
+        while True:
+            summary = processor.process_pending(limit=options['limit'])
+            if any(summary[key] for key in ('processed', 'superseded', 'failed')):
+                self.stdout.write(
+                    f"processed={summary['processed']} superseded={summary['superseded']} "
+                    f"failed={summary['failed']}"
+                )
+                for error in summary['errors']:
+                    self.stdout.write(self.style.WARNING(f"  event {error['event_id']}: {error['error']}"))
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,36 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from publisher.calendar_service import PUSH_HORIZON, PublishingCalendar
+
+
+class Command(BaseCommand):
+    help = 'Send calendar posts due soon to WordPress as scheduled (future) posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Push once and exit')
+        parser.add_argument('--interval', type=float, default=300, help='Seconds between runs')
+        parser.add_argument(
+            '--horizon-hours', type=float, default=PUSH_HORIZON.total_seconds() / 3600,
+            help='Push posts whose slot is within this many hours'
+        )
+
+    def handle(self, *args, **options):
+        calendar = PublishingCalendar()
+        horizon = timedelta(hours=options['horizon_hours'])
+
+        while True:
+            summary = calendar.push_due(horizon)
+            if any(summary[key] for key in ('pushed', 'failed', 'published')):
+                self.stdout.write(
+                    f"pushed={summary['pushed']} failed={summary['failed']} "
+                    f"went_live={summary['published']}"
+                )
+                for error in summary['errors']:
+                    self.stdout.write(self.style.WARNING(f"  {error['title']}: {error['error']}"))
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from publisher.keyword_index_service import INDEXED_FIELDS, index_posts
+from publisher.models import PublishedPost
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the keyword postings used to find internal link candidates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only rebuild posts of this user id')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        posts = PublishedPost.objects.only('id', 'user_id', *INDEXED_FIELDS).order_by('id')
+        if options['user']:
+            posts = posts.filter(user_id=options['user'])
+
+        indexed = postings = 0
+        last_id = 0
+        while True:
+            chunk = list(posts.filter(id__gt=last_id)[:options['chunk_size']])
+            if not chunk:
+                break
+            postings += index_posts(chunk)
+            indexed += len(chunk)
+            last_id = chunk[-1].id
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} posts ({postings} postings)"))
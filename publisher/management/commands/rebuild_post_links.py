@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from publisher.link_graph_service import LINK_FIELDS, index_links
+from publisher.models import PublishedPost
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the internal link graph from the HTML of every post'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only rebuild posts of this user id')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        posts = PublishedPost.objects.only('id', 'user_id', *LINK_FIELDS).order_by('id')
+        if options['user']:
+            posts = posts.filter(user_id=options['user'])
+
+        scanned = links = 0
+        last_id = 0
+        while True:
+            chunk = list(posts.filter(id__gt=last_id)[:options['chunk_size']])
+            if not chunk:
+                break
+            links += index_links(chunk)
+            scanned += len(chunk)
+            last_id = chunk[-1].id
+
+        self.stdout.write(self.style.SUCCESS(f"Scanned {scanned} posts ({links} links)"))
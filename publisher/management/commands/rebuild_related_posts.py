@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from publisher.keyword_index_service import INDEXED_FIELDS
+from publisher.models import PublishedPost
+from publisher.related_posts_service import refresh_related
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed related-posts list of every post'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only rebuild posts of this user id')
+
+    def handle(self, *args, **options):
+        posts = PublishedPost.objects.only('id', 'user_id', 'main_category', *INDEXED_FIELDS).order_by('id')
+        if options['user']:
+            posts = posts.filter(user_id=options['user'])
+
+        total = posts.count()
+        rewritten = refresh_related(posts.iterator(chunk_size=1000))
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rewritten} of {total} related-posts lists"))
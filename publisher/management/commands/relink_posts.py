@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from publisher.models import PublishedPost
+from publisher.relink_service import RELINK_CHUNK_SIZE, RELINK_WORKERS, Relinker
+
+
+class Command(BaseCommand):
+    help = "Re-run internal linking over every post of a user or site with the current settings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Relink this user id\'s posts')
+        parser.add_argument('--site', type=int, help='Relink this site id\'s posts')
+        parser.add_argument('--workers', type=int, default=RELINK_WORKERS)
+        parser.add_argument('--chunk-size', type=int, default=RELINK_CHUNK_SIZE)
+        parser.add_argument('--push', action='store_true', help='Queue changed posts for a WordPress update')
+
+    def handle(self, *args, **options):
+        if not options['user'] and not options['site']:
+            raise CommandError('Pass --user or --site')
+
+        posts = PublishedPost.objects.all()
+        if options['user']:
+            posts = posts.filter(user_id=options['user'])
+        if options['site']:
+            posts = posts.filter(wordpress_site_id=options['site'])
+
+        relinker = Relinker(workers=options['workers'], chunk_size=options['chunk_size'], push=options['push'])
+        summary = relinker.run(posts)
+        self.stdout.write(self.style.SUCCESS(
+            f"Relinked {summary['posts']} posts in {summary['seconds']:.1f}s "
+            f"({summary['posts_per_second']:.1f} posts/s): changed={summary['changed']} "
+            f"conflicts={summary['conflicts']} queued={summary['queued']}"
+        ))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from publisher.reverse_linking_service import SCAN_WORKERS, reverse_link_new_posts
+
+
+class Command(BaseCommand):
+    help = 'Link existing posts to newly published ones wherever they mention them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process pending posts once and exit')
+        parser.add_argument('--interval', type=float, default=60, help='Seconds between runs')
+        parser.add_argument('--limit', type=int, default=20, help='Max new posts per run')
+        parser.add_argument('--push', action='store_true', help='Queue changed posts for a WordPress update')
+        parser.add_argument('--workers', type=int, default=SCAN_WORKERS, help='Processes scanning the corpus')
+
+    def handle(self, *args, **options):
+        while True:
+            summary = reverse_link_new_posts(
+                limit=options['limit'], push=options['push'], workers=options['workers']
+            )
+            if summary['posts']:
+                self.stdout.write(
+                    f"posts={summary['posts']} linked={summary['linked']} queued={summary['queued']}"
+                )
+                for error in summary['errors']:
+                    self.stdout.write(self.style.WARNING(f"  {error['title']}: {error['error']}"))
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
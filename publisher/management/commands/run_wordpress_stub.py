@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from publisher.wordpress_stub import StubConfig, WordPressStubServer
+
+
+class Command(BaseCommand):
+    help = 'Serve a local stand-in for the WordPress REST API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--username', default='stub')
+        parser.add_argument('--app-password', default='stub')
+        parser.add_argument('--latency-ms', type=float, default=0)
+        parser.add_argument('--jitter-ms', type=float, default=0)
+        parser.add_argument('--error-rate', type=float, default=0, help='Fraction of requests that fail')
+        parser.add_argument('--error-status', type=int, default=500, help='Status of injected failures')
+        parser.add_argument('--rate-limit', type=int, default=0, help='Requests per window before 429 (0 = off)')
+        parser.add_argument('--rate-window', type=float, default=1.0, help='Rate limit window in seconds')
+        parser.add_argument('--batch-max-items', type=int, default=25, help='0 disables /batch/v1')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        config = StubConfig(
+            username=options['username'],
+            app_password=options['app_password'],
+            latency_ms=options['latency_ms'],
+            jitter_ms=options['jitter_ms'],
+            error_rate=options['error_rate'],
+            error_status=options['error_status'],
+            rate_limit=options['rate_limit'],
+            rate_window=options['rate_window'],
+            batch_max_items=options['batch_max_items'],
+            seed=options['seed']
+        )
+        server = WordPressStubServer(config, options['host'], options['port']).start()
+        self.stdout.write(f"WordPress stub at {server.url} (user '{config.username}'), Ctrl-C to stop")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+            self.stdout.write(f"Served {server.stub.requests} requests: {server.stub.status_counts}")
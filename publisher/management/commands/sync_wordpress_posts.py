@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from publisher.models import WordPressSite
+from publisher.sync_service import SyncService
+
+
+class Command(BaseCommand):
+    help = 'Pull posts changed on WordPress into the local corpus'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--site', type=int, action='append', help='Only sync this site id (repeatable)')
+        parser.add_argument('--full', action='store_true', help='Ignore the high-water mark and pull everything')
+        parser.add_argument('--once', action='store_true', help='Sync once and exit')
+        parser.add_argument('--interval', type=float, default=900, help='Seconds between syncs')
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent page fetches per site')
+        parser.add_argument('--per-page', type=int, default=100)
+
+    def handle(self, *args, **options):
+        service = SyncService(max_workers=options['workers'], per_page=options['per_page'])
+        full = options['full']
+
+        while True:
+            sites = WordPressSite.objects.filter(is_active=True).select_related('user')
+            if options['site']:
+                sites = sites.filter(id__in=options['site'])
+
+            for site in sites:
+                started = time.monotonic()
+                summary = service.sync_site(site, full=full)
+                line = (
+                    f"{site.name}: fetched={summary['fetched']} created={summary['created']} "
+                    f"updated={summary['updated']} pages={summary['pages']} "
+                    f"({time.monotonic() - started:.1f}s)"
+                )
+                if summary['error']:
+                    self.stdout.write(self.style.WARNING(f"{line} - {summary['error']}"))
+                else:
+                    self.stdout.write(line)
+
+            if options['once']:
+                break
+            # Only the first pass can be a full one
+            full = False
+            time.sleep(options['interval'])
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-19 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0002_alter_uploadedimage_options_uploadedimage_alt_text_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publishedpost',
+            name='published_field_hashes',
+            field=models.JSONField(blank=True, default=dict, help_text='Hash of each field as last sent to WordPress, used to skip unchanged updates'),
+        ),
+    ]
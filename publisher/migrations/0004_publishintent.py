@@ -0,0 +1,38 @@
+# Generated by Django 5.0.2 on 2026-10-19 03:07
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0003_publishedpost_published_field_hashes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='publishedpost',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Draft'), ('preview', 'Preview'), ('queued', 'Queued'), ('published', 'Published'), ('failed', 'Failed')], default='draft', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='PublishIntent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('dead', 'Dead')], default='pending', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='publish_intents', to='publisher.publishedpost')),
+                ('wordpress_site', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='publish_intents', to='publisher.wordpresssite')),
+            ],
+            options={
+                'ordering': ['next_attempt_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='publisher_p_status_c4dd65_idx')],
+            },
+        ),
+    ]
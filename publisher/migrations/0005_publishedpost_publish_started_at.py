@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-19 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0004_publishintent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publishedpost',
+            name='publish_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='publishedpost',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Draft'), ('preview', 'Preview'), ('queued', 'Queued'), ('publishing', 'Publishing'), ('published', 'Published'), ('failed', 'Failed')], default='draft', max_length=20),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-19 03:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0005_publishedpost_publish_started_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wordpresssite',
+            name='last_synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='wordpresssite',
+            name='sync_high_water_mark',
+            field=models.CharField(blank=True, help_text="WordPress 'modified' time (site-local) of the newest post pulled by sync", max_length=32),
+        ),
+    ]
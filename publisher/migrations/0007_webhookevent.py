@@ -0,0 +1,44 @@
+# Generated by Django 5.0.2 on 2026-10-19 03:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0006_wordpresssite_sync_high_water_mark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wordpresssite',
+            name='webhook_secret',
+            field=models.CharField(blank=True, help_text='Shared secret the site signs webhook deliveries with', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delivery_id', models.CharField(blank=True, help_text="Sender's delivery id, used to drop retries", max_length=64)),
+                ('event', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=20)),
+                ('wordpress_post_id', models.CharField(max_length=50)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('processed', 'Processed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('wordpress_site', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='webhook_events', to='publisher.wordpresssite')),
+            ],
+            options={
+                'ordering': ['received_at'],
+                'indexes': [models.Index(fields=['status', 'received_at'], name='publisher_w_status_63dbbd_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='webhookevent',
+            constraint=models.UniqueConstraint(condition=models.Q(('delivery_id', ''), _negated=True), fields=('wordpress_site', 'delivery_id'), name='unique_webhook_delivery'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.2 on 2026-10-19 03:17
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0007_webhookevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteHealthCheck',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checked_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ok', models.BooleanField()),
+                ('status_code', models.IntegerField(blank=True, null=True)),
+                ('latency_ms', models.FloatField(blank=True, null=True)),
+                ('error_message', models.TextField(blank=True)),
+                ('wordpress_site', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='health_checks', to='publisher.wordpresssite')),
+            ],
+            options={
+                'ordering': ['-checked_at'],
+                'indexes': [models.Index(fields=['wordpress_site', '-checked_at'], name='publisher_s_wordpre_2531f4_idx')],
+            },
+        ),
+    ]
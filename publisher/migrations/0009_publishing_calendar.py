@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-19 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0008_sitehealthcheck'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publishedpost',
+            name='scheduled_for',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Calendar slot WordPress publishes this post at', null=True),
+        ),
+        migrations.AddField(
+            model_name='wordpresssite',
+            name='max_posts_per_day',
+            field=models.PositiveIntegerField(default=4, help_text='Scheduled posts the calendar may place on one day'),
+        ),
+        migrations.AddField(
+            model_name='wordpresssite',
+            name='max_requests_per_minute',
+            field=models.PositiveIntegerField(default=30, help_text='API requests the scheduler may send per minute (0 = no limit)'),
+        ),
+        migrations.AlterField(
+            model_name='publishedpost',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Draft'), ('preview', 'Preview'), ('queued', 'Queued'), ('scheduled', 'Scheduled'), ('publishing', 'Publishing'), ('published', 'Published'), ('failed', 'Failed')], default='draft', max_length=20),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.2 on 2026-10-19 03:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0009_publishing_calendar'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SitePublication',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('publishing', 'Publishing'), ('published', 'Published'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('wordpress_post_id', models.CharField(blank=True, max_length=50)),
+                ('wordpress_url', models.URLField(blank=True)),
+                ('featured_media_id', models.CharField(blank=True, max_length=50)),
+                ('published_field_hashes', models.JSONField(blank=True, default=dict)),
+                ('error_message', models.TextField(blank=True)),
+                ('publish_started_at', models.DateTimeField(blank=True, null=True)),
+                ('published_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='site_publications', to='publisher.publishedpost')),
+                ('wordpress_site', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='site_publications', to='publisher.wordpresssite')),
+            ],
+            options={
+                'ordering': ['wordpress_site__name'],
+                'unique_together': {('post', 'wordpress_site')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-19 03:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0011_keywordposting'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='keywordposting',
+            name='doc_length',
+            field=models.PositiveIntegerField(default=0, help_text='Indexed terms in the post, for BM25 length normalisation'),
+        ),
+        migrations.AddField(
+            model_name='keywordposting',
+            name='tf',
+            field=models.PositiveIntegerField(default=1, help_text="Occurrences of the term in the post's indexed fields"),
+        ),
+    ]
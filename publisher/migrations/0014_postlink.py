@@ -0,0 +1,29 @@
+# Generated by Django 5.0.2 on 2026-10-19 03:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0013_relatedpost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anchor', models.CharField(blank=True, max_length=255)),
+                ('position', models.PositiveIntegerField(help_text="Order of the link among the source's links")),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbound_links', to='publisher.publishedpost')),
+                ('target', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbound_links', to='publisher.publishedpost')),
+            ],
+            options={
+                'ordering': ['source', 'position'],
+                'indexes': [models.Index(fields=['target', 'source'], name='publisher_p_target__b7e0b9_idx')],
+                'unique_together': {('source', 'position')},
+            },
+        ),
+    ]
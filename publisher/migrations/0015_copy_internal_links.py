@@ -0,0 +1,53 @@
+from collections import Counter
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def copy_links_to_edges(apps, schema_editor):
+    """One PostLink per id in each post's internal_links['linked_to']"""
+    PublishedPost = apps.get_model('publisher', 'PublishedPost')
+    PostLink = apps.get_model('publisher', 'PostLink')
+
+    existing = set(PublishedPost.objects.values_list('id', flat=True))
+    links = []
+    for post_id, internal_links in PublishedPost.objects.exclude(internal_links={}).values_list('id', 'internal_links'):
+        linked_to = (internal_links or {}).get('linked_to') or []
+        targets = [pk for pk in dict.fromkeys(linked_to) if pk in existing and pk != post_id]
+        links += [
+            PostLink(source_id=post_id, target_id=target_id, anchor='', position=position)
+            for position, target_id in enumerate(targets)
+        ]
+    PostLink.objects.bulk_create(links, batch_size=BATCH_SIZE)
+
+
+def copy_edges_to_links(apps, schema_editor):
+    """Rebuild internal_links and link_to_this_count from the edges, then drop the edges"""
+    PublishedPost = apps.get_model('publisher', 'PublishedPost')
+    PostLink = apps.get_model('publisher', 'PostLink')
+
+    outbound = {}
+    inbound = Counter()
+    for source_id, target_id in PostLink.objects.order_by('source', 'position').values_list('source_id', 'target_id'):
+        outbound.setdefault(source_id, []).append(target_id)
+        inbound[target_id] += 1
+
+    posts = list(PublishedPost.objects.filter(id__in=set(outbound) | set(inbound)).only('id'))
+    for post in posts:
+        post.internal_links = {'linked_to': outbound[post.id]} if post.id in outbound else {}
+        post.link_to_this_count = inbound[post.id]
+    PublishedPost.objects.bulk_update(posts, ['internal_links', 'link_to_this_count'], batch_size=BATCH_SIZE)
+    # Applying the migration again copies them back
+    PostLink.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0014_postlink'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_links_to_edges, copy_edges_to_links),
+    ]
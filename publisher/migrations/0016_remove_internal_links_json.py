@@ -0,0 +1,21 @@
+# Generated by Django 5.0.2 on 2026-10-19 03:48
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0015_copy_internal_links'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='publishedpost',
+            name='internal_links',
+        ),
+        migrations.RemoveField(
+            model_name='publishedpost',
+            name='link_to_this_count',
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.2 on 2026-10-19 03:50
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_posts(apps, schema_editor):
+    """Posts live before reverse linking existed are not new: leave them be"""
+    PublishedPost = apps.get_model('publisher', 'PublishedPost')
+    PublishedPost.objects.filter(status='published').update(
+        reverse_linked_at=F('published_at')
+    )
+    PublishedPost.objects.filter(status='published', reverse_linked_at__isnull=True).update(
+        reverse_linked_at=F('created_at')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0016_remove_internal_links_json'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publishedpost',
+            name='reverse_linked_at',
+            field=models.DateTimeField(blank=True, help_text='When existing posts were scanned for places to link to this one', null=True),
+        ),
+        migrations.RunPython(mark_existing_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.2 on 2026-10-19 03:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0017_publishedpost_reverse_linked_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelinkJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('push', models.BooleanField(default=False, help_text='Queue changed posts for a WordPress update')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('posts', models.PositiveIntegerField(default=0)),
+                ('changed', models.PositiveIntegerField(default=0)),
+                ('conflicts', models.PositiveIntegerField(default=0, help_text='Posts edited while being relinked, left as they were')),
+                ('posts_per_second', models.FloatField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relink_jobs', to=settings.AUTH_USER_MODEL)),
+                ('wordpress_site', models.ForeignKey(blank=True, help_text="Only relink this site's posts; all of the user's posts if empty", null=True, on_delete=django.db.models.deletion.CASCADE, to='publisher.wordpresssite')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='publisher_r_status_e20545_idx')],
+            },
+        ),
+    ]
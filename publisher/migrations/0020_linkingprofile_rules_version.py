@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-19 04:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0019_linkingindexchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='linkingprofile',
+            name='rules_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Bumped on every link rule change, so each process rebuilds its matcher'),
+        ),
+    ]
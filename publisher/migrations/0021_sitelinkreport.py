@@ -0,0 +1,24 @@
+# Generated by Django 5.0.2 on 2026-10-19 04:18
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0020_linkingprofile_rules_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteLinkReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report', models.JSONField(default=dict)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('wordpress_site', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='link_report', to='publisher.wordpresssite')),
+            ],
+        ),
+    ]
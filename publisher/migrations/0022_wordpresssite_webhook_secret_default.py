@@ -0,0 +1,29 @@
+# Generated by Django 5.0.2 on 2026-10-19 04:19
+
+import secrets
+
+import publisher.models
+from django.db import migrations, models
+
+
+def generate_missing_secrets(apps, schema_editor):
+    """Give every site without a webhook secret its own"""
+    WordPressSite = apps.get_model('publisher', 'WordPressSite')
+    for site in WordPressSite.objects.filter(webhook_secret='').only('id'):
+        WordPressSite.objects.filter(pk=site.pk).update(webhook_secret=secrets.token_hex(32))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0021_sitelinkreport'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='wordpresssite',
+            name='webhook_secret',
+            field=models.CharField(blank=True, default=publisher.models.new_webhook_secret, help_text='Shared secret the site signs webhook deliveries with', max_length=64),
+        ),
+        migrations.RunPython(generate_missing_secrets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-19 04:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0022_wordpresssite_webhook_secret_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteUpdateStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('requests_sent', models.PositiveBigIntegerField(default=0)),
+                ('requests_skipped', models.PositiveBigIntegerField(default=0)),
+                ('fields_sent', models.PositiveBigIntegerField(default=0)),
+                ('fields_skipped', models.PositiveBigIntegerField(default=0)),
+                ('bytes_sent', models.PositiveBigIntegerField(default=0)),
+                ('bytes_skipped', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('wordpress_site', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='update_stats', to='publisher.wordpresssite')),
+            ],
+        ),
+    ]
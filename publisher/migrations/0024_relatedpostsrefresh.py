@@ -0,0 +1,22 @@
+# Generated by Django 5.0.2 on 2026-10-19 04:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publisher', '0023_siteupdatestats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedPostsRefresh',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_id', models.BigIntegerField()),
+                ('requested_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -1,10 +1,18 @@
+import secrets
+from datetime import timedelta
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.contrib.postgres.search import SearchVector
-from django.db.models import Q,Count
+from django.db.models import F, Q, Count
 import json
 
+
+def new_webhook_secret() -> str:
+    """A random secret for signing a site's webhook deliveries"""
+    return secrets.token_hex(32)
+
+
 class WordPressSite(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='wordpress_sites')
     name = models.CharField(max_length=100)
@@ -12,6 +20,21 @@ class WordPressSite(models.Model):
     username = models.CharField(max_length=100)
     app_password = models.CharField(max_length=255, help_text="WordPress application password")
     is_active = models.BooleanField(default=True)
+    max_posts_per_day = models.PositiveIntegerField(
+        default=4, help_text="Scheduled posts the calendar may place on one day"
+    )
+    max_requests_per_minute = models.PositiveIntegerField(
+        default=30, help_text="API requests the scheduler may send per minute (0 = no limit)"
+    )
+    sync_high_water_mark = models.CharField(
+        max_length=32, blank=True,
+        help_text="WordPress 'modified' time (site-local) of the newest post pulled by sync"
+    )
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    webhook_secret = models.CharField(
+        max_length=64, blank=True, default=new_webhook_secret,
+        help_text="Shared secret the site signs webhook deliveries with"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -22,6 +45,13 @@ class WordPressSite(models.Model):
     def __str__(self):
         return f"{self.name} ({self.url})"
 
+    def ensure_webhook_secret(self) -> str:
+        """Return the webhook secret, generating one the first time"""
+        if not self.webhook_secret:
+            self.webhook_secret = new_webhook_secret()
+            self.save(update_fields=['webhook_secret', 'updated_at'])
+        return self.webhook_secret
+
 
 
 class ContentStage(models.Model):
@@ -63,6 +93,9 @@ class PublishedPost(models.Model):
     STATUS_CHOICES = [
         ('draft', 'Draft'),
         ('preview', 'Preview'),
+        ('queued', 'Queued'),
+        ('scheduled', 'Scheduled'),
+        ('publishing', 'Publishing'),
         ('published', 'Published'),
         ('failed', 'Failed'),
     ]
@@ -79,15 +112,26 @@ class PublishedPost(models.Model):
     
     # New fields for internal linking
     keywords = models.TextField(blank=True, help_text="Extracted keywords for matching")
-    internal_links = models.JSONField(default=dict, blank=True)  # Store internal links used
-    link_to_this_count = models.IntegerField(default=0)  # How many posts link to this
     main_category = models.CharField(max_length=100, blank=True, db_index=True)
     
     wordpress_post_id = models.CharField(max_length=50, blank=True)
     wordpress_url = models.URLField(blank=True, db_index=True)  # Index for quick lookups
+    published_field_hashes = models.JSONField(
+        default=dict, blank=True,
+        help_text="Hash of each field as last sent to WordPress, used to skip unchanged updates"
+    )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
+    publish_started_at = models.DateTimeField(null=True, blank=True)
+    scheduled_for = models.DateTimeField(
+        null=True, blank=True, db_index=True,
+        help_text="Calendar slot WordPress publishes this post at"
+    )
     error_message = models.TextField(blank=True)
     published_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    reverse_linked_at = models.DateTimeField(
+        null=True, blank=True,
+        help_text="When existing posts were scanned for places to link to this one"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     
     # SEO and tracking
@@ -114,53 +158,356 @@ class PublishedPost(models.Model):
             models.Index(fields=['topic', 'main_category']),
         ]
 
+    # A 'publishing' claim older than this belonged to a publisher that died
+    PUBLISH_CLAIM_TIMEOUT = timedelta(minutes=15)
+
     def __str__(self):
         return f"{self.title} - {self.status}"
+
+    @classmethod
+    def claim_for_publishing(cls, pk) -> bool:
+        """Move a post into 'publishing' with a single conditional UPDATE
+
+        Returns False when another publisher already holds the post, so at
+        most one create/update call to WordPress is in flight per post.
+        """
+        now = timezone.now()
+        return cls.objects.filter(pk=pk).filter(
+            ~Q(status='publishing') | Q(publish_started_at__lt=now - cls.PUBLISH_CLAIM_TIMEOUT)
+        ).update(status='publishing', publish_started_at=now) == 1
+
+    @classmethod
+    def mark_queued(cls, pk) -> bool:
+        """Flag a post as waiting to publish, unless it is live or being published"""
+        return cls.objects.filter(pk=pk).exclude(
+            status__in=['publishing', 'published']
+        ).update(status='queued') == 1
     
     def get_related_posts(self, limit=5):
-        """Find related posts based on topic and keywords"""
-        if not self.keywords:
-            return PublishedPost.objects.none()
-        
-        keywords_list = self.keywords.lower().split(',')
-        
-        # Build query for related posts
-        query = Q(status='published') & Q(user=self.user) & ~Q(id=self.id)
-        
-        # Match by topic similarity
-        for keyword in keywords_list[:5]:  # Use top 5 keywords
-            keyword = keyword.strip()
-            if keyword:
-                query |= Q(topic__icontains=keyword) | Q(keywords__icontains=keyword)
-        
-        # Also match by category if available
-        if self.main_category:
-            query |= Q(main_category=self.main_category)
-        
-        related = PublishedPost.objects.filter(query).distinct()
-        
-        # Score and sort by relevance
-        scored_posts = []
-        for post in related[:20]:  # Limit initial set
-            score = 0
-            post_keywords = post.keywords.lower().split(',')
-            
-            # Score based on keyword overlap
-            for kw in keywords_list:
-                if kw.strip() in post_keywords:
-                    score += 2
-                if kw.strip() in post.topic.lower():
-                    score += 3
-            
-            # Boost score for same category
-            if post.main_category == self.main_category:
-                score += 5
-            
-            scored_posts.append((score, post))
-        
-        # Sort by score and return top matches
-        scored_posts.sort(key=lambda x: x[0], reverse=True)
-        return [post for score, post in scored_posts[:limit]]
+        """Related posts from the precomputed list, best first"""
+        return list(
+            PublishedPost.objects.filter(related_from__post=self, status='published')
+            .order_by('related_from__rank')[:limit]
+        )
+
+class PublishIntent(models.Model):
+    """Outbox entry: a post that still has to reach its WordPress site
+
+    Written in the same transaction as the post change that requires it,
+    then drained by the outbox worker with retries, so a site outage
+    delays publishing instead of dropping it.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('dead', 'Dead'),
+    ]
+
+    post = models.ForeignKey(PublishedPost, on_delete=models.CASCADE, related_name='publish_intents')
+    wordpress_site = models.ForeignKey(WordPressSite, on_delete=models.CASCADE, related_name='publish_intents')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"Publish {self.post_id} to {self.wordpress_site_id} - {self.status}"
+
+
+class SitePublication(models.Model):
+    """A copy of a post published to a site other than its own
+
+    The post's own site keeps using the fields on PublishedPost; fanning a
+    post out to more sites records one of these per extra site.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('publishing', 'Publishing'),
+        ('published', 'Published'),
+        ('failed', 'Failed'),
+    ]
+
+    post = models.ForeignKey(PublishedPost, on_delete=models.CASCADE, related_name='site_publications')
+    wordpress_site = models.ForeignKey(WordPressSite, on_delete=models.CASCADE, related_name='site_publications')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    wordpress_post_id = models.CharField(max_length=50, blank=True)
+    wordpress_url = models.URLField(blank=True)
+    featured_media_id = models.CharField(max_length=50, blank=True)
+    published_field_hashes = models.JSONField(default=dict, blank=True)
+    error_message = models.TextField(blank=True)
+    publish_started_at = models.DateTimeField(null=True, blank=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['wordpress_site__name']
+        unique_together = ['post', 'wordpress_site']
+
+    def __str__(self):
+        return f"{self.post_id} on {self.wordpress_site_id} - {self.status}"
+
+    @classmethod
+    def claim_for_publishing(cls, pk) -> bool:
+        """Move a copy into 'publishing'; False if another publisher holds it"""
+        now = timezone.now()
+        return cls.objects.filter(pk=pk).filter(
+            ~Q(status='publishing') | Q(publish_started_at__lt=now - PublishedPost.PUBLISH_CLAIM_TIMEOUT)
+        ).update(status='publishing', publish_started_at=now) == 1
+
+
+class KeywordPosting(models.Model):
+    """One term of a post's title, topic, keywords or focus keyword
+
+    The inverted index behind internal-link candidate lookup, and with its
+    term frequency, the post's sparse term vector for BM25 scoring. Kept
+    in step with PublishedPost by the signal handlers in signals.py.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='keyword_postings')
+    post = models.ForeignKey(PublishedPost, on_delete=models.CASCADE, related_name='postings')
+    term = models.CharField(max_length=64)
+    tf = models.PositiveIntegerField(default=1, help_text="Occurrences of the term in the post's indexed fields")
+    doc_length = models.PositiveIntegerField(default=0, help_text="Indexed terms in the post, for BM25 length normalisation")
+
+    class Meta:
+        unique_together = ['post', 'term']
+        indexes = [
+            # Covers candidate lookup: post ids come straight from the index
+            models.Index(fields=['user', 'term', 'post']),
+        ]
+
+    def __str__(self):
+        return f"{self.term} → {self.post_id}"
+
+
+class RelatedPost(models.Model):
+    """One entry of a post's precomputed related-posts list
+
+    Maintained by related_posts_service when posts are published, edited
+    or removed, so reading a post's related posts is one indexed query.
+    """
+    post = models.ForeignKey(PublishedPost, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(PublishedPost, on_delete=models.CASCADE, related_name='related_from')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['post', 'rank']
+        unique_together = ['post', 'related']
+        indexes = [
+            models.Index(fields=['post', 'rank']),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} #{self.rank}: {self.related_id}"
+
+
+class PostLink(models.Model):
+    """One internal link: an anchor in the source post pointing at the target
+
+    The link graph, re-derived from a post's HTML whenever it changes, so
+    inbound and outbound counts are aggregates over this table rather than
+    counters kept alongside it.
+    """
+    source = models.ForeignKey(PublishedPost, on_delete=models.CASCADE, related_name='outbound_links')
+    target = models.ForeignKey(PublishedPost, on_delete=models.CASCADE, related_name='inbound_links')
+    anchor = models.CharField(max_length=255, blank=True)
+    position = models.PositiveIntegerField(help_text="Order of the link among the source's links")
+
+    class Meta:
+        ordering = ['source', 'position']
+        unique_together = ['source', 'position']
+        indexes = [
+            # Inbound counts and orphan checks read only this index
+            models.Index(fields=['target', 'source']),
+        ]
+
+    def __str__(self):
+        return f"{self.source_id} → {self.target_id} ({self.anchor})"
+
+
+class RelinkJob(models.Model):
+    """A request to re-run internal linking over a user's or a site's posts
+
+    Created from the dashboard after linking settings change, and run by
+    the relink worker, which records its progress and throughput here.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='relink_jobs')
+    wordpress_site = models.ForeignKey(
+        WordPressSite, on_delete=models.CASCADE, null=True, blank=True,
+        help_text="Only relink this site's posts; all of the user's posts if empty"
+    )
+    push = models.BooleanField(default=False, help_text="Queue changed posts for a WordPress update")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    posts = models.PositiveIntegerField(default=0)
+    changed = models.PositiveIntegerField(default=0)
+    conflicts = models.PositiveIntegerField(default=0, help_text="Posts edited while being relinked, left as they were")
+    posts_per_second = models.FloatField(default=0)
+    error_message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Relink for {self.user_id} - {self.status}"
+
+
+class LinkingIndexChange(models.Model):
+    """A post whose postings or inbound links changed after the linking index was built
+
+    Readers of the index file take these posts from the tables instead;
+    the next build prunes the rows it covers. ``post_id`` is not a foreign
+    key, so deleting a post leaves its row behind.
+    """
+    post_id = models.BigIntegerField()
+    changed_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.post_id} changed {self.changed_at}"
+
+
+class RelatedPostsRefresh(models.Model):
+    """A post whose related-posts neighbourhood needs recomputing
+
+    Queued when a post is saved and consumed by the related-posts worker,
+    so a save never waits for the ranking work.
+    """
+    post_id = models.BigIntegerField()
+    requested_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"Refresh {self.post_id} requested {self.requested_at}"
+
+
+class WebhookEvent(models.Model):
+    """A post change reported by a site's webhook
+
+    Stored as soon as the signed delivery arrives and applied to the local
+    corpus later by the webhook worker, so the endpoint answers quickly.
+    """
+    EVENT_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('deleted', 'Deleted'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('processed', 'Processed'),
+        ('failed', 'Failed'),
+    ]
+
+    wordpress_site = models.ForeignKey(WordPressSite, on_delete=models.CASCADE, related_name='webhook_events')
+    delivery_id = models.CharField(max_length=64, blank=True, help_text="Sender's delivery id, used to drop retries")
+    event = models.CharField(max_length=20, choices=EVENT_CHOICES)
+    wordpress_post_id = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['received_at']
+        indexes = [
+            models.Index(fields=['status', 'received_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['wordpress_site', 'delivery_id'],
+                condition=~Q(delivery_id=''),
+                name='unique_webhook_delivery'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Post {self.wordpress_post_id} {self.event} on {self.wordpress_site_id} - {self.status}"
+
+
+class SiteHealthCheck(models.Model):
+    """One probe of a site by the health monitor"""
+    wordpress_site = models.ForeignKey(WordPressSite, on_delete=models.CASCADE, related_name='health_checks')
+    checked_at = models.DateTimeField(default=timezone.now)
+    ok = models.BooleanField()
+    status_code = models.IntegerField(null=True, blank=True)
+    latency_ms = models.FloatField(null=True, blank=True)
+    error_message = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-checked_at']
+        indexes = [
+            models.Index(fields=['wordpress_site', '-checked_at']),
+        ]
+
+    def __str__(self):
+        state = 'ok' if self.ok else 'failed'
+        return f"{self.wordpress_site_id} {state} at {self.checked_at:%Y-%m-%d %H:%M}"
+
+
+class SiteLinkReport(models.Model):
+    """The latest link graph analysis of a site, written by analyze_link_graph"""
+    wordpress_site = models.OneToOneField(WordPressSite, on_delete=models.CASCADE, related_name='link_report')
+    report = models.JSONField(default=dict)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Link report for {self.wordpress_site_id} at {self.computed_at:%Y-%m-%d %H:%M}"
+
+
+class SiteUpdateStats(models.Model):
+    """Running totals of what diff-aware updates sent to and skipped for a site"""
+    COUNTERS = [
+        'requests_sent', 'requests_skipped', 'fields_sent',
+        'fields_skipped', 'bytes_sent', 'bytes_skipped',
+    ]
+
+    wordpress_site = models.OneToOneField(WordPressSite, on_delete=models.CASCADE, related_name='update_stats')
+    requests_sent = models.PositiveBigIntegerField(default=0)
+    requests_skipped = models.PositiveBigIntegerField(default=0)
+    fields_sent = models.PositiveBigIntegerField(default=0)
+    fields_skipped = models.PositiveBigIntegerField(default=0)
+    bytes_sent = models.PositiveBigIntegerField(default=0)
+    bytes_skipped = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Update stats for {self.wordpress_site_id}"
+
+    @classmethod
+    def record(cls, site_id, stats: dict):
+        """Add one update's counts to the site's totals with a single UPDATE"""
+        increments = {name: F(name) + stats.get(name, 0) for name in cls.COUNTERS}
+        rows = cls.objects.filter(wordpress_site_id=site_id)
+        if not rows.update(updated_at=timezone.now(), **increments):
+            # First update for the site: create the row, then add to it
+            cls.objects.get_or_create(wordpress_site_id=site_id)
+            rows.update(updated_at=timezone.now(), **increments)
+
 
 class UploadedImage(models.Model):
     """Enhanced image model with better tracking"""
@@ -236,6 +583,10 @@ class LinkingProfile(models.Model):
     # Link text preferences
     use_exact_title = models.BooleanField(default=False)
     vary_anchor_text = models.BooleanField(default=True)
+
+    rules_version = models.PositiveIntegerField(
+        default=0, editable=False, help_text="Bumped on every link rule change, so each process rebuilds its matcher"
+    )
     
     def __str__(self):
         return f"Linking profile for {self.user.username}"
@@ -0,0 +1,265 @@
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Any, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import PublishedPost, PublishIntent
+from .publishing_service import PublishingService
+
+
+# Retry schedule for failed intents: base * 2**attempts, with jitter
+RETRY_BASE_DELAY = 30          # seconds
+RETRY_MAX_DELAY = 6 * 60 * 60  # seconds
+MAX_ATTEMPTS = 12
+
+# Intents left in 'processing' this long belonged to a worker that died
+STALE_PROCESSING_AFTER = timedelta(minutes=15)
+
+# How long to wait before retrying a post another publisher holds
+IN_PROGRESS_RETRY_DELAY = timedelta(seconds=30)
+
+# How long to wait before retrying a site the health monitor reports down
+SITE_DOWN_RETRY_DELAY = timedelta(minutes=5)
+
+
+def enqueue_publish(post: PublishedPost) -> Optional[PublishIntent]:
+    """Record that a post must be published to its site
+
+    Call inside the same ``transaction.atomic()`` block that saves the post,
+    so the intent exists if and only if the post change was committed.
+    Reuses a pending intent for the post rather than adding a second one.
+    """
+    if not post.wordpress_site_id:
+        return None
+
+    intent = PublishIntent.objects.filter(
+        post=post, wordpress_site_id=post.wordpress_site_id, status='pending'
+    ).first()
+    if intent:
+        intent.next_attempt_at = timezone.now()
+        intent.save(update_fields=['next_attempt_at', 'updated_at'])
+        return intent
+
+    return PublishIntent.objects.create(post=post, wordpress_site_id=post.wordpress_site_id)
+
+
+class CircuitBreaker:
+    """Stops sending to a site after repeated failures, then probes it again"""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 300.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self) -> bool:
+        return self.state != 'open'
+
+    def retry_at(self):
+        """When an open breaker will let the next probe through"""
+        remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+        return timezone.now() + timedelta(seconds=max(0.0, remaining))
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == 'half-open' or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class OutboxWorker:
+    """Drain pending PublishIntents with retries and a circuit breaker per site"""
+
+    def __init__(self, publishing_service: Optional[PublishingService] = None,
+                 per_site_limit: int = 10, failure_threshold: int = 3,
+                 reset_timeout: float = 300.0):
+        self.publishing_service = publishing_service or PublishingService()
+        self.per_site_limit = per_site_limit
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: Dict[int, CircuitBreaker] = {}
+
+    def breaker_for(self, site_id: int) -> CircuitBreaker:
+        if site_id not in self.breakers:
+            self.breakers[site_id] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return self.breakers[site_id]
+
+    def drain(self, limit: int = 100) -> Dict[str, Any]:
+        """Process up to ``limit`` due intents, a bounded number per site"""
+        self.requeue_stale()
+
+        due = PublishIntent.objects.filter(
+            status='pending', next_attempt_at__lte=timezone.now()
+        ).order_by('next_attempt_at')[:limit]
+
+        per_site = defaultdict(list)
+        for intent in due:
+            if len(per_site[intent.wordpress_site_id]) < self.per_site_limit:
+                per_site[intent.wordpress_site_id].append(intent)
+
+        return self.process([intent for intents in per_site.values() for intent in intents])
+
+    def requeue_stale(self) -> int:
+        """Return intents abandoned mid-publish by a crashed worker to the queue"""
+        return PublishIntent.objects.filter(
+            status='processing', updated_at__lt=timezone.now() - STALE_PROCESSING_AFTER
+        ).update(status='pending', next_attempt_at=timezone.now(), updated_at=timezone.now())
+
+    def process(self, intents: List[PublishIntent]) -> Dict[str, Any]:
+        """Publish the given intents' posts and record each outcome"""
+        summary = {
+            'published': 0, 'retrying': 0, 'dead': 0, 'deferred': 0, 'circuit_open': 0,
+            'site_down': 0, 'errors': []
+        }
+
+        claimed = []
+        for intent in intents:
+            breaker = self.breaker_for(intent.wordpress_site_id)
+            if not breaker.allow():
+                # Site is down: push back without spending an attempt
+                PublishIntent.objects.filter(pk=intent.pk, status='pending').update(
+                    next_attempt_at=breaker.retry_at(), updated_at=timezone.now()
+                )
+                summary['circuit_open'] += 1
+                continue
+            if self._claim(intent):
+                claimed.append(intent)
+
+        if not claimed:
+            return summary
+
+        intent_by_post = {intent.post_id: intent for intent in claimed}
+        posts = PublishedPost.objects.filter(
+            id__in=intent_by_post
+        ).select_related('wordpress_site')
+
+        def on_result(post, result):
+            outcome = self._record_result(intent_by_post.pop(post.id), post, result)
+            summary[outcome] += 1
+            if outcome in ('retrying', 'dead'):
+                summary['errors'].append({'post_id': post.id, 'title': post.title, 'error': result['error']})
+
+        try:
+            self.publishing_service.bulk_publish(posts, on_result=on_result)
+        except Exception as e:
+            # Intents without a result would otherwise sit in 'processing'
+            # until requeue_stale; spend an attempt on them and back off
+            titles = {post.id: post.title for post in posts}
+            for post_id, intent in intent_by_post.items():
+                outcome = self._release(intent, str(e))
+                summary[outcome] += 1
+                summary['errors'].append({'post_id': post_id, 'title': titles.get(post_id, ''), 'error': str(e)})
+        return summary
+
+    def _release(self, intent: PublishIntent, error: str) -> str:
+        """Return an intent whose publish crashed to the queue with backoff"""
+        intent.attempts += 1
+        intent.last_error = error
+        if intent.attempts >= MAX_ATTEMPTS:
+            intent.status = 'dead'
+        else:
+            intent.status = 'pending'
+            intent.next_attempt_at = timezone.now() + timedelta(seconds=self._retry_delay(intent.attempts))
+
+        # Free the post for the next attempt instead of waiting out its claim
+        held = PublishedPost.objects.filter(pk=intent.post_id, status='publishing')
+        with transaction.atomic():
+            held.exclude(wordpress_post_id='').update(status='published', publish_started_at=None, error_message=error)
+            held.filter(wordpress_post_id='').update(
+                status='failed' if intent.status == 'dead' else 'queued', publish_started_at=None, error_message=error
+            )
+            intent.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at', 'updated_at'])
+        return 'dead' if intent.status == 'dead' else 'retrying'
+
+    def _claim(self, intent: PublishIntent) -> bool:
+        """Move an intent to processing, unless another worker got there first"""
+        claimed = PublishIntent.objects.filter(pk=intent.pk, status='pending').update(
+            status='processing', updated_at=timezone.now()
+        )
+        if claimed:
+            intent.status = 'processing'
+        return bool(claimed)
+
+    def _record_result(self, intent: PublishIntent, post: PublishedPost,
+                       result: Dict[str, Any]) -> str:
+        breaker = self.breaker_for(intent.wordpress_site_id)
+
+        if result.get('in_progress'):
+            # Another publisher holds the post. Check back once it is done, so
+            # any edits it did not pick up still get sent (as a diff-aware update).
+            intent.status = 'pending'
+            intent.next_attempt_at = timezone.now() + IN_PROGRESS_RETRY_DELAY
+            intent.save(update_fields=['status', 'next_attempt_at', 'updated_at'])
+            return 'deferred'
+
+        if result.get('no_site'):
+            # The post was taken off its site; there is nothing left to send
+            intent.status = 'dead'
+            intent.last_error = result['error']
+            intent.save(update_fields=['status', 'last_error', 'updated_at'])
+            return 'dead'
+
+        if result.get('site_down'):
+            # Nothing was sent, so no attempt is spent
+            intent.status = 'pending'
+            intent.next_attempt_at = timezone.now() + SITE_DOWN_RETRY_DELAY
+            intent.save(update_fields=['status', 'next_attempt_at', 'updated_at'])
+            return 'site_down'
+
+        if result['success']:
+            breaker.record_success()
+            with transaction.atomic():
+                self.publishing_service.apply_result(post, result)
+                intent.status = 'done'
+                intent.last_error = ''
+                intent.save(update_fields=['status', 'last_error', 'updated_at'])
+            return 'published'
+
+        if self._is_site_failure(result):
+            breaker.record_failure()
+
+        intent.attempts += 1
+        intent.last_error = result['error']
+        post.error_message = result['error']
+        post.publish_started_at = None
+        if intent.attempts >= MAX_ATTEMPTS:
+            intent.status = 'dead'
+            post.status = 'failed'
+            outcome = 'dead'
+        else:
+            intent.status = 'pending'
+            intent.next_attempt_at = timezone.now() + timedelta(seconds=self._retry_delay(intent.attempts))
+            post.status = 'queued'
+            outcome = 'retrying'
+        if post.wordpress_post_id:
+            # A failed update leaves the existing WordPress post live
+            post.status = 'published'
+
+        with transaction.atomic():
+            post.save(update_fields=['status', 'error_message', 'publish_started_at'])
+            intent.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at', 'updated_at'])
+        return outcome
+
+    def _is_site_failure(self, result: Dict[str, Any]) -> bool:
+        """Network errors, throttling and 5xx point at the site, not the post"""
+        status_code = result.get('status_code')
+        return not status_code or status_code == 429 or status_code >= 500
+
+    def _retry_delay(self, attempts: int) -> float:
+        delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.5)
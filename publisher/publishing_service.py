@@ -0,0 +1,475 @@
+import os
+import time
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Callable
+
+from django.utils import timezone
+
+from .health_service import site_concurrency, site_health
+from .models import PublishedPost, SitePublication, SiteUpdateStats
+from .wordpress_service import WordPressService
+
+
+# Status codes that mean "slow down" rather than "this post is broken"
+THROTTLE_STATUS_CODES = (429, 503)
+
+# Fields written when recording a publish outcome. Saving only these keeps
+# a publisher from overwriting edits made while it was talking to WordPress.
+RESULT_FIELDS = [
+    'wordpress_post_id', 'wordpress_url', 'status', 'published_at',
+    'error_message', 'published_field_hashes', 'publish_started_at',
+]
+
+
+class SiteThrottle:
+    """Adaptive backoff shared by all workers publishing to one site"""
+
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.delay = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Sleep for the current backoff delay, if any"""
+        with self._lock:
+            delay = self.delay
+        if delay:
+            time.sleep(delay)
+
+    def record_success(self):
+        """Halve the delay after a successful request"""
+        with self._lock:
+            self.delay = self.delay / 2 if self.delay > self.base_delay else 0.0
+
+    def record_throttled(self, retry_after: Optional[float] = None):
+        """Double the delay, or honour the server's Retry-After"""
+        with self._lock:
+            if retry_after:
+                self.delay = min(self.max_delay, retry_after)
+            else:
+                self.delay = min(self.max_delay, max(self.base_delay, self.delay * 2))
+
+
+class PublishingService:
+    """Publish PublishedPost records to their WordPress sites"""
+
+    def __init__(self, max_per_site: int = 3, max_retries: int = 3,
+                 base_delay: float = 1.0, max_delay: float = 60.0):
+        self.max_per_site = max_per_site
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def get_wordpress_service(self, site) -> WordPressService:
+        """Build a WordPress client for a site"""
+        return WordPressService(
+            site_url=site.url,
+            username=site.username,
+            app_password=site.app_password
+        )
+
+    def render_content(self, post: PublishedPost) -> str:
+        """The block markup publishing this post would send (cached by content)"""
+        wp = self.get_wordpress_service(post.wordpress_site)
+        return wp.format_content(self._post_content(post))
+
+    def publish_post(self, post: PublishedPost) -> Dict[str, Any]:
+        """Publish a single post and record the outcome on it"""
+        if not post.wordpress_site:
+            return self._no_site_result()
+        if not site_concurrency(site_health([post.wordpress_site_id]).get(post.wordpress_site_id), 1):
+            return self._site_down_result()
+        if not PublishedPost.claim_for_publishing(post.pk):
+            return self._in_progress_result()
+        post.refresh_from_db()
+
+        wp = self.get_wordpress_service(post.wordpress_site)
+        throttle = SiteThrottle(self.base_delay, self.max_delay)
+        result = self._send_post(wp, post, post.images.first(), throttle)
+        self.apply_result(post, result)
+        return result
+
+    def bulk_publish(self, posts, use_batch: bool = True,
+                     on_result: Optional[Callable] = None) -> Dict[str, Any]:
+        """Publish many posts, concurrently across sites
+
+        Posts are grouped by WordPress site. Each site gets its own worker
+        pool capped at ``max_per_site`` and its own backoff state, so a slow
+        or rate-limited site never holds up the others and throughput grows
+        with the number of distinct sites. The health monitor's recent
+        checks cut a degraded site to one worker and skip a down one. With
+        ``use_batch``, new posts without images go out through the site's
+        /batch/v1 endpoint.
+
+        ``on_result(post, result)`` is called on this thread for every post;
+        it defaults to ``apply_result``.
+        """
+        on_result = on_result or self.apply_result
+        summary = {
+            'published': 0, 'failed': 0, 'skipped': 0, 'in_progress': 0, 'site_down': 0,
+            'sites': 0, 'errors': []
+        }
+
+        posts = list(posts)
+        health = site_health({post.wordpress_site_id for post in posts if post.wordpress_site_id})
+        concurrency = {
+            site_id: site_concurrency(stats, self.max_per_site) for site_id, stats in health.items()
+        }
+
+        claimed = []
+        for post in posts:
+            if not post.wordpress_site_id:
+                on_result(post, self._no_site_result())
+                summary['skipped'] += 1
+            elif not concurrency[post.wordpress_site_id]:
+                # Site failed its recent health checks; don't spend requests on it
+                on_result(post, self._site_down_result())
+                summary['site_down'] += 1
+            elif not PublishedPost.claim_for_publishing(post.pk):
+                # Someone else is publishing this post; leave it to them
+                on_result(post, self._in_progress_result())
+                summary['in_progress'] += 1
+            else:
+                claimed.append((post.wordpress_site_id, post.pk))
+
+        # Re-read the claimed posts, as publish_post does: another worker may
+        # have published one since it was loaded, and a stale empty
+        # wordpress_post_id would create it on WordPress a second time
+        fresh = PublishedPost.objects.filter(pk__in=[pk for _, pk in claimed]).select_related('wordpress_site').in_bulk()
+        posts_by_site = defaultdict(list)
+        for site_id, pk in claimed:
+            if pk in fresh:
+                # A post deleted since its claim has nothing left to publish
+                posts_by_site[site_id].append(fresh[pk])
+        summary['sites'] = len(posts_by_site)
+
+        executors = []
+        futures = {}
+        try:
+            for site_id, site_posts in posts_by_site.items():
+                wp = self.get_wordpress_service(site_posts[0].wordpress_site)
+                throttle = SiteThrottle(self.base_delay, self.max_delay)
+                executor = ThreadPoolExecutor(
+                    max_workers=min(concurrency[site_id], len(site_posts)),
+                    thread_name_prefix='wp-publish'
+                )
+                executors.append(executor)
+
+                batchable = []
+                for post in site_posts:
+                    # Resolve the image here: worker threads never touch the DB
+                    first_image = post.images.first()
+                    if use_batch and not first_image and not post.wordpress_post_id:
+                        batchable.append(post)
+                        continue
+                    future = executor.submit(self._send_post, wp, post, first_image, throttle)
+                    futures[future] = [post]
+
+                if len(batchable) > 1:
+                    futures[executor.submit(self._send_batch, wp, batchable, throttle)] = batchable
+                elif batchable:
+                    future = executor.submit(self._send_post, wp, batchable[0], None, throttle)
+                    futures[future] = batchable
+
+            # Record each result as soon as it arrives; DB writes stay on this thread
+            for future in as_completed(futures):
+                task_posts = futures[future]
+                try:
+                    results = future.result()
+                    if isinstance(results, dict):
+                        results = [results]
+                except Exception as e:
+                    results = [{'success': False, 'error': str(e)}] * len(task_posts)
+
+                for post, result in zip(task_posts, results):
+                    on_result(post, result)
+                    if result['success']:
+                        summary['published'] += 1
+                    else:
+                        summary['failed'] += 1
+                        summary['errors'].append({'post_id': post.id, 'title': post.title, 'error': result['error']})
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=True)
+
+        return summary
+
+    def fan_out(self, post: PublishedPost, sites) -> Dict[str, Any]:
+        """Publish one post to several sites at once, one worker per site
+
+        The block markup is prepared once and shared by every site. Each
+        site then uploads the featured image and creates (or updates) its
+        copy in parallel. The post's own site records the outcome on the
+        post as usual; every other site gets a SitePublication.
+        """
+        summary = {'published': 0, 'failed': 0, 'in_progress': 0, 'site_down': 0, 'errors': []}
+        sites = list({site.pk: site for site in sites}.values())
+        if not sites:
+            return summary
+
+        health = site_health([site.pk for site in sites])
+        content = self._post_content(post)
+        # Serialized blocks are cached by content hash; every site reuses them
+        self.get_wordpress_service(sites[0]).format_content(content)
+        first_image = post.images.first()
+
+        tasks = []
+        for site in sites:
+            if not site_concurrency(health.get(site.pk), 1):
+                summary['site_down'] += 1
+                summary['errors'].append({'site_id': site.pk, 'site': site.name, 'error': self._site_down_result()['error']})
+                continue
+            if site.pk == post.wordpress_site_id:
+                target = post
+                claimed = PublishedPost.claim_for_publishing(post.pk)
+            else:
+                target, _ = SitePublication.objects.get_or_create(post=post, wordpress_site=site)
+                claimed = SitePublication.claim_for_publishing(target.pk)
+            if not claimed:
+                summary['in_progress'] += 1
+                continue
+            target.refresh_from_db()
+            tasks.append((site, target))
+
+        if not tasks:
+            return summary
+
+        with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix='wp-fanout') as executor:
+            futures = {}
+            for site, target in tasks:
+                wp = self.get_wordpress_service(site)
+                throttle = SiteThrottle(self.base_delay, self.max_delay)
+                if target is post:
+                    future = executor.submit(self._send_post, wp, post, first_image, throttle)
+                else:
+                    future = executor.submit(self._send_copy, wp, post, target, first_image, throttle)
+                futures[future] = (site, target)
+
+            for future in as_completed(futures):
+                site, target = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'success': False, 'error': str(e)}
+
+                if target is post:
+                    self.apply_result(post, result)
+                else:
+                    self._apply_copy_result(target, result)
+                if result['success']:
+                    summary['published'] += 1
+                else:
+                    summary['failed'] += 1
+                    summary['errors'].append({'site_id': site.pk, 'site': site.name, 'error': result['error']})
+
+        return summary
+
+    def apply_result(self, post: PublishedPost, result: Dict[str, Any]):
+        """Persist the outcome of a publish attempt on the post"""
+        media = result.get('media')
+        if media and media.get('success') and media.get('image'):
+            image = media['image']
+            image.wordpress_media_id = str(media['media_id'])
+            image.wordpress_url = media['url']
+            image.save(update_fields=['wordpress_media_id', 'wordpress_url'])
+
+        if result.get('in_progress') or result.get('site_down') or result.get('no_site'):
+            # Nothing was attempted: the holder of the post, or a later
+            # attempt once the site recovers, records the outcome
+            return
+
+        if result['success']:
+            if 'update_stats' in result:
+                SiteUpdateStats.record(post.wordpress_site_id, result['update_stats'])
+            if 'field_hashes' in result:
+                post.published_field_hashes = result['field_hashes']
+            if not result.get('skipped'):
+                post.wordpress_post_id = str(result['post_id'])
+                post.wordpress_url = result['url']
+            post.status = 'published'
+            if not post.published_at:
+                post.published_at = timezone.now()
+            post.error_message = ''
+        else:
+            # A failed update leaves the existing WordPress post live
+            post.status = 'published' if post.wordpress_post_id else 'failed'
+            post.error_message = result['error']
+        post.publish_started_at = None
+        post.save(update_fields=RESULT_FIELDS)
+
+    def _send_post(self, wp: WordPressService, post: PublishedPost,
+                   first_image, throttle: SiteThrottle) -> Dict[str, Any]:
+        """Create the post on WordPress, or update it if it already exists
+
+        Network only, no DB access.
+        """
+        if post.wordpress_post_id:
+            # Only fields that changed since the last publish are sent
+            result = self._with_backoff(
+                throttle,
+                wp.update_post,
+                int(post.wordpress_post_id),
+                field_hashes=post.published_field_hashes,
+                title=post.title,
+                content=self._post_content(post)
+            )
+            if result.get('skipped'):
+                result['url'] = post.wordpress_url
+            return result
+
+        featured_media_id = None
+        media_result = None
+        if first_image:
+            media_result = self._with_backoff(
+                throttle,
+                wp.upload_media,
+                first_image.image.path,
+                os.path.basename(first_image.image.name)
+            )
+            if media_result['success']:
+                featured_media_id = media_result['media_id']
+                media_result['image'] = first_image
+
+        result = self._with_backoff(
+            throttle,
+            wp.create_post,
+            title=post.title,
+            content=self._post_content(post),
+            status='publish',
+            featured_media_id=featured_media_id,
+            format='standard'
+        )
+        result['media'] = media_result
+        return result
+
+    def _send_copy(self, wp: WordPressService, post: PublishedPost, publication: SitePublication,
+                   first_image, throttle: SiteThrottle) -> Dict[str, Any]:
+        """Create or update a post's copy on another site (network only)"""
+        if publication.wordpress_post_id:
+            result = self._with_backoff(
+                throttle,
+                wp.update_post,
+                int(publication.wordpress_post_id),
+                field_hashes=publication.published_field_hashes,
+                title=post.title,
+                content=self._post_content(post)
+            )
+            if result.get('skipped'):
+                result['url'] = publication.wordpress_url
+            return result
+
+        # Media ids are per site: each site gets its own upload
+        featured_media_id = int(publication.featured_media_id) if publication.featured_media_id else None
+        media_result = None
+        if first_image and not featured_media_id:
+            media_result = self._with_backoff(
+                throttle,
+                wp.upload_media,
+                first_image.image.path,
+                os.path.basename(first_image.image.name),
+                first_image.alt_text
+            )
+            if media_result['success']:
+                featured_media_id = media_result['media_id']
+
+        result = self._with_backoff(
+            throttle,
+            wp.create_post,
+            title=post.title,
+            content=self._post_content(post),
+            status='publish',
+            featured_media_id=featured_media_id,
+            format='standard'
+        )
+        result['media'] = media_result
+        return result
+
+    def _apply_copy_result(self, publication: SitePublication, result: Dict[str, Any]):
+        """Persist the outcome of publishing a copy"""
+        media = result.get('media')
+        if media and media.get('success'):
+            publication.featured_media_id = str(media['media_id'])
+
+        if result['success']:
+            if 'update_stats' in result:
+                SiteUpdateStats.record(publication.wordpress_site_id, result['update_stats'])
+            if 'field_hashes' in result:
+                publication.published_field_hashes = result['field_hashes']
+            if not result.get('skipped'):
+                publication.wordpress_post_id = str(result['post_id'])
+                publication.wordpress_url = result['url']
+            publication.status = 'published'
+            if not publication.published_at:
+                publication.published_at = timezone.now()
+            publication.error_message = ''
+        else:
+            publication.status = 'published' if publication.wordpress_post_id else 'failed'
+            publication.error_message = result['error']
+        publication.publish_started_at = None
+        publication.save()
+
+    def _send_batch(self, wp: WordPressService, posts: List[PublishedPost],
+                    throttle: SiteThrottle) -> List[Dict[str, Any]]:
+        """Create several new posts through the batch endpoint (network only)
+
+        Items rejected with 429/503 are retried, after backing off, in the
+        next batch; the rest keep their first result.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(posts)
+        pending = list(range(len(posts)))
+
+        for _ in range(self.max_retries + 1):
+            throttle.wait()
+            batch_results = wp.create_posts([
+                {
+                    'title': posts[i].title,
+                    'content': self._post_content(posts[i]),
+                    'status': 'publish',
+                    'format': 'standard'
+                }
+                for i in pending
+            ])
+
+            throttled = []
+            retry_after = None
+            for i, result in zip(pending, batch_results):
+                results[i] = result
+                if result.get('status_code') in THROTTLE_STATUS_CODES:
+                    throttled.append(i)
+                    retry_after = result.get('retry_after') or retry_after
+
+            if not throttled:
+                throttle.record_success()
+                break
+            throttle.record_throttled(retry_after)
+            pending = throttled
+
+        return results
+
+    def _no_site_result(self) -> Dict[str, Any]:
+        return {'success': False, 'no_site': True, 'error': 'No WordPress site selected for this post'}
+
+    def _in_progress_result(self) -> Dict[str, Any]:
+        return {'success': False, 'in_progress': True, 'error': 'Publishing already in progress'}
+
+    def _site_down_result(self) -> Dict[str, Any]:
+        return {'success': False, 'site_down': True, 'error': 'Site is failing health checks'}
+
+    def _post_content(self, post: PublishedPost) -> str:
+        return post.html_content or post.edited_content or post.content
+
+    def _with_backoff(self, throttle: SiteThrottle, func: Callable, *args, **kwargs) -> Dict[str, Any]:
+        """Call a WordPressService method, retrying on 429/503 with site-wide backoff"""
+        result = {'success': False, 'error': 'Not attempted'}
+        for _ in range(self.max_retries + 1):
+            throttle.wait()
+            result = func(*args, **kwargs)
+            if result.get('status_code') in THROTTLE_STATUS_CODES:
+                throttle.record_throttled(result.get('retry_after'))
+                continue
+            throttle.record_success()
+            break
+        return result
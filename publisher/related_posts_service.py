@@ -0,0 +1,99 @@
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from django.db import transaction
+
+from .keyword_index_service import INDEXED_FIELDS, post_term_counts
+from .models import PublishedPost, RelatedPost, RelatedPostsRefresh
+from .relevance_service import SAME_CATEGORY_BOOST, Bm25Index
+
+
+# Entries kept per post; get_related_posts reads a prefix of these
+RELATED_POSTS_K = 10
+
+# How far down a changed post's own ranking to look for lists it may now enter
+NEIGHBOURHOOD_SIZE = 2 * RELATED_POSTS_K
+
+# Query terms taken from a post, most frequent first
+QUERY_TERMS = 20
+
+# Queued posts the worker refreshes per run
+REFRESH_BATCH_SIZE = 500
+
+# Statuses whose writing refreshes a post's neighbourhood
+REFRESH_ON_STATUSES = ('published', 'draft', 'failed')
+
+_RANKING_FIELDS = ('id', 'user_id', 'status', 'main_category') + INDEXED_FIELDS
+
+
+def rank_related(post: PublishedPost, limit: int = RELATED_POSTS_K) -> List[Tuple[int, float]]:
+    """(post id, score) of the published posts most related to ``post``"""
+    terms = [term for term, _ in post_term_counts(post).most_common(QUERY_TERMS)]
+    if not terms:
+        return []
+
+    def boost(row):
+        return SAME_CATEGORY_BOOST if post.main_category and row.main_category == post.main_category else 1.0
+
+    return Bm25Index(post.user_id).rank(
+        terms, limit, PublishedPost.objects.filter(status='published').exclude(id=post.id), boost
+    )
+
+
+def refresh_related(posts: Iterable[PublishedPost]) -> int:
+    """Recompute the related-posts lists of ``posts``; returns lists rewritten"""
+    rewritten = 0
+    for post in posts:
+        ranked = rank_related(post)
+        current = list(RelatedPost.objects.filter(post=post).order_by('rank').values_list('related_id', flat=True))
+        if current == [post_id for post_id, _ in ranked]:
+            continue
+        with transaction.atomic():
+            RelatedPost.objects.filter(post=post).delete()
+            RelatedPost.objects.bulk_create([
+                RelatedPost(post=post, related_id=post_id, rank=rank, score=score)
+                for rank, (post_id, score) in enumerate(ranked)
+            ])
+        rewritten += 1
+    return rewritten
+
+
+def affected_posts(post_ids: Iterable[int]) -> Set[int]:
+    """Posts whose related lists can change when ``post_ids`` change
+
+    The changed posts themselves, every post listing one of them, and for
+    a published post the leading posts of its own ranking: BM25 is close
+    to symmetric, so those are the lists it may now enter.
+    """
+    post_ids = set(post_ids)
+    affected = set(post_ids)
+    affected.update(RelatedPost.objects.filter(related_id__in=post_ids).values_list('post_id', flat=True))
+    for post in PublishedPost.objects.filter(id__in=post_ids, status='published').only(*_RANKING_FIELDS):
+        affected.update(post_id for post_id, _ in rank_related(post, NEIGHBOURHOOD_SIZE))
+    return affected
+
+
+def refresh_neighbourhood(post_ids: Iterable[int]) -> int:
+    """Bring every list affected by changes to ``post_ids`` up to date"""
+    affected = affected_posts(post_ids)
+    return refresh_related(PublishedPost.objects.filter(id__in=affected).only(*_RANKING_FIELDS))
+
+
+def queue_neighbourhood_refresh(post_ids: Iterable[int]):
+    """Have the related-posts worker refresh the neighbourhood of ``post_ids``"""
+    RelatedPostsRefresh.objects.bulk_create([RelatedPostsRefresh(post_id=post_id) for post_id in post_ids])
+
+
+def refresh_queued(limit: int = REFRESH_BATCH_SIZE) -> Dict[str, Any]:
+    """Refresh the neighbourhoods of the oldest queued posts in one pass
+
+    A post queued several times is refreshed once. Rows queued while the
+    pass runs are left for the next one.
+    """
+    rows = list(RelatedPostsRefresh.objects.order_by('requested_at', 'id').values_list('id', 'post_id')[:limit])
+    if not rows:
+        return {'queued': 0, 'posts': 0, 'rewritten': 0}
+
+    post_ids = {post_id for _, post_id in rows}
+    rewritten = refresh_neighbourhood(post_ids)
+    RelatedPostsRefresh.objects.filter(id__in=[row_id for row_id, _ in rows]).delete()
+    return {'queued': len(rows), 'posts': len(post_ids), 'rewritten': rewritten}
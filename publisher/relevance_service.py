@@ -0,0 +1,183 @@
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+from .link_graph_service import inbound_link_count
+from .linking_index_service import get_linking_index
+from .models import KeywordPosting
+
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Score multiplier for a candidate in the same category as the post being linked from
+SAME_CATEGORY_BOOST = 1.25
+
+# Corpus size and average post length drift slowly; recount at most this often
+CORPUS_STATS_TIMEOUT = 60 * 60  # seconds
+CORPUS_STATS_KEY = 'bm25-corpus:{user_id}'
+
+
+class PostRow(NamedTuple):
+    """The fields ranking boosts read, shaped like a values_list(named=True) row"""
+    id: int
+    main_category: str
+    inbound_count: int
+
+
+def bm25_scores(doc_index: np.ndarray, term_index: np.ndarray, tf: np.ndarray,
+                doc_length: np.ndarray, idf: np.ndarray, avgdl: float, n_docs: int) -> np.ndarray:
+    """BM25 score per document from postings rows, all rows at once
+
+    Row i says document ``doc_index[i]`` holds term ``term_index[i]``
+    ``tf[i]`` times in ``doc_length[i]`` terms.
+    """
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_length / avgdl)
+    contributions = idf[term_index] * tf * (BM25_K1 + 1) / (tf + norm)
+    return np.bincount(doc_index, weights=contributions, minlength=n_docs)
+
+
+def bm25_idf(df: np.ndarray, n_docs: int) -> np.ndarray:
+    """Okapi idf, floored at zero by the +1 inside the log"""
+    return np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, without a full sort"""
+    if k >= len(scores):
+        return np.argsort(-scores, kind='stable')
+    top = np.argpartition(-scores, k)[:k]
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+class Bm25Index:
+    """BM25 ranking of a user's posts over the keyword postings
+
+    Postings and inbound counts come from the shared linking index file
+    when there is one; posts added or changed since it was built are read
+    from the DB.
+    """
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+
+    def corpus_stats(self) -> Tuple[int, float]:
+        """(indexed posts, average indexed length), cached"""
+        key = CORPUS_STATS_KEY.format(user_id=self.user_id)
+        stats = cache.get(key)
+        if stats is None:
+            index = get_linking_index()
+            stats = index.corpus_stats(self.user_id) if index is not None else None
+            if stats is None:
+                totals = KeywordPosting.objects.filter(user_id=self.user_id).aggregate(
+                    posts=Count('post', distinct=True), terms=Sum('tf')
+                )
+                posts = totals['posts'] or 0
+                stats = (posts, (totals['terms'] or 0) / posts if posts else 0.0)
+            cache.set(key, stats, CORPUS_STATS_TIMEOUT)
+        return stats
+
+    def score(self, terms: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(post ids, scores) for every post holding at least one of ``terms``"""
+        terms = list(dict.fromkeys(terms))
+        post_ids, term_index, tf, doc_length = self._postings(terms)
+        if not len(post_ids):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        # Postings are unique per (post, term): a term's rows are its documents
+        df = np.bincount(term_index, minlength=len(terms))
+
+        n_docs, avgdl = self.corpus_stats()
+        n_docs = max(n_docs, int(df.max()))
+        ids, doc_index = np.unique(post_ids, return_inverse=True)
+        scores = bm25_scores(doc_index, term_index, tf, doc_length, bm25_idf(df, n_docs), avgdl or 1.0, len(ids))
+        return ids, scores
+
+    def _postings(self, terms: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(post ids, term position, tf, doc length) of every posting of ``terms``"""
+        parts = []
+        rows = KeywordPosting.objects.filter(user_id=self.user_id, term__in=terms)
+        index = get_linking_index()
+        if index is not None:
+            changed = index.changed_post_ids()
+            indexed = index.postings(self.user_id, terms)
+            keep = ~np.isin(indexed[0], changed)
+            parts.append(tuple(column[keep] for column in indexed))
+            # Posts added or reindexed since the file was built
+            rows = rows.filter(Q(post_id__gt=index.max_post_id) | Q(post_id__in=changed))
+
+        rows = list(rows.values_list('post_id', 'term', 'tf', 'doc_length'))
+        if rows:
+            post_ids, row_terms, tf, doc_length = zip(*rows)
+            term_position = {term: i for i, term in enumerate(terms)}
+            parts.append((
+                np.asarray(post_ids, dtype=np.int64),
+                np.fromiter((term_position[term] for term in row_terms), dtype=np.int64, count=len(rows)),
+                np.asarray(tf, dtype=np.float64),
+                np.asarray(doc_length, dtype=np.float64),
+            ))
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0), np.empty(0)
+        return tuple(np.concatenate(columns) for columns in zip(*parts))
+
+    def rank(self, terms: List[str], limit: int, candidates,
+             boost: Optional[Callable] = None) -> List[Tuple[int, float]]:
+        """(post id, score) of the ``limit`` best posts in ``candidates`` for ``terms``
+
+        Scores come from the postings alone; only the leading window of
+        scored posts is checked against ``candidates`` (a PublishedPost
+        queryset), widening until ``limit`` posts pass. ``boost(row)``
+        multiplies a post's score, given its id, main_category and
+        inbound_count.
+        """
+        ids, scores = self.score(terms)
+        if not len(ids):
+            return []
+
+        window = min(len(ids), max(limit * 4, 32))
+        while True:
+            top = top_k(scores, window)
+            rows = self._candidate_rows(candidates, ids[top].tolist())
+            ranked = [
+                (post_id, float(scores[i]) * (boost(rows[post_id]) if boost else 1.0))
+                for i, post_id in zip(top, ids[top].tolist()) if post_id in rows
+            ]
+            if len(ranked) >= limit or window == len(ids):
+                break
+            window = min(len(ids), window * 4)
+
+        ranked.sort(key=lambda x: x[1], reverse=True)
+        return ranked[:limit]
+
+    def _candidate_rows(self, candidates, post_ids: List[int]) -> Dict[int, tuple]:
+        """Rows with id, main_category and inbound_count for the ``post_ids`` in ``candidates``"""
+        candidates = candidates.filter(id__in=post_ids).order_by()
+        index = get_linking_index()
+        if index is None:
+            return {
+                row.id: row for row in candidates.annotate(inbound_count=inbound_link_count())
+                .values_list('id', 'main_category', 'inbound_count', named=True)
+            }
+
+        # Filtering and categories stay in the DB; inbound counts come from
+        # the index unless the post's links changed since it was built
+        passed = list(candidates.values_list('id', 'main_category'))
+        changed = set(index.changed_post_ids())
+        inbound = index.inbound_counts([post_id for post_id, _ in passed if post_id not in changed])
+        missing = [post_id for post_id, _ in passed if post_id not in inbound]
+        if missing:
+            inbound.update(
+                candidates.model.objects.filter(id__in=missing).annotate(inbound_count=inbound_link_count())
+                .values_list('id', 'inbound_count')
+            )
+        return {post_id: PostRow(post_id, category, inbound[post_id]) for post_id, category in passed}
+
+    def rank_posts(self, terms: List[str], limit: int, candidates,
+                   boost: Optional[Callable] = None) -> List[int]:
+        """Ids of the ``limit`` best posts in ``candidates``, as ``rank``"""
+        return [post_id for post_id, _ in self.rank(terms, limit, candidates, boost)]
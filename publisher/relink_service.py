@@ -0,0 +1,144 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Tuple
+
+import django
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .internal_linking_service import InternalLinkingService
+from .link_graph_service import index_links
+from .link_insertion_service import strip_internal_links
+from .models import LinkingProfile, PublishedPost, RelinkJob
+from .outbox_service import enqueue_publish
+
+
+# Posts a worker process relinks, and the parent writes back, at a time
+RELINK_CHUNK_SIZE = 50
+RELINK_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def relink_chunk(user_id: int, post_ids: List[int]) -> List[Tuple[int, str, str]]:
+    """(post id, html_content as read, relinked content) for the posts whose links change
+
+    Previously inserted links are stripped and linking runs again with the
+    user's current settings. Reads only, so it can run in a worker process.
+    """
+    linking = InternalLinkingService(User.objects.get(pk=user_id))
+    changed = []
+    posts = PublishedPost.objects.filter(id__in=post_ids).only(
+        'id', 'topic', 'html_content', 'edited_content', 'content'
+    )
+    for post in posts:
+        original = post.html_content or post.edited_content or post.content
+        linking.used_links.clear()
+        # Seeded by post, so relinking unchanged settings changes nothing
+        relinked, _ = linking.auto_insert_internal_links(
+            strip_internal_links(original), post.topic, current_post_id=post.id, rng=random.Random(post.id)
+        )
+        if relinked != original:
+            changed.append((post.id, post.html_content, relinked))
+    return changed
+
+
+class Relinker:
+    """Re-run link selection and insertion over many posts
+
+    Posts are split by user into chunks relinked across a process pool;
+    the parent writes each chunk's changes back in one transaction. A post
+    edited after its chunk was read is left alone and counted as a conflict.
+    """
+
+    def __init__(self, workers: int = RELINK_WORKERS, chunk_size: int = RELINK_CHUNK_SIZE, push: bool = False):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.push = push
+
+    def run(self, posts) -> Dict[str, Any]:
+        """Relink ``posts`` (a PublishedPost queryset); returns counts and throughput"""
+        summary = {'success': True, 'error': '', 'posts': 0, 'changed': 0, 'conflicts': 0,
+                   'queued': 0, 'seconds': 0.0, 'posts_per_second': 0.0}
+        started = time.perf_counter()
+
+        rows = list(posts.exclude(status='publishing').order_by('user_id', 'id').values_list('user_id', 'id'))
+        disabled = set(LinkingProfile.objects.filter(
+            user_id__in={user_id for user_id, _ in rows}, auto_link_enabled=False
+        ).values_list('user_id', flat=True))
+        by_user: Dict[int, List[int]] = {}
+        for user_id, post_id in rows:
+            if user_id not in disabled:
+                by_user.setdefault(user_id, []).append(post_id)
+        tasks = [
+            (user_id, ids[start:start + self.chunk_size])
+            for user_id, ids in by_user.items() for start in range(0, len(ids), self.chunk_size)
+        ]
+        summary['posts'] = sum(len(ids) for _, ids in tasks)
+
+        if self.workers <= 1 or len(tasks) <= 1:
+            for task in tasks:
+                self._write(relink_chunk(*task), summary)
+        else:
+            # Forked workers must not share the parent's DB connections
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=django.setup) as executor:
+                for future in as_completed([executor.submit(relink_chunk, *task) for task in tasks]):
+                    self._write(future.result(), summary)
+
+        summary['seconds'] = time.perf_counter() - started
+        summary['posts_per_second'] = summary['posts'] / summary['seconds'] if summary['seconds'] else 0.0
+        return summary
+
+    def _write(self, results: List[Tuple[int, str, str]], summary: Dict[str, Any]):
+        with transaction.atomic():
+            written = [
+                post_id for post_id, read, relinked in results
+                if PublishedPost.objects.filter(pk=post_id, html_content=read).update(html_content=relinked)
+            ]
+            summary['conflicts'] += len(results) - len(written)
+            summary['changed'] += len(written)
+            if not written:
+                return
+
+            posts = list(PublishedPost.objects.filter(id__in=written).only(
+                'id', 'user_id', 'html_content', 'edited_content', 'content', 'wordpress_post_id', 'wordpress_site_id'
+            ))
+            # Conditional updates skip post_save, so re-derive the links here
+            index_links(posts)
+            if self.push:
+                summary['queued'] += sum(1 for post in posts if post.wordpress_post_id and enqueue_publish(post))
+
+
+def job_posts(job: RelinkJob):
+    """The posts a relink job covers"""
+    posts = PublishedPost.objects.filter(user_id=job.user_id)
+    if job.wordpress_site_id:
+        posts = posts.filter(wordpress_site_id=job.wordpress_site_id)
+    return posts
+
+
+def run_pending_jobs(limit: int = 5, workers: int = RELINK_WORKERS) -> Dict[str, Any]:
+    """Run pending relink jobs, oldest first, recording their outcome"""
+    summary = {'jobs': 0, 'posts': 0, 'changed': 0, 'errors': []}
+    for job in RelinkJob.objects.filter(status='pending').order_by('created_at')[:limit]:
+        # Claim with a conditional update, so only one worker runs a job
+        if not RelinkJob.objects.filter(pk=job.pk, status='pending').update(status='running', started_at=timezone.now()):
+            continue
+
+        try:
+            result = Relinker(workers=workers, push=job.push).run(job_posts(job))
+        except Exception as e:
+            RelinkJob.objects.filter(pk=job.pk).update(status='failed', error_message=str(e), finished_at=timezone.now())
+            summary['errors'].append({'job_id': job.pk, 'error': str(e)})
+            continue
+
+        RelinkJob.objects.filter(pk=job.pk).update(
+            status='done', posts=result['posts'], changed=result['changed'], conflicts=result['conflicts'],
+            posts_per_second=result['posts_per_second'], finished_at=timezone.now()
+        )
+        summary['jobs'] += 1
+        summary['posts'] += result['posts']
+        summary['changed'] += result['changed']
+    return summary
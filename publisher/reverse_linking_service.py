@@ -0,0 +1,201 @@
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import django
+from django.db import transaction
+from django.utils import timezone
+
+from .internal_linking_service import InternalLinkingService
+from .link_graph_service import outbound_link_count
+from .link_insertion_service import LinkCandidate, LinkInserter
+from .models import InternalLinkRule, PublishedPost
+from .outbox_service import enqueue_publish
+from .rule_matcher_service import RuleMatcher
+
+
+# Posts whose bodies go to a scanning process at a time
+SCAN_CHUNK_SIZE = 200
+SCAN_WORKERS = min(4, os.cpu_count() or 1)
+
+# Anchor phrases shorter than this match too much to be worth a link
+MIN_ANCHOR_LENGTH = 4
+
+# Splits HTML into text worth scanning (even items) and what cannot take a
+# link: existing links, headings and tags
+_SEGMENT_RE = re.compile(r'(<a\b.*?</a>|<h[1-6]\b.*?</h[1-6]>|<[^>]+>)', re.IGNORECASE | re.DOTALL)
+
+
+def _visible_text(content: str) -> str:
+    """Text of a post that could take a link, segments joined by spaces"""
+    return ' '.join(_SEGMENT_RE.split(content)[::2])
+
+
+def scan_chunk(phrases: List[str], chunk: List[Tuple[int, str]]) -> List[Tuple[int, List[str]]]:
+    """(post id, phrases found as whole words, longest first) for a chunk of bodies
+
+    Phrases come back as written in the post, so a link keeps the text's
+    capitalisation. Module level and free of DB access, so it can run in a
+    worker process.
+    """
+    matcher = RuleMatcher(list(enumerate(phrases)))
+    found = []
+    for post_id, content in chunk:
+        text = _visible_text(content)
+        keywords = []
+        for keyword in sorted(matcher.find_keywords(text), key=len, reverse=True):
+            match = re.search(rf'\b{re.escape(keyword)}\b', text, re.IGNORECASE)
+            if match:
+                keywords.append(match.group(0))
+        if keywords:
+            found.append((post_id, keywords))
+    return found
+
+
+class ReverseLinker:
+    """Add links to a newly published post from the existing posts that mention it
+
+    The new post's anchor phrases are compiled into one matcher and the
+    user's published posts are scanned once, in chunks spread over a pool
+    of worker processes. Each matching post gets at most one link to the
+    new post, and none if it already links there or is at its link limit.
+    """
+
+    def __init__(self, user, workers: int = SCAN_WORKERS, chunk_size: int = SCAN_CHUNK_SIZE):
+        self.user = user
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.linking = InternalLinkingService(user)
+        self.inserter = LinkInserter(min_words_between=self.linking.profile.min_words_between_links, max_links=1)
+
+    def anchor_phrases(self, post: PublishedPost) -> List[str]:
+        """Lowercased phrases that should link to ``post``"""
+        phrases = self.linking._generate_anchor_texts(post, [])
+        phrases += InternalLinkRule.objects.filter(
+            user=self.user, target_post=post, is_active=True
+        ).values_list('keyword', flat=True)
+        return [
+            phrase for phrase in dict.fromkeys(phrase.strip().lower() for phrase in phrases)
+            if len(phrase) >= MIN_ANCHOR_LENGTH
+        ]
+
+    def candidates(self, post: PublishedPost):
+        """Published posts that could gain a link to ``post``"""
+        return PublishedPost.objects.filter(user=self.user, status='published').exclude(
+            id=post.id
+        ).exclude(
+            outbound_links__target=post
+        ).annotate(
+            outbound_count=outbound_link_count()
+        ).filter(outbound_count__lt=self.linking.profile.max_internal_links)
+
+    def find_insertions(self, post: PublishedPost) -> Tuple[int, List[Tuple[int, List[str]]]]:
+        """(posts scanned, [(post id, phrases found)]) for the posts mentioning ``post``"""
+        phrases = self.anchor_phrases(post)
+        if not phrases:
+            return 0, []
+
+        chunks = list(self._chunks(self.candidates(post)))
+        scanned = sum(len(chunk) for chunk in chunks)
+        if self.workers <= 1 or len(chunks) <= 1:
+            results = [scan_chunk(phrases, chunk) for chunk in chunks]
+        else:
+            # Workers import the models, so each sets Django up first
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=django.setup) as executor:
+                results = list(executor.map(scan_chunk, [phrases] * len(chunks), chunks))
+        return scanned, [match for result in results for match in result]
+
+    def link_to(self, post: PublishedPost, push: bool = False) -> Dict[str, Any]:
+        """Insert links to ``post`` into the existing posts that mention it
+
+        With ``push``, each changed post that lives on WordPress is queued
+        for an update through the publish outbox.
+        """
+        summary = {'success': True, 'error': '', 'scanned': 0, 'matched': 0, 'linked': 0, 'queued': 0, 'seconds': 0.0}
+        if not post.wordpress_url:
+            summary.update(success=False, error='Post has no WordPress URL to link to')
+            return summary
+
+        started = time.perf_counter()
+        summary['scanned'], matches = self.find_insertions(post)
+        summary['matched'] = len(matches)
+
+        phrases_by_id = dict(matches)
+        for existing in PublishedPost.objects.filter(id__in=phrases_by_id).select_related('wordpress_site'):
+            with transaction.atomic():
+                if not self._insert(existing, post, phrases_by_id[existing.id]):
+                    continue
+                summary['linked'] += 1
+                if push and existing.wordpress_post_id and enqueue_publish(existing):
+                    summary['queued'] += 1
+
+        summary['seconds'] = time.perf_counter() - started
+        return summary
+
+    def _insert(self, existing: PublishedPost, post: PublishedPost, phrases: List[str]) -> bool:
+        content, placed = self.inserter.insert(
+            existing.html_content or existing.edited_content or existing.content,
+            [LinkCandidate(post.wordpress_url, post.title, phrases)]
+        )
+        if not placed:
+            return False
+        existing.html_content = content
+        # Saving the content re-derives the post's links
+        existing.save(update_fields=['html_content'])
+        return True
+
+    def _chunks(self, posts) -> Iterator[List[Tuple[int, str]]]:
+        chunk = []
+        rows = posts.order_by('id').values_list('id', 'html_content', 'edited_content', 'content')
+        for post_id, html_content, edited_content, content in rows.iterator(chunk_size=self.chunk_size):
+            chunk.append((post_id, html_content or edited_content or content))
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def claim_for_reverse_linking(pk) -> bool:
+    """Mark a post as reverse-linked with a conditional UPDATE; False if already taken"""
+    return PublishedPost.objects.filter(pk=pk, reverse_linked_at__isnull=True).update(
+        reverse_linked_at=timezone.now()
+    ) == 1
+
+
+def reverse_link_new_posts(limit: int = 20, push: bool = False,
+                           workers: int = SCAN_WORKERS) -> Dict[str, Any]:
+    """Reverse-link published posts that have not been yet, oldest first"""
+    summary = {'posts': 0, 'linked': 0, 'queued': 0, 'errors': []}
+    # Posts of users with auto-linking off stay unclaimed, so they are
+    # linked once it is turned back on
+    pending = PublishedPost.objects.filter(
+        status='published', reverse_linked_at__isnull=True
+    ).exclude(wordpress_url='').exclude(
+        user__linkingprofile__auto_link_enabled=False
+    ).select_related('user').order_by('published_at', 'id')[:limit]
+
+    linkers: Dict[int, Optional[ReverseLinker]] = {}
+    for post in pending:
+        if post.user_id not in linkers:
+            linker = ReverseLinker(post.user, workers=workers)
+            linkers[post.user_id] = linker if linker.linking.profile.auto_link_enabled else None
+        linker = linkers[post.user_id]
+        if linker is None or not claim_for_reverse_linking(post.pk):
+            continue
+
+        try:
+            result = linker.link_to(post, push=push)
+        except Exception as e:
+            # Release the claim so the next run tries the post again
+            PublishedPost.objects.filter(pk=post.pk).update(reverse_linked_at=None)
+            summary['errors'].append({'title': post.title, 'error': str(e)})
+            continue
+        summary['posts'] += 1
+        summary['linked'] += result['linked']
+        summary['queued'] += result['queued']
+        if not result['success']:
+            summary['errors'].append({'title': post.title, 'error': result['error']})
+    return summary
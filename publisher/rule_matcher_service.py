@@ -0,0 +1,116 @@
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Set
+
+from django.db.models import F
+
+from .linking_index_service import get_linking_index
+from .models import InternalLinkRule, LinkingProfile
+
+
+# Compiled matchers by user id, each tagged with the rules version it was built from
+_matchers: Dict[int, tuple] = {}
+_matchers_lock = threading.Lock()
+
+
+class RuleMatcher:
+    """Find every active rule keyword in a document in one pass
+
+    The keywords are folded into a trie and compiled to a single regex,
+    so matching costs one scan of the text, however many rules there are.
+    At each position the regex takes the longest keyword; shorter keywords
+    that are prefixes of it are added from a precomputed table, so
+    overlapping keywords are all found. Matching is case-insensitive and
+    on substrings, like the per-rule check it replaces.
+    """
+
+    def __init__(self, rules: List[tuple]):
+        # rules: (rule id, keyword) pairs
+        self.rule_ids: Dict[str, List[int]] = defaultdict(list)
+        for rule_id, keyword in rules:
+            keyword = keyword.lower()
+            if keyword:
+                self.rule_ids[keyword].append(rule_id)
+
+        self.prefixes = {
+            keyword: [keyword[:i] for i in range(1, len(keyword)) if keyword[:i] in self.rule_ids]
+            for keyword in self.rule_ids
+        }
+
+        trie: dict = {}
+        for keyword in self.rule_ids:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = True
+        self.pattern = re.compile(f'(?=({self._trie_pattern(trie)}))') if trie else None
+
+    def find_keywords(self, content: str) -> Set[str]:
+        """Lowercased rule keywords that occur in ``content``"""
+        if self.pattern is None:
+            return set()
+        found = set()
+        for match in self.pattern.finditer(content.lower()):
+            keyword = match.group(1)
+            if keyword not in found:
+                found.add(keyword)
+                found.update(self.prefixes[keyword])
+        return found
+
+    def find_rule_ids(self, content: str) -> Set[int]:
+        """Ids of the rules whose keyword occurs in ``content``"""
+        return {
+            rule_id for keyword in self.find_keywords(content) for rule_id in self.rule_ids[keyword]
+        }
+
+    def _trie_pattern(self, node: dict) -> str:
+        alternatives = [
+            re.escape(char) + self._trie_pattern(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not alternatives:
+            return ''
+        ends_here = '' in node
+        if len(alternatives) == 1 and not ends_here:
+            return alternatives[0]
+        group = '(?:' + '|'.join(alternatives) + ')'
+        # Greedy: the longer keyword wins, its prefixes are added afterwards
+        return group + '?' if ends_here else group
+
+
+def rules_version(user_id: int) -> int:
+    """The current version of a user's rules, read from the DB so every process sees it"""
+    return LinkingProfile.objects.filter(user_id=user_id).values_list('rules_version', flat=True).first() or 0
+
+
+def get_rule_matcher(user_id: int) -> RuleMatcher:
+    """The compiled matcher for a user's active rules, rebuilt after any rule change"""
+    version = rules_version(user_id)
+
+    with _matchers_lock:
+        cached = _matchers.get(user_id)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    # Compiled patterns cannot be shared between processes, but the rule
+    # table can: the index's copy is used while no rule has changed since
+    index = get_linking_index()
+    if index is not None and index.rule_versions.get(str(user_id)) == version:
+        rules = index.rules(user_id)
+    else:
+        rules = list(InternalLinkRule.objects.filter(user_id=user_id, is_active=True).values_list('id', 'keyword'))
+    matcher = RuleMatcher(rules)
+    with _matchers_lock:
+        _matchers[user_id] = (version, matcher)
+    return matcher
+
+
+def invalidate_rule_matcher(user_id: int) -> int:
+    """Mark a user's compiled matcher stale, in every process; returns the new version"""
+    if not LinkingProfile.objects.filter(user_id=user_id).update(rules_version=F('rules_version') + 1):
+        # Without a profile the version read as 0, so start past it
+        profile, created = LinkingProfile.objects.get_or_create(user_id=user_id, defaults={'rules_version': 1})
+        if not created:
+            LinkingProfile.objects.filter(user_id=user_id).update(rules_version=F('rules_version') + 1)
+    return rules_version(user_id)
@@ -0,0 +1,59 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .keyword_index_service import INDEXED_FIELDS, index_post
+from .link_graph_service import LINK_FIELDS, sync_post_links
+from .linking_index_service import mark_changed
+from .models import InternalLinkRule, PublishedPost, RelatedPost
+from .related_posts_service import REFRESH_ON_STATUSES, queue_neighbourhood_refresh
+from .rule_matcher_service import invalidate_rule_matcher
+
+
+@receiver(post_save, sender=PublishedPost)
+def update_post_indexes(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Keep a saved post's keyword postings current and queue its neighbourhood refresh"""
+    if raw:
+        return
+    fields = set(update_fields) if update_fields is not None else None
+    terms_changed = (fields is None or bool(fields & set(INDEXED_FIELDS))) and index_post(instance)
+    # Writing a settled status can move the post in or out of other lists;
+    # the transient states of a publish in flight are ignored
+    status_written = fields is not None and 'status' in fields and instance.status in REFRESH_ON_STATUSES
+    if terms_changed or status_written:
+        queue_neighbourhood_refresh([instance.pk])
+
+
+@receiver(post_save, sender=PublishedPost)
+def update_post_links(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Re-derive a saved post's outbound links when its content was written"""
+    if raw:
+        return
+    if update_fields is None or set(update_fields) & set(LINK_FIELDS):
+        sync_post_links(instance)
+
+
+@receiver(pre_delete, sender=PublishedPost)
+def remember_listing_posts(sender, instance, **kwargs):
+    """Note which lists hold a post about to be deleted"""
+    instance._listed_by = list(RelatedPost.objects.filter(related=instance).values_list('post_id', flat=True))
+
+
+@receiver(pre_delete, sender=PublishedPost)
+def mark_deleted_post_changed(sender, instance, **kwargs):
+    """Have readers of the linking index drop a deleted post and its links"""
+    mark_changed([instance.pk, *instance.outbound_links.values_list('target_id', flat=True)])
+
+
+@receiver(post_delete, sender=PublishedPost)
+def refill_listing_posts(sender, instance, **kwargs):
+    """Queue a refill of the lists a deleted post dropped out of"""
+    listed_by = getattr(instance, '_listed_by', None)
+    if listed_by:
+        queue_neighbourhood_refresh(listed_by)
+
+
+@receiver(post_save, sender=InternalLinkRule)
+@receiver(post_delete, sender=InternalLinkRule)
+def invalidate_link_rules(sender, instance, **kwargs):
+    """Have the user's compiled rule matcher rebuilt on next use"""
+    invalidate_rule_matcher(instance.user_id)
@@ -0,0 +1,184 @@
+import html
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .internal_linking_service import InternalLinkingService
+from .keyword_index_service import index_posts
+from .link_graph_service import index_links
+from .related_posts_service import refresh_neighbourhood
+from .models import PublishedPost, WordPressSite
+from .wordpress_service import WordPressService
+
+
+# Re-read a little before the high-water mark: WordPress compares
+# modified_after exclusively and to the second, and upserts are idempotent
+SYNC_OVERLAP = timedelta(minutes=5)
+
+# Rows per query/bulk write when upserting
+UPSERT_CHUNK_SIZE = 500
+
+
+class SyncService:
+    """Pull posts from WordPress sites into the local corpus
+
+    Each sync asks only for posts modified since the site's high-water
+    mark. The first page tells us how many pages there are; the rest are
+    fetched concurrently. All DB writes happen on the calling thread.
+    """
+
+    def __init__(self, max_workers: int = 4, per_page: int = 100):
+        self.max_workers = max_workers
+        self.per_page = per_page
+
+    def get_wordpress_service(self, site: WordPressSite) -> WordPressService:
+        """Build a WordPress client for a site"""
+        return WordPressService(
+            site_url=site.url,
+            username=site.username,
+            app_password=site.app_password
+        )
+
+    def sync_site(self, site: WordPressSite, full: bool = False) -> Dict[str, Any]:
+        """Pull posts changed since the last sync and upsert them"""
+        summary = {'success': True, 'fetched': 0, 'created': 0, 'updated': 0, 'pages': 0, 'error': ''}
+        wp = self.get_wordpress_service(site)
+        modified_after = None if full else self._modified_after(site.sync_high_water_mark)
+
+        first = wp.get_posts(1, self.per_page, modified_after)
+        if not first['success']:
+            return {**summary, 'success': False, 'error': first['error']}
+
+        results = [first]
+        if first['total_pages'] > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_workers, first['total_pages'] - 1),
+                thread_name_prefix='wp-sync'
+            ) as executor:
+                results += executor.map(
+                    lambda page: wp.get_posts(page, self.per_page, modified_after),
+                    range(2, first['total_pages'] + 1)
+                )
+
+        # Pages can overlap if posts change mid-sync; keep one copy of each
+        remote = {}
+        for result in results:
+            if not result['success']:
+                summary['success'] = False
+                summary['error'] = result['error']
+                continue
+            summary['pages'] += 1
+            for post in result['posts']:
+                remote[post['id']] = post
+        summary['fetched'] = len(remote)
+
+        summary['created'], summary['updated'] = self.upsert_posts(site, list(remote.values()))
+
+        # Advance the mark only if nothing was missed: a failed page, or a
+        # post edited mid-sync shifting others between pages, shows up as
+        # fewer posts than the first page announced.
+        if summary['success'] and len(remote) >= first['total']:
+            if remote:
+                site.sync_high_water_mark = max(post['modified'] for post in remote.values())
+            site.last_synced_at = timezone.now()
+            site.save(update_fields=['sync_high_water_mark', 'last_synced_at', 'updated_at'])
+        elif summary['success']:
+            summary['error'] = 'Posts changed during sync; the next sync will pick them up'
+
+        return summary
+
+    def upsert_posts(self, site: WordPressSite, remote_posts: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Create or update local posts from WordPress post objects, in bulk"""
+        linking = InternalLinkingService(site.user)
+        created = updated = 0
+        changed_ids = []
+
+        for start in range(0, len(remote_posts), UPSERT_CHUNK_SIZE):
+            chunk = remote_posts[start:start + UPSERT_CHUNK_SIZE]
+            existing = {
+                post.wordpress_post_id: post
+                for post in PublishedPost.objects.filter(
+                    wordpress_site=site,
+                    wordpress_post_id__in=[str(remote['id']) for remote in chunk]
+                )
+            }
+
+            to_create = []
+            to_update = []
+            for remote in chunk:
+                fields = self._post_fields(remote)
+                post = existing.get(str(remote['id']))
+                if post is None:
+                    to_create.append(PublishedPost(
+                        user=site.user,
+                        wordpress_site=site,
+                        wordpress_post_id=str(remote['id']),
+                        topic=fields['title'][:200],
+                        keywords=self._keywords(linking, fields),
+                        status='published',
+                        published_at=self._parse_gmt(remote.get('date_gmt')),
+                        # Published elsewhere, not new here: no reverse linking
+                        reverse_linked_at=timezone.now(),
+                        **fields
+                    ))
+                    continue
+
+                if post.published_field_hashes:
+                    # Published from here: our copy of the content stays authoritative
+                    fields = {'title': fields['title'], 'wordpress_url': fields['wordpress_url']}
+                if any(getattr(post, name) != value for name, value in fields.items()):
+                    for name, value in fields.items():
+                        setattr(post, name, value)
+                    if 'content' in fields:
+                        post.keywords = self._keywords(linking, fields)
+                    to_update.append(post)
+
+            with transaction.atomic():
+                PublishedPost.objects.bulk_create(to_create)
+                PublishedPost.objects.bulk_update(
+                    to_update, ['title', 'wordpress_url', 'content', 'html_content', 'keywords']
+                )
+                # Bulk writes skip post_save, so index these here
+                index_posts(to_create + to_update)
+                index_links(to_create + to_update)
+            created += len(to_create)
+            updated += len(to_update)
+            changed_ids += [post.pk for post in to_create + to_update]
+
+        if changed_ids:
+            refresh_neighbourhood(changed_ids)
+        return created, updated
+
+    def _post_fields(self, remote: Dict[str, Any]) -> Dict[str, Any]:
+        """Local field values for a WordPress post object"""
+        title = html.unescape(remote.get('title', {}).get('rendered', ''))[:255]
+        content = remote.get('content', {}).get('rendered', '')
+        return {
+            'title': title,
+            'wordpress_url': remote.get('link', ''),
+            'content': content,
+            'html_content': content,
+        }
+
+    def _keywords(self, linking: InternalLinkingService, fields: Dict[str, Any]) -> str:
+        return ','.join(linking._extract_keywords(fields['title'], fields['content'])[:10])
+
+    def _modified_after(self, high_water_mark: str) -> Optional[str]:
+        if not high_water_mark:
+            return None
+        try:
+            mark = datetime.fromisoformat(high_water_mark)
+        except ValueError:
+            return None
+        return (mark - SYNC_OVERLAP).isoformat()
+
+    def _parse_gmt(self, value: Optional[str]) -> Optional[datetime]:
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value).replace(tzinfo=dt_timezone.utc)
+        except ValueError:
+            return None
@@ -1,3 +1,806 @@
-from django.test import TestCase
+import asyncio
+import json
+import random
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .async_wordpress_service import AsyncWordPressService, close_clients
+from .calendar_service import PublishingCalendar
+from .link_graph_service import index_links, record_links, with_link_counts
+from .link_insertion_service import LinkCandidate, LinkInserter, strip_internal_links
+from .models import (
+    LinkingProfile, PostLink, PublishedPost, PublishIntent, RelatedPost, RelatedPostsRefresh, SiteUpdateStats,
+    WebhookEvent, WordPressSite
+)
+from .outbox_service import MAX_ATTEMPTS, OutboxWorker, enqueue_publish
+from .publishing_service import PublishingService
+from .related_posts_service import refresh_queued
+from .reverse_linking_service import ReverseLinker, reverse_link_new_posts
+from .rule_matcher_service import RuleMatcher
+from .webhook_service import MAX_TIMESTAMP_SKEW, sign_payload, verify_signature
+from .wordpress_service import WordPressService
+from .wordpress_stub import StubConfig, StubWordPress, WordPressStubServer
+
+
+class StripInternalLinksTests(SimpleTestCase):
+    def test_restores_text_from_data_anchor(self):
+        content = (
+            '<p>Read <a href="/roses/" title="Roses" class="internal-link" '
+            'data-anchor="rose pruning">check out rose pruning</a> today.</p>'
+        )
+        self.assertEqual(strip_internal_links(content), '<p>Read rose pruning today.</p>')
+
+    def test_strips_legacy_anchor_prefixes(self):
+        for prefix in ('learn more about ', 'see our guide on ', 'check out '):
+            with self.subTest(prefix=prefix):
+                content = f'<p>Read <a href="/roses/" title="Roses" class="internal-link">{prefix}rose pruning</a>.</p>'
+                self.assertEqual(strip_internal_links(content), '<p>Read rose pruning.</p>')
+
+    def test_keeps_plain_anchor_and_other_links(self):
+        content = (
+            '<p><a href="/roses/" class="internal-link">learn more</a> and '
+            '<a href="https://example.com/">check out this shop</a></p>'
+        )
+        self.assertEqual(
+            strip_internal_links(content),
+            '<p>learn more and <a href="https://example.com/">check out this shop</a></p>'
+        )
+
+    def test_round_trip_with_varied_anchors(self):
+        content = '<p>Rose pruning is easy. Tulip bulbs need cold.</p>'
+        candidates = [
+            LinkCandidate('/roses/', 'Roses', ['rose pruning']),
+            LinkCandidate('/tulips/', 'Tulips', ['tulip bulbs']),
+        ]
+        for seed in range(10):
+            linked, _ = LinkInserter(vary_anchor=True, rng=random.Random(seed)).insert(content, candidates)
+            self.assertEqual(strip_internal_links(linked), content)
+
+
+class RuleMatcherTests(SimpleTestCase):
+    """RuleMatcher must find the same rules as checking each keyword on its own"""
+
+    def per_rule_check(self, rules, content):
+        content_lower = content.lower()
+        return {rule_id for rule_id, keyword in rules if keyword and keyword.lower() in content_lower}
+
+    def assertMatchesPerRuleCheck(self, rules, content):
+        self.assertEqual(RuleMatcher(rules).find_rule_ids(content), self.per_rule_check(rules, content))
+
+    def test_keywords_that_are_prefixes_of_each_other(self):
+        rules = list(enumerate(['rose', 'rose pruning', 'rose pruning tips', 'ros', 'pruning']))
+        for content in (
+            'Rose pruning tips for spring',
+            'Rose pruning, done early',
+            'A rose by any other name',
+            'Ros',
+            'rose prun',
+        ):
+            with self.subTest(content=content):
+                self.assertMatchesPerRuleCheck(rules, content)
+
+    def test_overlapping_keywords(self):
+        rules = list(enumerate(['rose bed', 'bed edging', 'edging', 'sebed', 'rose', 'aa', 'aaa']))
+        for content in (
+            'Cut the rose bed edging neatly',
+            'rosebed edging',
+            'A rose bed',
+            'aaaa',
+            'a',
+        ):
+            with self.subTest(content=content):
+                self.assertMatchesPerRuleCheck(rules, content)
+
+    def test_duplicate_keywords_and_case(self):
+        rules = [(1, 'Rose'), (2, 'rose'), (3, 'ROSE PRUNING'), (4, '')]
+        self.assertEqual(RuleMatcher(rules).find_rule_ids('rose Pruning'), {1, 2, 3})
+        self.assertEqual(RuleMatcher([]).find_rule_ids('rose'), set())
+
+    def test_regex_characters_are_literal(self):
+        rules = list(enumerate(['c++', 'c+', 'a.b', '(x)', 'a*']))
+        for content in ('c++ and c+', 'a.b (x)', 'aab x', 'a*'):
+            with self.subTest(content=content):
+                self.assertMatchesPerRuleCheck(rules, content)
+
+    def test_random_keywords_on_a_small_alphabet(self):
+        # A tiny alphabet makes prefixes and overlaps the common case
+        rng = random.Random(42)
+
+        def word(length):
+            return ''.join(rng.choice('ab ') for _ in range(length))
+
+        for _ in range(300):
+            rules = [(i, word(rng.randint(1, 5))) for i in range(rng.randint(1, 12))]
+            content = word(rng.randint(0, 30))
+            with self.subTest(rules=rules, content=content):
+                self.assertMatchesPerRuleCheck(rules, content)
+
+
+class ScriptedPublishingService(PublishingService):
+    """Answers bulk_publish with queued results instead of talking to WordPress"""
+
+    def __init__(self, results=None, error=None):
+        super().__init__()
+        self.results = list(results or [])
+        self.error = error
+        self.calls = 0
+
+    def bulk_publish(self, posts, use_batch=True, on_result=None):
+        self.calls += 1
+        for post in posts:
+            PublishedPost.claim_for_publishing(post.pk)
+            if self.error:
+                raise self.error
+            on_result(post, self.results.pop(0))
+        return {}
+
+
+def failure(status_code):
+    return {'success': False, 'error': f'HTTP {status_code}', 'status_code': status_code}
+
+
+def success(post_id=7):
+    return {'success': True, 'post_id': post_id, 'url': f'https://example.com/?p={post_id}'}
+
+
+class OutboxWorkerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='writer')
+        self.site = WordPressSite.objects.create(
+            user=self.user, name='Site', url='https://example.com', username='u', app_password='p'
+        )
+        self.post = PublishedPost.objects.create(
+            user=self.user, wordpress_site=self.site, title='Post', content='<p>Body</p>', status='queued'
+        )
+        self.intent = enqueue_publish(self.post)
+
+    def make_due(self):
+        PublishIntent.objects.filter(pk=self.intent.pk).update(next_attempt_at=timezone.now())
+
+    def test_failures_retry_with_backoff_then_go_dead(self):
+        worker = OutboxWorker(ScriptedPublishingService([failure(400)] * MAX_ATTEMPTS))
+
+        summary = worker.drain()
+        self.intent.refresh_from_db()
+        self.post.refresh_from_db()
+        self.assertEqual(summary['retrying'], 1)
+        self.assertEqual((self.intent.status, self.intent.attempts), ('pending', 1))
+        self.assertGreater(self.intent.next_attempt_at, timezone.now())
+        self.assertEqual(self.post.status, 'queued')
+
+        # Not due yet: nothing is sent
+        self.assertEqual(worker.drain()['retrying'], 0)
+
+        for _ in range(MAX_ATTEMPTS - 1):
+            self.make_due()
+            summary = worker.drain()
+        self.intent.refresh_from_db()
+        self.post.refresh_from_db()
+        self.assertEqual(summary['dead'], 1)
+        self.assertEqual((self.intent.status, self.intent.attempts), ('dead', MAX_ATTEMPTS))
+        self.assertEqual(self.post.status, 'failed')
+        self.assertEqual(self.intent.last_error, 'HTTP 400')
+
+    def test_breaker_opens_then_half_open_probe_closes_it(self):
+        service = ScriptedPublishingService([failure(503), failure(503), success()])
+        worker = OutboxWorker(service, failure_threshold=2, reset_timeout=60)
+        breaker = worker.breaker_for(self.site.pk)
+
+        worker.drain()
+        self.make_due()
+        worker.drain()
+        self.assertEqual(breaker.state, 'open')
+
+        # Open: the intent is pushed back without spending an attempt
+        self.make_due()
+        summary = worker.drain()
+        self.intent.refresh_from_db()
+        self.assertEqual(summary['circuit_open'], 1)
+        self.assertEqual(service.calls, 2)
+        self.assertEqual((self.intent.status, self.intent.attempts), ('pending', 2))
+        self.assertGreater(self.intent.next_attempt_at, timezone.now())
+
+        breaker.opened_at -= 60
+        self.assertEqual(breaker.state, 'half-open')
+        self.make_due()
+        summary = worker.drain()
+        self.intent.refresh_from_db()
+        self.post.refresh_from_db()
+        self.assertEqual(summary['published'], 1)
+        self.assertEqual(breaker.state, 'closed')
+        self.assertEqual(self.intent.status, 'done')
+        self.assertEqual((self.post.status, self.post.wordpress_post_id), ('published', '7'))
+
+    def test_failed_half_open_probe_reopens_breaker(self):
+        worker = OutboxWorker(ScriptedPublishingService([failure(503)] * 3), failure_threshold=2, reset_timeout=60)
+        breaker = worker.breaker_for(self.site.pk)
+        worker.drain()
+        self.make_due()
+        worker.drain()
+
+        breaker.opened_at -= 60
+        self.make_due()
+        worker.drain()
+        self.assertEqual(breaker.state, 'open')
+
+    def test_client_errors_do_not_open_breaker(self):
+        worker = OutboxWorker(ScriptedPublishingService([failure(400)] * 3), failure_threshold=2)
+        for _ in range(3):
+            self.make_due()
+            worker.drain()
+        self.assertEqual(worker.breaker_for(self.site.pk).state, 'closed')
+
+    def test_crash_in_bulk_publish_releases_claimed_intents(self):
+        worker = OutboxWorker(ScriptedPublishingService(error=RuntimeError('boom')))
+
+        summary = worker.drain()
+        self.intent.refresh_from_db()
+        self.post.refresh_from_db()
+        self.assertEqual(summary['retrying'], 1)
+        self.assertEqual((self.intent.status, self.intent.attempts, self.intent.last_error), ('pending', 1, 'boom'))
+        self.assertEqual((self.post.status, self.post.publish_started_at), ('queued', None))
+
+    def test_post_without_site_resolves_its_intent(self):
+        PublishedPost.objects.filter(pk=self.post.pk).update(wordpress_site=None)
+
+        summary = OutboxWorker().drain()
+        self.intent.refresh_from_db()
+        self.assertEqual(summary['dead'], 1)
+        self.assertEqual(self.intent.status, 'dead')
+
+
+class PublishingCalendarTests(TestCase):
+    def test_scheduling_a_queued_post_cancels_its_outbox_intent(self):
+        user = User.objects.create(username='writer')
+        site = WordPressSite.objects.create(
+            user=user, name='Site', url='https://example.com', username='u', app_password='p'
+        )
+        post = PublishedPost.objects.create(user=user, wordpress_site=site, title='Post', content='<p>Body</p>')
+        PublishedPost.mark_queued(post.pk)
+        enqueue_publish(post)
+        post.refresh_from_db()
+
+        summary = PublishingCalendar().plan([post])
+        post.refresh_from_db()
+        self.assertEqual(summary['scheduled'], 1)
+        self.assertEqual(post.status, 'scheduled')
+        self.assertFalse(PublishIntent.objects.filter(post=post, status='pending').exists())
+
+        # The outbox has nothing left to publish ahead of the slot
+        service = ScriptedPublishingService([success()])
+        OutboxWorker(service).drain()
+        post.refresh_from_db()
+        self.assertEqual(service.calls, 0)
+        self.assertEqual((post.status, post.wordpress_post_id), ('scheduled', ''))
+
+
+class PublishClaimTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='writer')
+        self.site = WordPressSite.objects.create(
+            user=self.user, name='Site', url='https://example.com', username='u', app_password='p'
+        )
+        self.post = PublishedPost.objects.create(
+            user=self.user, wordpress_site=self.site, title='Post', content='<p>Body</p>'
+        )
+
+    def test_second_claim_is_refused(self):
+        self.assertTrue(PublishedPost.claim_for_publishing(self.post.pk))
+        self.assertFalse(PublishedPost.claim_for_publishing(self.post.pk))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.status, 'publishing')
+
+    def test_stale_claim_can_be_taken_again(self):
+        self.assertTrue(PublishedPost.claim_for_publishing(self.post.pk))
+        PublishedPost.objects.filter(pk=self.post.pk).update(
+            publish_started_at=timezone.now() - PublishedPost.PUBLISH_CLAIM_TIMEOUT - timedelta(seconds=1)
+        )
+        self.assertTrue(PublishedPost.claim_for_publishing(self.post.pk))
+        self.assertFalse(PublishedPost.claim_for_publishing(self.post.pk))
+
+    def test_mark_queued_refuses_posts_in_flight_or_live(self):
+        for status in ('publishing', 'published'):
+            with self.subTest(status=status):
+                PublishedPost.objects.filter(pk=self.post.pk).update(status=status)
+                self.assertFalse(PublishedPost.mark_queued(self.post.pk))
+                self.post.refresh_from_db()
+                self.assertEqual(self.post.status, status)
+
+        PublishedPost.objects.filter(pk=self.post.pk).update(status='failed')
+        self.assertTrue(PublishedPost.mark_queued(self.post.pk))
+
+    def test_bulk_publish_skips_posts_deleted_after_their_claim(self):
+        claim = PublishedPost.claim_for_publishing
+
+        def claim_then_delete(pk):
+            claimed = claim(pk)
+            PublishedPost.objects.filter(pk=pk).delete()
+            return claimed
+
+        with mock.patch.object(PublishedPost, 'claim_for_publishing', side_effect=claim_then_delete):
+            summary = PublishingService().bulk_publish([self.post])
+        self.assertEqual((summary['published'], summary['failed'], summary['sites']), (0, 0, 0))
+
+
+class ReverseLinkNewPostsTests(TestCase):
+    LINKED = {'success': True, 'error': '', 'scanned': 0, 'matched': 0, 'linked': 0, 'queued': 0, 'seconds': 0.0}
+
+    def setUp(self):
+        self.user = User.objects.create(username='writer')
+        self.profile = LinkingProfile.objects.create(user=self.user)
+        self.post = PublishedPost.objects.create(
+            user=self.user, title='Rose pruning', content='<p>Body</p>', status='published',
+            wordpress_url='https://example.com/rose-pruning/'
+        )
+
+    def reverse_linked_at(self):
+        return PublishedPost.objects.get(pk=self.post.pk).reverse_linked_at
+
+    def test_posts_wait_while_auto_linking_is_off(self):
+        self.profile.auto_link_enabled = False
+        self.profile.save()
+        with mock.patch.object(ReverseLinker, 'link_to', return_value=self.LINKED) as link_to:
+            reverse_link_new_posts(workers=1)
+        link_to.assert_not_called()
+        self.assertIsNone(self.reverse_linked_at())
+
+        self.profile.auto_link_enabled = True
+        self.profile.save()
+        with mock.patch.object(ReverseLinker, 'link_to', return_value=self.LINKED) as link_to:
+            summary = reverse_link_new_posts(workers=1)
+        link_to.assert_called_once()
+        self.assertEqual(summary['posts'], 1)
+        self.assertIsNotNone(self.reverse_linked_at())
+
+    def test_failed_link_to_releases_the_claim(self):
+        with mock.patch.object(ReverseLinker, 'link_to', side_effect=RuntimeError('scan failed')):
+            summary = reverse_link_new_posts(workers=1)
+        self.assertEqual(summary['errors'], [{'title': 'Rose pruning', 'error': 'scan failed'}])
+        self.assertIsNone(self.reverse_linked_at())
+
+
+class RelatedPostsQueueTests(TestCase):
+    def setUp(self):
+        user = User.objects.create(username='writer')
+        self.guide, self.calendar, self.shears = [
+            PublishedPost.objects.create(user=user, title=title, topic='roses', keywords='rose,pruning', status='published')
+            for title in ('Rose pruning guide', 'Rose pruning calendar', 'Rose pruning shears')
+        ]
+        refresh_queued()
+
+    def test_saves_queue_refreshes_for_the_worker(self):
+        self.assertFalse(RelatedPostsRefresh.objects.exists())
+        self.assertEqual(
+            set(RelatedPost.objects.filter(post=self.guide).values_list('related_id', flat=True)),
+            {self.calendar.pk, self.shears.pk}
+        )
+
+    def test_delete_queues_refill_instead_of_ranking_inline(self):
+        self.calendar.delete()
+        self.assertTrue(RelatedPostsRefresh.objects.filter(post_id=self.guide.pk).exists())
+
+        refresh_queued()
+        self.assertEqual(
+            list(RelatedPost.objects.filter(post=self.guide).values_list('related_id', flat=True)),
+            [self.shears.pk]
+        )
+        self.assertFalse(RelatedPostsRefresh.objects.exists())
+
+
+class StubSiteTestCase(TestCase):
+    """Runs a WordPressStubServer and gives the test a site pointing at it"""
+    stub_config = None
+
+    def setUp(self):
+        self.server = WordPressStubServer(self.stub_config or StubConfig()).start()
+        self.addCleanup(self.server.stop)
+        self.stub = self.server.stub
+        self.user = User.objects.create(username='writer')
+        self.site = WordPressSite.objects.create(
+            user=self.user, name='Stub', url=self.server.url, username='stub', app_password='stub'
+        )
+
+    def make_posts(self, count):
+        return [
+            PublishedPost.objects.create(
+                user=self.user, wordpress_site=self.site, title=f'Post {i}', content=f'<p>Body {i}</p>'
+            )
+            for i in range(count)
+        ]
+
+
+class BatchPublishTests(StubSiteTestCase):
+    def test_new_posts_go_out_in_one_batch(self):
+        posts = self.make_posts(3)
+        summary = PublishingService(base_delay=0).bulk_publish(posts)
+
+        self.assertEqual((summary['published'], summary['failed']), (3, 0))
+        self.assertEqual(len(self.stub.posts), 3)
+        # One OPTIONS for the limit and one batch POST
+        self.assertEqual(self.stub.requests, 2)
+        self.assertEqual(
+            sorted(PublishedPost.objects.values_list('status', flat=True)), ['published'] * 3
+        )
+
+    def test_incomplete_batch_reply_fails_only_the_missing_items(self):
+        batch = StubWordPress._batch
+
+        def drop_last_response(stub, data):
+            status, headers, body = batch(stub, data)
+            return status, headers, {'responses': body['responses'][:-1]}
+
+        posts = self.make_posts(3)
+        with mock.patch.object(StubWordPress, '_batch', drop_last_response):
+            summary = PublishingService(base_delay=0, max_retries=0).bulk_publish(posts)
+
+        self.assertEqual((summary['published'], summary['failed']), (2, 1))
+        posts[2].refresh_from_db()
+        self.assertEqual(posts[2].status, 'failed')
+        self.assertIn('No response for this item', posts[2].error_message)
+
+
+class BatchNotAllowedTests(StubSiteTestCase):
+    stub_config = StubConfig(batch_refused_routes=('/wp/v2/posts',))
+
+    def test_refused_items_fall_back_to_single_requests(self):
+        posts = self.make_posts(3)
+        summary = PublishingService(base_delay=0).bulk_publish(posts)
+
+        self.assertEqual((summary['published'], summary['failed']), (3, 0))
+        self.assertEqual(len(self.stub.posts), 3)
+        # OPTIONS, the refused batch, then one create per post
+        self.assertEqual(self.stub.requests, 5)
+
+
+class StubIntegrationTests(StubSiteTestCase):
+    def wordpress(self):
+        return WordPressService(self.server.url, 'stub', 'stub')
+
+    def test_create_post(self):
+        result = self.wordpress().create_post(title='Hello', content='<p>World</p>', status='publish')
+
+        self.assertTrue(result['success'])
+        stored = self.stub.posts[result['post_id']]
+        self.assertEqual(stored['title']['raw'], 'Hello')
+        self.assertIn('wp:paragraph', stored['content']['raw'])
+        self.assertEqual(result['url'], stored['link'])
+
+    def test_republishing_sends_only_changed_fields(self):
+        post = self.make_posts(1)[0]
+        service = PublishingService(base_delay=0)
+        self.assertTrue(service.publish_post(post)['success'])
+
+        post.refresh_from_db()
+        requests_before = self.stub.requests
+        result = service.publish_post(post)
+        self.assertTrue(result['skipped'])
+        self.assertEqual(self.stub.requests, requests_before)
+
+        post.refresh_from_db()
+        post.title = 'Renamed'
+        post.save()
+        result = service.publish_post(post)
+        self.assertEqual(result['sent_fields'], ['title'])
+        self.assertEqual(self.stub.requests, requests_before + 1)
+        self.assertEqual(self.stub.posts[int(post.wordpress_post_id)]['title']['raw'], 'Renamed')
+
+    def test_pagination(self):
+        wp = self.wordpress()
+        for i in range(25):
+            wp.create_post(title=f'Post {i}', content='<p>Body</p>', status='publish')
+
+        pages = [wp.get_posts(page=page, per_page=10) for page in (1, 2, 3)]
+        self.assertEqual([(page['total'], page['total_pages']) for page in pages], [(25, 3)] * 3)
+        self.assertEqual([len(page['posts']) for page in pages], [10, 10, 5])
+        ids = [post['id'] for page in pages for post in page['posts']]
+        self.assertEqual(len(set(ids)), 25)
+
+        past_end = wp.get_posts(page=4, per_page=10)
+        self.assertFalse(past_end['success'])
+        self.assertEqual(past_end['status_code'], 400)
+
+
+class StubRateLimitTests(StubSiteTestCase):
+    stub_config = StubConfig(rate_limit=1, rate_window=1.0)
+
+    def test_429_backs_off_for_retry_after_then_succeeds(self):
+        first, second = self.make_posts(2)
+        service = PublishingService(base_delay=0)
+        self.assertTrue(service.publish_post(first)['success'])
+
+        started = time.monotonic()
+        result = service.publish_post(second)
+        self.assertTrue(result['success'])
+        self.assertGreaterEqual(time.monotonic() - started, 0.9)
+        self.assertEqual(self.stub.status_counts, {201: 2, 429: 1})
+
+
+class StubErrorInjectionTests(StubSiteTestCase):
+    stub_config = StubConfig(error_rate=1.0, error_status=500)
+
+    def test_server_errors_fail_the_post_without_retrying(self):
+        post = self.make_posts(1)[0]
+        result = PublishingService(base_delay=0).publish_post(post)
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['status_code'], 500)
+        self.assertEqual(self.stub.requests, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.status, 'failed')
+        self.assertEqual(self.stub.posts, {})
+
+
+class AsyncFormattingTests(StubSiteTestCase):
+    """The async client formats content in a worker thread, not on the event loop"""
+
+    def run_off_loop(self, coroutine_factory):
+        service = AsyncWordPressService(self.site.url, self.site.username, self.site.app_password)
+        threads = []
+        format_content = WordPressService.format_content
+
+        def recording_format_content(service, content):
+            threads.append(threading.get_ident())
+            return format_content(service, content)
+
+        async def run():
+            try:
+                return threading.get_ident(), await coroutine_factory(service)
+            finally:
+                await close_clients()
+
+        with mock.patch.object(WordPressService, 'format_content', recording_format_content):
+            loop_thread, result = asyncio.run(run())
+        self.assertTrue(threads)
+        self.assertNotIn(loop_thread, threads)
+        return result
+
+    def test_create_post(self):
+        result = self.run_off_loop(lambda service: service.create_post('Roses', 'Prune in spring.'))
+        self.assertTrue(result['success'])
+        self.assertIn('Prune in spring.', self.stub.posts[result['post_id']]['content']['raw'])
+
+    def test_update_post(self):
+        post_id = self.run_off_loop(lambda service: service.create_post('Roses', 'Old'))['post_id']
+        result = self.run_off_loop(lambda service: service.update_post(post_id, content='New'))
+        self.assertTrue(result['success'])
+        self.assertIn('New', self.stub.posts[post_id]['content']['raw'])
+
+    def test_create_posts(self):
+        results = self.run_off_loop(lambda service: service.create_posts([
+            {'title': 'Roses', 'content': 'Prune in spring.'},
+            {'title': 'Tulips', 'content': 'Plant in autumn.'},
+        ]))
+        self.assertEqual([result['success'] for result in results], [True, True])
+
+
+class DiffAwareUpdateTests(StubSiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.wp = WordPressService(self.server.url, 'stub', 'stub')
+        created = self.wp.create_post(title='Title', content='<p>Body</p>', status='publish')
+        self.post_id = created['post_id']
+        self.hashes = created['field_hashes']
+
+        self.sent = []
+        save_post = StubWordPress._save_post
+
+        def record(stub, post_id, data):
+            self.sent.append(sorted(data))
+            return save_post(stub, post_id, data)
+
+        patcher = mock.patch.object(StubWordPress, '_save_post', record)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unchanged_post_sends_nothing(self):
+        result = self.wp.update_post(self.post_id, field_hashes=self.hashes, title='Title', content='<p>Body</p>')
+
+        self.assertTrue(result['skipped'])
+        self.assertEqual(self.sent, [])
+        self.assertEqual(result['update_stats']['requests_skipped'], 1)
+        self.assertEqual(result['update_stats']['fields_skipped'], 2)
+
+    def test_only_the_changed_field_is_sent(self):
+        result = self.wp.update_post(self.post_id, field_hashes=self.hashes, title='Title', content='<p>New body</p>')
+
+        self.assertEqual(result['sent_fields'], ['content'])
+        self.assertEqual(self.sent, [['content']])
+        self.assertEqual(self.stub.posts[self.post_id]['title']['raw'], 'Title')
+        stats = result['update_stats']
+        self.assertEqual((stats['fields_sent'], stats['fields_skipped']), (1, 1))
+
+        # The returned hashes make the next identical update a no-op
+        again = self.wp.update_post(
+            self.post_id, field_hashes=result['field_hashes'], title='Title', content='<p>New body</p>'
+        )
+        self.assertTrue(again['skipped'])
+
+    def test_skipped_update_is_counted_for_the_site(self):
+        post = self.make_posts(1)[0]
+        service = PublishingService(base_delay=0)
+        service.publish_post(post)
+        post.refresh_from_db()
+        service.publish_post(post)
+
+        stats = SiteUpdateStats.objects.get(wordpress_site=self.site)
+        self.assertEqual((stats.requests_sent, stats.requests_skipped), (0, 1))
+        self.assertEqual((stats.fields_sent, stats.fields_skipped), (0, 2))
+        self.assertGreater(stats.bytes_skipped, 0)
+
+
+class WebhookSignatureTests(SimpleTestCase):
+    secret = 'a' * 64
+    body = b'{"event": "post.updated", "post": {"id": 12}}'
+
+    def test_accepts_a_fresh_correct_signature(self):
+        timestamp = str(int(time.time()))
+        self.assertTrue(verify_signature(self.secret, timestamp, self.body, sign_payload(self.secret, timestamp, self.body)))
+
+    def test_rejects_a_bad_signature(self):
+        timestamp = str(int(time.time()))
+        signature = sign_payload(self.secret, timestamp, self.body)
+        cases = {
+            'other secret': sign_payload('b' * 64, timestamp, self.body),
+            'other body': sign_payload(self.secret, timestamp, self.body + b' '),
+            'tampered digest': signature[:-1] + ('0' if signature[-1] != '0' else '1'),
+            'missing': '',
+        }
+        for name, bad in cases.items():
+            with self.subTest(name):
+                self.assertFalse(verify_signature(self.secret, timestamp, self.body, bad))
+
+    def test_rejects_timestamps_outside_the_skew(self):
+        now = int(time.time())
+        for timestamp in (now - MAX_TIMESTAMP_SKEW - 5, now + MAX_TIMESTAMP_SKEW + 5):
+            with self.subTest(offset=timestamp - now):
+                timestamp = str(timestamp)
+                signature = sign_payload(self.secret, timestamp, self.body)
+                self.assertFalse(verify_signature(self.secret, timestamp, self.body, signature))
+
+    def test_rejects_a_malformed_timestamp(self):
+        signature = sign_payload(self.secret, 'soon', self.body)
+        self.assertFalse(verify_signature(self.secret, 'soon', self.body, signature))
+        self.assertFalse(verify_signature(self.secret, '', self.body, signature))
+
+
+class WordPressWebhookViewTests(TestCase):
+    def setUp(self):
+        user = User.objects.create(username='writer')
+        self.site = WordPressSite.objects.create(
+            user=user, name='Site', url='https://example.com', username='u', app_password='p'
+        )
+        self.url = reverse('publisher:wordpress_webhook', args=[self.site.pk])
+        self.body = json.dumps({'event': 'post.updated', 'post': {'id': 12, 'title': {'rendered': 'Hi'}}}).encode()
+
+    def deliver(self, timestamp=None, signature=None, delivery_id='delivery-1'):
+        timestamp = str(int(time.time())) if timestamp is None else str(timestamp)
+        signature = signature or sign_payload(self.site.webhook_secret, timestamp, self.body)
+        return self.client.post(
+            self.url, self.body, content_type='application/json',
+            HTTP_X_WEBHOOK_TIMESTAMP=timestamp, HTTP_X_WEBHOOK_SIGNATURE=signature,
+            HTTP_X_WEBHOOK_DELIVERY=delivery_id
+        )
+
+    def test_signed_delivery_is_recorded(self):
+        response = self.deliver()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(WebhookEvent.objects.get().wordpress_post_id, '12')
+
+    def test_bad_signature_is_rejected(self):
+        response = self.deliver(signature='sha256=' + '0' * 64)
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_stale_timestamp_is_rejected(self):
+        response = self.deliver(timestamp=int(time.time()) - MAX_TIMESTAMP_SKEW - 5)
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_replayed_delivery_id_is_stored_once(self):
+        first = self.deliver()
+        replay = self.deliver()
+        self.assertEqual(replay.status_code, 202)
+        self.assertEqual((first.json()['duplicate'], replay.json()['duplicate']), (False, True))
+        self.assertEqual(replay.json()['event_id'], first.json()['event_id'])
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+    def test_site_of_another_secret_rejects_the_signature(self):
+        other = WordPressSite.objects.create(
+            user=self.site.user, name='Other', url='https://other.example.com', username='u', app_password='p'
+        )
+        self.url = reverse('publisher:wordpress_webhook', args=[other.pk])
+        self.assertEqual(self.deliver().status_code, 401)
+
+
+class LinkGraphTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='writer')
+        self.guide, self.calendar, self.shears = [
+            PublishedPost.objects.create(
+                user=self.user, title=title, status='published', wordpress_url=f'https://example.com/{slug}/'
+            )
+            for title, slug in (('Guide', 'guide'), ('Calendar', 'calendar'), ('Shears', 'shears'))
+        ]
+
+    def outbound(self, post):
+        return list(PostLink.objects.filter(source=post).order_by('position').values_list('target_id', 'anchor'))
+
+    def test_index_links_reads_links_from_html_in_order(self):
+        PublishedPost.objects.filter(pk=self.guide.pk).update(html_content=(
+            '<p>See <a href="https://example.com/shears/">shears</a>, the '
+            '<a href="https://example.com/calendar/#may">calendar</a> and '
+            '<a href="https://elsewhere.example.org/">a shop</a>.</p>'
+        ))
+        written = index_links(PublishedPost.objects.filter(pk=self.guide.pk))
+
+        self.assertEqual(written, 2)
+        self.assertEqual(self.outbound(self.guide), [(self.shears.pk, 'shears'), (self.calendar.pk, 'calendar')])
+        counts = {post.pk: (post.inbound_count, post.outbound_count) for post in with_link_counts(PublishedPost.objects.all())}
+        self.assertEqual(counts, {self.guide.pk: (0, 2), self.calendar.pk: (1, 0), self.shears.pk: (1, 0)})
+
+    def test_record_links_round_trip(self):
+        self.assertTrue(record_links(self.guide.pk, [self.calendar.pk, self.shears.pk], ['calendar', 'shears']))
+        self.assertEqual(self.outbound(self.guide), [(self.calendar.pk, 'calendar'), (self.shears.pk, 'shears')])
+        self.assertFalse(record_links(self.guide.pk, [self.calendar.pk, self.shears.pk], ['calendar', 'shears']))
+
+        self.assertTrue(record_links(self.guide.pk, [self.shears.pk]))
+        self.assertEqual(self.outbound(self.guide), [(self.shears.pk, '')])
+
+
+class CopyInternalLinksMigrationTests(TransactionTestCase):
+    """0015 moves internal_links into PostLink rows and can move them back"""
+    before = [('publisher', '0014_postlink')]
+    after = [('publisher', '0015_copy_internal_links')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def setUp(self):
+        leaf = MigrationExecutor(connection).loader.graph.leaf_nodes('publisher')
+        self.addCleanup(self.migrate, leaf)
+        apps = self.migrate(self.before)
+
+        User = apps.get_model('auth', 'User')
+        PublishedPost = apps.get_model('publisher', 'PublishedPost')
+        user = User.objects.create(username='writer')
+        self.a, self.b, self.c = [PublishedPost.objects.create(user=user, title=title) for title in 'abc']
+        self.a.internal_links = {'linked_to': [self.c.pk, self.b.pk, self.c.pk, self.a.pk, 9999]}
+        self.a.link_to_this_count = 0
+        self.a.save()
+        self.b.internal_links = {'linked_to': [self.c.pk]}
+        self.b.save()
+
+    def test_forward_copies_links_and_backward_restores_them(self):
+        apps = self.migrate(self.after)
+        PostLink = apps.get_model('publisher', 'PostLink')
+        self.assertEqual(
+            list(PostLink.objects.order_by('source_id', 'position').values_list('source_id', 'target_id', 'position')),
+            # Duplicates, self-links and missing posts are dropped
+            [(self.a.pk, self.c.pk, 0), (self.a.pk, self.b.pk, 1), (self.b.pk, self.c.pk, 0)]
+        )
+
+        apps = self.migrate(self.before)
+        PublishedPost = apps.get_model('publisher', 'PublishedPost')
+        restored = {post.pk: (post.internal_links, post.link_to_this_count) for post in PublishedPost.objects.all()}
+        self.assertEqual(restored, {
+            self.a.pk: ({'linked_to': [self.c.pk, self.b.pk]}, 0),
+            self.b.pk: ({'linked_to': [self.c.pk]}, 1),
+            self.c.pk: ({}, 2),
+        })
+        self.assertFalse(apps.get_model('publisher', 'PostLink').objects.exists())
+
+        # Applying it again gives the same edges
+        apps = self.migrate(self.after)
+        self.assertEqual(apps.get_model('publisher', 'PostLink').objects.count(), 3)
@@ -16,6 +16,7 @@ urlpatterns = [
     path('edit/<int:pk>/', views.edit_content, name='edit_content'),
     path('preview/<int:pk>/', views.preview_content, name='preview_content'),
     path('delete/<int:pk>/', views.delete_post, name='delete_post'),
+    path('publish/<int:pk>/sites/', views.fan_out_post, name='fan_out_post'),
     path('stage-overview/', views.stage_overview, name='stage_overview'),
     path('stage/<str:stage_id>/', views.stage_details, name='stage_details'),
     path('ajax/stage-suggestions/', views.ajax_stage_suggestions, name='ajax_stage_suggestions'),
@@ -31,9 +32,11 @@ urlpatterns = [
     path('sites/<int:pk>/edit/', views.edit_site, name='edit_site'),
     path('sites/<int:pk>/delete/', views.delete_site, name='delete_site'),
     path('sites/<int:pk>/test/', views.test_site_connection, name='test_site'),
+    path('webhooks/wordpress/<int:site_id>/', views.wordpress_webhook, name='wordpress_webhook'),
     
     # Internal Linking (NEW)
     path('internal-links/', views.manage_internal_links, name='manage_internal_links'),
+    path('internal-links/relink/', views.relink_posts, name='relink_posts'),
     path('internal-links/rules/', views.linking_rules, name='linking_rules'),
     path('internal-links/rule/add/', views.add_linking_rule, name='add_linking_rule'),
     path('internal-links/rule/<int:pk>/edit/', views.edit_linking_rule, name='edit_linking_rule'),
@@ -50,6 +53,8 @@ urlpatterns = [
     # Bulk Operations
     path('bulk/generate/', views.bulk_generate, name='bulk_generate'),
     path('bulk/publish/', views.bulk_publish, name='bulk_publish'),
+    path('bulk/schedule/', views.schedule_posts, name='schedule_posts'),
+    path('ajax/publishing-stats/', views.publishing_stats, name='publishing_stats'),
     
     # Settings
     path('settings/', views.user_settings, name='user_settings'),
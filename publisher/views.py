@@ -1,5 +1,6 @@
 import os
 import json
+from datetime import datetime
 from django.urls import reverse
 import uuid
 from django.shortcuts import render, redirect, get_object_or_404
@@ -11,12 +12,15 @@ from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
-from django.db.models import Q, Count
+from django.views.decorators.csrf import csrf_exempt
+from django.db import transaction
+from django.db.models import Q, Count, Sum
 from PIL import Image
 
 from .models import (
     WordPressSite, PublishedPost, UploadedImage,
-    InternalLinkRule, LinkingProfile, UserContentStrategy, ContentStage
+    InternalLinkRule, LinkingProfile, UserContentStrategy, ContentStage, RelinkJob,
+    SiteUpdateStats
 )
 from .forms import (
     CustomLoginForm, WordPressSiteForm,
@@ -25,6 +29,13 @@ from .forms import (
 from .claude_service import ClaudeService
 from .wordpress_service import WordPressService
 from .internal_linking_service import InternalLinkingService
+from .link_analytics_service import get_link_report
+from .link_graph_service import orphan_posts, with_link_counts
+from .outbox_service import OutboxWorker, enqueue_publish
+from .publishing_service import PublishingService
+from .health_service import site_health
+from .calendar_service import PublishingCalendar
+from .webhook_service import parse_event, record_event, verify_signature
 
 from django.contrib.auth import login as auth_login
 
@@ -700,49 +711,56 @@ def publish_content(request, pk):
     """Publish content directly to WordPress"""
     post = get_object_or_404(PublishedPost, pk=pk, user=request.user)
     
-    if post.wordpress_site:
-        wp = WordPressService(
-            site_url=post.wordpress_site.url,
-            username=post.wordpress_site.username,
-            app_password=post.wordpress_site.app_password
-        )
-        
-        # Upload featured image if available
-        featured_media_id = None
-        if post.images.exists():
-            first_image = post.images.first()
-            media_result = wp.upload_media(
-                first_image.image.path,
-                os.path.basename(first_image.image.name)
-            )
-            if media_result['success']:
-                featured_media_id = media_result['media_id']
+    if post.status == 'publishing':
+        messages.info(request, "This post is already being published.")
+    elif post.status == 'published':
+        messages.info(request, f"Already published at: {post.wordpress_url}")
+    elif post.wordpress_site:
+        # Queue the publish durably, then try it straight away
+        with transaction.atomic():
+            PublishedPost.mark_queued(post.pk)
+            intent = enqueue_publish(post)
+        summary = OutboxWorker().process([intent])
+        post.refresh_from_db()
         
-        # Publish to WordPress
-        wp_result = wp.create_post(
-            title=post.title,
-            content=post.html_content or post.edited_content or post.content,
-            status='publish',
-            featured_media_id=featured_media_id
-        )
-        
-        if wp_result['success']:
-            post.wordpress_post_id = str(wp_result['post_id'])
-            post.wordpress_url = wp_result['url']
-            post.status = 'published'
-            post.published_at = timezone.now()
-            post.save()
-            
-            messages.success(request, f"Published successfully! View at: {wp_result['url']}")
+        if summary['site_down']:
+            messages.warning(request, "The site is failing health checks. The post is queued and will publish when it recovers.")
+        elif summary['circuit_open']:
+            messages.warning(request, "Publishing to this site is paused after repeated failures. The post is queued and will be retried.")
+        elif summary['deferred']:
+            messages.info(request, "This post is already being published.")
+        elif post.status == 'published':
+            messages.success(request, f"Published successfully! View at: {post.wordpress_url}")
         else:
-            post.status = 'failed'
-            post.error_message = wp_result['error']
-            post.save()
-            messages.error(request, f"Publishing failed: {wp_result['error']}")
+            messages.error(request, f"Publishing failed: {post.error_message}")
+            if post.status == 'queued':
+                messages.info(request, "The post is queued and will be retried automatically.")
     
     return redirect('publisher:dashboard')
 
 
+@login_required
+@require_POST
+def fan_out_post(request, pk):
+    """Publish one post to several of the user's sites at once"""
+    post = get_object_or_404(PublishedPost, pk=pk, user=request.user)
+    sites = WordPressSite.objects.filter(
+        user=request.user, is_active=True, id__in=request.POST.getlist('site_ids')
+    )
+    if not sites:
+        messages.error(request, "Select at least one site")
+        return redirect('publisher:edit_content', pk=pk)
+
+    summary = PublishingService().fan_out(post, sites)
+    if summary['published']:
+        messages.success(request, f"Published to {summary['published']} sites")
+    if summary['in_progress']:
+        messages.info(request, f"{summary['in_progress']} sites are already being published to")
+    for error in summary['errors']:
+        messages.error(request, f"{error['site']}: {error['error']}")
+    return redirect('publisher:edit_content', pk=pk)
+
+
 @login_required
 def manage_internal_links(request):
     """Manage internal linking rules and preferences"""
@@ -762,19 +780,38 @@ def manage_internal_links(request):
     rules = InternalLinkRule.objects.filter(user=request.user).select_related('target_post')
     
     # Get link statistics
-    posts_with_most_links = PublishedPost.objects.filter(
+    posts_with_most_links = with_link_counts(PublishedPost.objects.filter(
         user=request.user,
         status='published'
-    ).order_by('-link_to_this_count')[:10]
+    )).order_by('-inbound_count')[:10]
     
     context = {
         'profile': profile,
         'rules': rules,
         'popular_posts': posts_with_most_links,
+        'orphan_count': orphan_posts(request.user.id).count(),
+        # Stored by the analyze_link_graph job; analyzed here only when missing
+        'link_reports': [
+            (site, get_link_report(site.id))
+            for site in WordPressSite.objects.filter(user=request.user, is_active=True)
+        ],
+        'relink_job': RelinkJob.objects.filter(user=request.user).first(),
     }
     return render(request, 'internal_links.html', context)
 
 
+@login_required
+@require_POST
+def relink_posts(request):
+    """Queue a relink of the user's posts with the current linking settings"""
+    if RelinkJob.objects.filter(user=request.user, status__in=['pending', 'running']).exists():
+        messages.info(request, "A relink is already queued")
+    else:
+        RelinkJob.objects.create(user=request.user, push=request.POST.get('push') == 'on')
+        messages.success(request, "Relink queued: existing posts will be relinked in the background")
+    return redirect('publisher:manage_internal_links')
+
+
 @login_required
 def ajax_get_related_posts(request):
     """AJAX endpoint to get related posts for manual linking"""
@@ -796,6 +833,10 @@ def edit_content(request, pk):
     """Edit generated content before publishing"""
     post = get_object_or_404(PublishedPost, pk=pk, user=request.user)
 
+    # Only the edited fields are saved, so an edit never overwrites the
+    # status a concurrent publish is writing
+    edit_fields = ['title', 'edited_content', 'html_content', 'affiliate_links']
+
     if request.method == 'POST':
         if 'save_draft' in request.POST:
             # Save changes without publishing
@@ -803,70 +844,65 @@ def edit_content(request, pk):
             post.edited_content = request.POST.get('content', '')
             post.html_content = request.POST.get('content', '')
             post.affiliate_links = request.POST.get('affiliate_links', '')
-            post.save()
+            post.save(update_fields=edit_fields)
             messages.success(request, "Draft saved successfully!")
             return redirect('publisher:edit_content', pk=post.pk)
         
         elif 'publish' in request.POST:
+            if not post.wordpress_site:
+                messages.error(request, "Select a WordPress site before publishing")
+                return redirect('publisher:edit_content', pk=post.pk)
+            
             # Save and publish to WordPress
             post.title = request.POST.get('title', post.title)
             post.edited_content = request.POST.get('content', '')
             post.html_content = request.POST.get('content', '')
             post.affiliate_links = request.POST.get('affiliate_links', '')
-            post.save()
             
-            # Publish to WordPress
-            wp = WordPressService(
-                site_url=post.wordpress_site.url,
-                username=post.wordpress_site.username,
-                app_password=post.wordpress_site.app_password
-            )
+            # Save the edits and queue the publish in one transaction
+            with transaction.atomic():
+                post.save(update_fields=edit_fields)
+                PublishedPost.mark_queued(post.pk)
+                intent = enqueue_publish(post)
             
-            # Upload featured image if available
-            featured_media_id = None
-            if post.images.exists():
-                first_image = post.images.first()
-                media_result = wp.upload_media(
-                    first_image.image.path,
-                    os.path.basename(first_image.image.name)
-                )
-                if media_result['success']:
-                    featured_media_id = media_result['media_id']
-                    first_image.wordpress_media_id = str(media_result['media_id'])
-                    first_image.wordpress_url = media_result['url']
-                    first_image.save()
+            # Publish to WordPress with the edited HTML content. If another
+            # publish is in flight, the intent waits and sends these edits after it.
+            summary = OutboxWorker().process([intent])
+            post.refresh_from_db()
             
-            # Publish with HTML content
-            wp_result = wp.create_post(
-                title=post.title,
-                content=post.html_content,  # Use the edited HTML content
-                status='publish',
-                featured_media_id=featured_media_id,
-                format='standard'
-            )
-            
-            if wp_result['success']:
-                post.wordpress_post_id = str(wp_result['post_id'])
-                post.wordpress_url = wp_result['url']
-                post.status = 'published'
-                post.published_at = timezone.now()
-                post.save()
-                messages.success(request, f"Published successfully! View at: {wp_result['url']}")
+            if summary['site_down']:
+                messages.warning(request, "The site is failing health checks. Your changes are saved and will publish when it recovers.")
+                return redirect('publisher:dashboard')
+            elif summary['circuit_open']:
+                messages.warning(request, "Publishing to this site is paused after repeated failures. Your changes are saved and will be retried.")
+                return redirect('publisher:dashboard')
+            elif summary['deferred']:
+                messages.info(request, "A publish is already in progress; your changes will be sent when it finishes.")
+                return redirect('publisher:dashboard')
+            elif post.status == 'published':
+                messages.success(request, f"Published successfully! View at: {post.wordpress_url}")
                 return redirect('publisher:dashboard')
             else:
-                post.status = 'failed'
-                post.error_message = wp_result['error']
-                post.save()
-                messages.error(request, f"Publishing failed: {wp_result['error']}")
+                messages.error(request, f"Publishing failed: {post.error_message}")
+                if post.status == 'queued':
+                    messages.info(request, "The post is queued and will be retried automatically.")
     
     # Get current affiliate links as list
     affiliate_links_list = [link.strip() for link in post.affiliate_links.split('\n') if link.strip()]
     
+    # Sites the post can be fanned out to, with the status of its copy on each
+    publications = {pub.wordpress_site_id: pub for pub in post.site_publications.all()}
+    fan_out_sites = [
+        {'site': site, 'copy': post if site.pk == post.wordpress_site_id else publications.get(site.pk)}
+        for site in WordPressSite.objects.filter(user=request.user, is_active=True)
+    ]
+
     context = {
         'post': post,
         'affiliate_links_list': affiliate_links_list,
         'images': post.images.all(),
         'wordpress_site': post.wordpress_site,
+        'fan_out_sites': fan_out_sites,
     }
     return render(request, 'edit_content.html', context)
 
@@ -875,7 +911,11 @@ def edit_content(request, pk):
 def preview_content(request, pk):
     """Live preview of content as it will appear"""
     post = get_object_or_404(PublishedPost, pk=pk, user=request.user)
-    return render(request, 'preview_content.html', {'post': post})
+    block_content = None
+    if post.wordpress_site:
+        # Same serialized markup the publisher sends, reused from the cache
+        block_content = PublishingService().render_content(post)
+    return render(request, 'preview_content.html', {'post': post, 'block_content': block_content})
 
 
 @login_required
@@ -940,6 +980,9 @@ def manage_sites(request):
         form = WordPressSiteForm()
     
     sites = WordPressSite.objects.filter(user=request.user)
+    health = site_health([site.id for site in sites])
+    for site in sites:
+        site.health = health[site.id]
     return render(request, 'sites.html', {'form': form, 'sites': sites})
 
 
@@ -1153,21 +1196,91 @@ def bulk_publish(request):
     """Bulk publish drafted posts"""
     if request.method == 'POST':
         post_ids = request.POST.getlist('post_ids')
-        posts = PublishedPost.objects.filter(id__in=post_ids, user=request.user)
+        posts = PublishedPost.objects.filter(
+            id__in=post_ids, user=request.user
+        ).select_related('wordpress_site')
         
-        published_count = 0
-        for post in posts:
-            # Publish each post
-            # Add your WordPress publishing logic here
-            published_count += 1
+        # Queue every post durably, then publish concurrently, grouped by
+        # site with per-site rate limiting
+        intents = []
+        skipped = 0
+        already = 0
+        with transaction.atomic():
+            for post in posts:
+                if not post.wordpress_site_id:
+                    skipped += 1
+                elif post.status in ('publishing', 'published'):
+                    already += 1
+                else:
+                    PublishedPost.mark_queued(post.pk)
+                    intents.append(enqueue_publish(post))
+        summary = OutboxWorker().process(intents)
+        already += summary['deferred']
         
-        messages.success(request, f"Published {published_count} posts")
+        messages.success(request, f"Published {summary['published']} posts")
+        if already:
+            messages.info(request, f"{already} posts were already published or being published")
+        if summary['retrying'] or summary['dead']:
+            messages.error(request, f"{summary['retrying'] + summary['dead']} posts failed to publish")
+            for error in summary['errors'][:5]:
+                messages.error(request, f"{error['title']}: {error['error']}")
+            if summary['retrying']:
+                messages.info(request, f"{summary['retrying']} posts are queued and will be retried automatically.")
+        if summary['site_down']:
+            messages.warning(request, f"{summary['site_down']} posts are queued until their site passes health checks again.")
+        if summary['circuit_open']:
+            messages.warning(request, f"{summary['circuit_open']} posts are queued while publishing to their site is paused after repeated failures.")
+        if skipped:
+            messages.warning(request, f"Skipped {skipped} posts with no WordPress site")
         return redirect('publisher:dashboard')
     
     draft_posts = PublishedPost.objects.filter(user=request.user, status='draft')
     return render(request, 'bulk_publish.html', {'posts': draft_posts})
 
 
+@login_required
+@require_POST
+def schedule_posts(request):
+    """Spread the selected posts over each site's publishing calendar"""
+    post_ids = request.POST.getlist('post_ids')
+    if not post_ids:
+        messages.warning(request, "Select the posts to schedule")
+        return redirect('publisher:dashboard')
+
+    posts = PublishedPost.objects.filter(
+        id__in=post_ids, user=request.user
+    ).select_related('wordpress_site').order_by('created_at')
+
+    start = None
+    start_date = request.POST.get('start_date', '')
+    if start_date:
+        try:
+            start = timezone.make_aware(datetime.strptime(start_date, '%Y-%m-%d'))
+        except ValueError:
+            messages.error(request, "Start date must be YYYY-MM-DD")
+            return redirect('publisher:dashboard')
+
+    summary = PublishingCalendar().plan(posts, start=start)
+    if summary['scheduled']:
+        messages.success(
+            request,
+            f"Scheduled {summary['scheduled']} posts between "
+            f"{summary['first_slot']:%b %d %H:%M} and {summary['last_slot']:%b %d %H:%M} UTC"
+        )
+    if summary['skipped']:
+        messages.warning(request, f"Skipped {summary['skipped']} posts that have no site or are already published")
+    return redirect('publisher:dashboard')
+
+
+@login_required
+def publishing_stats(request):
+    """Diff-aware update counters for monitoring, summed over the user's sites"""
+    totals = SiteUpdateStats.objects.filter(wordpress_site__user=request.user).aggregate(
+        **{name: Sum(name) for name in SiteUpdateStats.COUNTERS}
+    )
+    return JsonResponse({'updates': {name: value or 0 for name, value in totals.items()}})
+
+
 @login_required
 def export_settings(request):
     """Export user settings and rules"""
@@ -1227,7 +1340,41 @@ def edit_site(request, pk):
     else:
         form = WordPressSiteForm(instance=site)
     
-    return render(request, 'edit_site.html', {'form': form, 'site': site})
+    context = {
+        'form': form,
+        'site': site,
+        'webhook_url': request.build_absolute_uri(
+            reverse('publisher:wordpress_webhook', args=[site.pk])
+        ),
+        'webhook_secret': site.ensure_webhook_secret(),
+    }
+    return render(request, 'edit_site.html', context)
+
+
+@csrf_exempt
+@require_POST
+def wordpress_webhook(request, site_id):
+    """Receive a signed post created/updated/deleted event from a site"""
+    site = WordPressSite.objects.filter(pk=site_id, is_active=True).first()
+    if not site or not site.webhook_secret:
+        return JsonResponse({'success': False, 'error': 'Unknown site'}, status=404)
+
+    if not verify_signature(
+        site.webhook_secret,
+        request.headers.get('X-Webhook-Timestamp', ''),
+        request.body,
+        request.headers.get('X-Webhook-Signature', '')
+    ):
+        return JsonResponse({'success': False, 'error': 'Invalid signature'}, status=401)
+
+    try:
+        event = parse_event(request.body)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    # Applied later by the process_webhook_events worker
+    webhook_event, created = record_event(site, event, request.headers.get('X-Webhook-Delivery', ''))
+    return JsonResponse({'success': True, 'event_id': webhook_event.pk, 'duplicate': not created}, status=202)
 
 
 def calculate_recommended_stage(stage_counts):
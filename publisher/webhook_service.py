@@ -0,0 +1,193 @@
+import hashlib
+import hmac
+import json
+import time
+from datetime import timedelta
+from typing import Dict, Any, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .internal_linking_service import InternalLinkingService
+from .models import PublishedPost, WebhookEvent, WordPressSite
+from .sync_service import SyncService
+
+
+# Deliveries signed further than this from our clock are rejected as replays
+MAX_TIMESTAMP_SKEW = 5 * 60  # seconds
+
+MAX_ATTEMPTS = 5
+
+# Events left in 'processing' this long belonged to a worker that died
+STALE_PROCESSING_AFTER = timedelta(minutes=15)
+
+
+def sign_payload(secret: str, timestamp: str, body: bytes) -> str:
+    """Signature a site sends in X-Webhook-Signature: HMAC-SHA256 of "<timestamp>.<body>" """
+    message = timestamp.encode('utf-8') + b'.' + body
+    return 'sha256=' + hmac.new(secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret: str, timestamp: str, body: bytes, signature: str) -> bool:
+    """Check a delivery's signature and that it was signed recently"""
+    if not secret or not timestamp or not signature:
+        return False
+    try:
+        if abs(time.time() - int(timestamp)) > MAX_TIMESTAMP_SKEW:
+            return False
+    except ValueError:
+        return False
+    return hmac.compare_digest(sign_payload(secret, timestamp, body), signature)
+
+
+def parse_event(body: bytes) -> Dict[str, Any]:
+    """Normalise a webhook body to {'event', 'post_id', 'post'}
+
+    Accepts ``{"event": "post.updated", "post": {...}}`` with a REST API
+    post object, or ``{"event": "deleted", "post_id": 12}``.
+    """
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise ValueError('Body is not valid JSON')
+    if not isinstance(data, dict):
+        raise ValueError('Body must be a JSON object')
+
+    event = str(data.get('event', '')).split('.')[-1]
+    if event not in dict(WebhookEvent.EVENT_CHOICES):
+        raise ValueError(f"Unknown event '{data.get('event')}'")
+
+    post = data.get('post') if isinstance(data.get('post'), dict) else {}
+    post_id = post.get('id') or data.get('post_id')
+    if not post_id:
+        raise ValueError('Missing post id')
+
+    return {'event': event, 'post_id': str(post_id), 'post': post}
+
+
+def record_event(site: WordPressSite, event: Dict[str, Any],
+                 delivery_id: str = '') -> Tuple[WebhookEvent, bool]:
+    """Store a verified event, ignoring a delivery we have already seen"""
+    if delivery_id:
+        existing = WebhookEvent.objects.filter(wordpress_site=site, delivery_id=delivery_id).first()
+        if existing:
+            return existing, False
+    try:
+        with transaction.atomic():
+            return WebhookEvent.objects.create(
+                wordpress_site=site,
+                delivery_id=delivery_id,
+                event=event['event'],
+                wordpress_post_id=event['post_id'],
+                payload=event['post']
+            ), True
+    except IntegrityError:
+        # The same delivery raced in on another request
+        return WebhookEvent.objects.get(wordpress_site=site, delivery_id=delivery_id), False
+
+
+class WebhookProcessor:
+    """Apply stored webhook events to local posts and the link graph"""
+
+    def __init__(self, sync_service: Optional[SyncService] = None):
+        self.sync_service = sync_service or SyncService()
+
+    def process_pending(self, limit: int = 100) -> Dict[str, Any]:
+        """Apply up to ``limit`` pending events, oldest first"""
+        summary = {'processed': 0, 'superseded': 0, 'failed': 0, 'errors': []}
+        self.requeue_stale()
+
+        events = list(
+            WebhookEvent.objects.filter(status='pending')
+            .select_related('wordpress_site__user')[:limit]
+        )
+
+        # Only the newest event per post matters; older ones are superseded
+        latest = {}
+        for event in events:
+            latest[(event.wordpress_site_id, event.wordpress_post_id)] = event
+        superseded = [
+            event.pk for event in events
+            if latest[(event.wordpress_site_id, event.wordpress_post_id)] is not event
+        ]
+        if superseded:
+            summary['superseded'] = WebhookEvent.objects.filter(pk__in=superseded, status='pending').update(
+                status='processed', processed_at=timezone.now(), updated_at=timezone.now()
+            )
+
+        for event in latest.values():
+            if not self._claim(event):
+                continue
+            try:
+                error = self.apply(event)
+            except Exception as e:
+                error = str(e)
+            if error:
+                self._record_failure(event, error)
+                summary['failed'] += 1
+                summary['errors'].append({'event_id': event.pk, 'error': error})
+            else:
+                event.status = 'processed'
+                event.error_message = ''
+                event.processed_at = timezone.now()
+                event.save(update_fields=['status', 'error_message', 'processed_at', 'updated_at'])
+                summary['processed'] += 1
+
+        return summary
+
+    def requeue_stale(self) -> int:
+        """Return events abandoned by a crashed worker to the queue"""
+        return WebhookEvent.objects.filter(
+            status='processing', updated_at__lt=timezone.now() - STALE_PROCESSING_AFTER
+        ).update(status='pending', updated_at=timezone.now())
+
+    def apply(self, event: WebhookEvent) -> str:
+        """Apply one event; returns an error message, or '' on success"""
+        site = event.wordpress_site
+
+        if event.event == 'deleted':
+            post = PublishedPost.objects.filter(
+                wordpress_site=site, wordpress_post_id=event.wordpress_post_id
+            ).first()
+            if post:
+                self._remove_post(InternalLinkingService(site.user), post)
+            return ''
+
+        remote = event.payload
+        if 'content' not in remote:
+            # Thin payload: fetch the post as it is now
+            result = self.sync_service.get_wordpress_service(site).get_post(int(event.wordpress_post_id))
+            if not result['success']:
+                return result['error']
+            remote = result['post']
+
+        # Upserting re-derives the post's links along with its keywords
+        self.sync_service.upsert_posts(site, [remote])
+        return ''
+
+    def _remove_post(self, linking: InternalLinkingService, post: PublishedPost):
+        with transaction.atomic():
+            linking.remove_post_links(post)
+            if post.published_field_hashes:
+                # Written here: keep the content, it is just no longer live
+                post.wordpress_post_id = ''
+                post.wordpress_url = ''
+                post.published_field_hashes = {}
+                post.status = 'draft'
+                post.save(update_fields=['wordpress_post_id', 'wordpress_url', 'published_field_hashes', 'status'])
+            else:
+                post.delete()
+
+    def _claim(self, event: WebhookEvent) -> bool:
+        claimed = WebhookEvent.objects.filter(pk=event.pk, status='pending').update(
+            status='processing', updated_at=timezone.now()
+        )
+        if claimed:
+            event.status = 'processing'
+        return bool(claimed)
+
+    def _record_failure(self, event: WebhookEvent, error: str):
+        event.attempts += 1
+        event.error_message = error
+        event.status = 'failed' if event.attempts >= MAX_ATTEMPTS else 'pending'
+        event.save(update_fields=['attempts', 'error_message', 'status', 'updated_at'])
@@ -1,10 +1,35 @@
 import requests
 import base64
+import hashlib
 import json
 import re
+import time
 from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 
+from .gutenberg_service import serialize_blocks
+
+
+# WordPress core's default limit for /batch/v1 requests
+BATCH_DEFAULT_MAX_ITEMS = 25
+
+# Response fields each call reads. Asking for just these with ?_fields=
+# stops WordPress echoing the whole post, rendered content included.
+USER_FIELDS = 'id,name,capabilities'
+CREATED_POST_FIELDS = 'id,link,guid,slug,status'
+UPDATED_POST_FIELDS = 'id,link,modified'
+MEDIA_FIELDS = 'id,source_url,link'
+
+# Content formatting patterns, compiled once
+_EMPTY_PARAGRAPH_RE = re.compile(r'<p>\s*</p>')
+_INLINE_TAG_PATTERN = (
+    r'<table(?P<table>[^>]*)>'
+    r'|<blockquote(?P<quote>[^>]*)>'
+    r'|<a\s+(?P<link>[^>]*href=["\'][^"\']*["\'][^>]*)>'
+)
+_INLINE_TAG_RE = re.compile(_INLINE_TAG_PATTERN)
+_INLINE_REWRITE_RE = re.compile(r'\[IMAGE:\s*(?P<image>.*?)\]|' + _INLINE_TAG_PATTERN)
+
 
 class WordPressService:
     """Enhanced WordPress REST API integration service"""
@@ -16,6 +41,8 @@ class WordPressService:
         self.app_password = app_password
         self.auth_header = self._create_auth_header()
         self.api_base = f"{self.site_url}/wp-json/wp/v2"
+        self.batch_url = f"{self.site_url}/wp-json/batch/v1"
+        self._batch_limit = None
 
     def _create_auth_header(self) -> Dict[str, str]:
         """Create authorization header for WordPress REST API"""
@@ -29,6 +56,7 @@ class WordPressService:
             response = requests.get(
                 f"{self.api_base}/users/me",
                 headers=self.auth_header,
+                params={'_fields': USER_FIELDS},
                 timeout=10
             )
 
@@ -73,34 +101,16 @@ class WordPressService:
                         )
                     }
 
-                    # Prepare metadata
-                    data = {
-                        'alt_text': img_data.get('alt_text', ''),
-                        'caption': img_data.get('caption', ''),
-                        'description': img_data.get('description', '')
-                    }
-
                     response = requests.post(
                         f"{self.api_base}/media",
                         headers=self.auth_header,
+                        params={'_fields': MEDIA_FIELDS},
                         files=files,
-                        data=data,
+                        data=self._media_metadata(img_data),
                         timeout=30
                     )
 
-                if response.status_code == 201:
-                    media = response.json()
-                    results.append({
-                        'success': True,
-                        'media_id': media['id'],
-                        'url': media['source_url'],
-                        'wordpress_url': media['link']
-                    })
-                else:
-                    results.append({
-                        'success': False,
-                        'error': f"Failed to upload {img_data['filename']}"
-                    })
+                results.append(self._batch_upload_result(img_data, response))
 
             except Exception as e:
                 results.append({
@@ -134,12 +144,7 @@ class WordPressService:
                 # Replace placeholder in content
                 placeholder = f"[IMAGE: {img.get('alt_text', '')}]"
                 if placeholder in content:
-                    img_html = f'<!-- wp:image {{"id":{result["media_id"]},"sizeSlug":"large"}} -->'
-                    img_html += f'<figure class="wp-block-image size-large">'
-                    img_html += f'<img src="{result["url"]}" alt="{img.get("alt_text", "")}" '
-                    img_html += f'class="wp-image-{result["media_id"]}"/>'
-                    img_html += f'</figure><!-- /wp:image -->'
-
+                    img_html = self._uploaded_image_block(result, img.get('alt_text', ''))
                     content = content.replace(placeholder, img_html, 1)
 
         # Create the post
@@ -150,6 +155,26 @@ class WordPressService:
             **kwargs
         )
 
+    def check_health(self, timeout: float = 10) -> Dict[str, Any]:
+        """Time a lightweight authenticated request, for the health monitor"""
+        started = time.perf_counter()
+        try:
+            response = requests.get(
+                f"{self.api_base}/users/me",
+                headers=self.auth_header,
+                params={'_fields': 'id'},
+                timeout=timeout
+            )
+        except Exception as e:
+            return {
+                'success': False,
+                'status_code': None,
+                'latency_ms': (time.perf_counter() - started) * 1000,
+                'error': str(e)
+            }
+
+        return self._health_result(response, started)
+
     def create_post(self, title: str, content: str, status: str = 'publish',
                     featured_media_id: Optional[int] = None,
                     categories: Optional[List[int]] = None,
@@ -157,93 +182,76 @@ class WordPressService:
                     excerpt: Optional[str] = None,
                     slug: Optional[str] = None,
                     meta: Optional[Dict] = None,
-                    format: str = 'standard') -> Dict[str, Any]:
+                    format: str = 'standard',
+                    date: Optional[str] = None) -> Dict[str, Any]:
         """Create a WordPress post with enhanced HTML content support"""
 
-        # Prepare content for WordPress
-        formatted_content = self._prepare_content_for_wordpress(content)
-
-        # Build post data
-        post_data = {
-            'title': title,
-            'content': formatted_content,
-            'status': status,
-            'format': format,
-            'comment_status': 'open',
-            'ping_status': 'open'
-        }
-
-        # Add optional fields
-        if featured_media_id:
-            post_data['featured_media'] = featured_media_id
-
-        if categories:
-            post_data['categories'] = categories
-
-        if tags:
-            post_data['tags'] = tags
-
-        if excerpt:
-            post_data['excerpt'] = excerpt
-
-        if slug:
-            post_data['slug'] = slug
-
-        if meta:
-            post_data['meta'] = meta
+        post_data = self._build_post_data(
+            title, content, status, featured_media_id, categories,
+            tags, excerpt, slug, meta, format, date
+        )
 
         try:
             response = requests.post(
                 f"{self.api_base}/posts",
                 headers={**self.auth_header, 'Content-Type': 'application/json'},
+                params={'_fields': CREATED_POST_FIELDS},
                 data=json.dumps(post_data),
                 timeout=30
             )
 
             if response.status_code == 201:
-                post = response.json()
-                return {
-                    'success': True,
-                    'post_id': post['id'],
-                    'url': post['link'],
-                    'guid': post['guid']['rendered'],
-                    'slug': post['slug'],
-                    'status': post['status']
-                }
+                result = self._created_post_result(response.json())
+                result['field_hashes'] = self._hash_fields(post_data)
+                return result
             else:
-                error_msg = self._parse_error_response(response)
-                return {'success': False, 'error': error_msg}
+                return self._error_result(response)
 
         except requests.exceptions.Timeout:
             return {'success': False, 'error': 'Request timeout. Try again or check server.'}
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
-    def update_post(self, post_id: int, **kwargs) -> Dict[str, Any]:
-        """Update an existing WordPress post"""
+    def update_post(self, post_id: int, field_hashes: Optional[Dict[str, str]] = None,
+                    **kwargs) -> Dict[str, Any]:
+        """Update an existing WordPress post
+
+        Pass ``field_hashes`` (as returned by a previous create/update) to
+        send only the fields that changed since then. When nothing changed
+        no request is made and the result has ``skipped=True``. Successful
+        results carry ``update_stats``, the fields and bytes sent and skipped.
+        """
         try:
             # Prepare content if provided
             if 'content' in kwargs:
-                kwargs['content'] = self._prepare_content_for_wordpress(kwargs['content'])
+                kwargs['content'] = self.format_content(kwargs['content'])
+
+            changed, new_hashes = self._diff_fields(kwargs, field_hashes)
+            if not changed:
+                return {
+                    'success': True,
+                    'skipped': True,
+                    'post_id': post_id,
+                    'field_hashes': new_hashes,
+                    'update_stats': self._update_stats(kwargs, changed)
+                }
 
             response = requests.post(
                 f"{self.api_base}/posts/{post_id}",
                 headers={**self.auth_header, 'Content-Type': 'application/json'},
-                data=json.dumps(kwargs),
+                params={'_fields': UPDATED_POST_FIELDS},
+                data=json.dumps(changed),
                 timeout=30
             )
 
             if response.status_code == 200:
-                post = response.json()
-                return {
-                    'success': True,
-                    'post_id': post['id'],
-                    'url': post['link'],
-                    'modified': post['modified']
-                }
+                result = self._updated_post_result(response.json())
+                result['field_hashes'] = new_hashes
+                result['sent_fields'] = sorted(changed)
+                result['update_stats'] = self._update_stats(kwargs, changed)
+                return result
             else:
-                error_msg = self._parse_error_response(response)
-                return {'success': False, 'error': error_msg}
+                return self._error_result(response)
 
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -263,14 +271,7 @@ class WordPressService:
             )
 
             if response.status_code == 200:
-                categories = response.json()
-                return {
-                    'success': True,
-                    'categories': [
-                        {'id': cat['id'], 'name': cat['name'], 'slug': cat['slug']}
-                        for cat in categories
-                    ]
-                }
+                return self._terms_result('categories', response.json())
             else:
                 return {'success': False, 'error': 'Failed to fetch categories'}
 
@@ -288,83 +289,484 @@ class WordPressService:
             )
 
             if response.status_code == 200:
-                tags = response.json()
-                return {
-                    'success': True,
-                    'tags': [
-                        {'id': tag['id'], 'name': tag['name'], 'slug': tag['slug']}
-                        for tag in tags
-                    ]
-                }
+                return self._terms_result('tags', response.json())
             else:
                 return {'success': False, 'error': 'Failed to fetch tags'}
 
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    def get_posts(self, page: int = 1, per_page: int = 100,
+                  modified_after: Optional[str] = None) -> Dict[str, Any]:
+        """Get one page of published posts, oldest modification first"""
+        try:
+            response = requests.get(
+                f"{self.api_base}/posts",
+                headers=self.auth_header,
+                params=self._posts_page_params(page, per_page, modified_after),
+                timeout=30
+            )
+            return self._posts_page_result(response)
+
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def get_post(self, post_id: int) -> Dict[str, Any]:
+        """Get a single post"""
+        try:
+            response = requests.get(
+                f"{self.api_base}/posts/{post_id}",
+                headers=self.auth_header,
+                timeout=30
+            )
+
+            if response.status_code == 200:
+                return {'success': True, 'post': response.json()}
+            else:
+                return self._error_result(response)
+
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def get_batch_limit(self) -> int:
+        """Return the site's batch size limit, or 0 if /batch/v1 is unsupported
+
+        The limit is discovered once per service instance from the endpoint's
+        schema (WordPress 5.6+); older sites answer 404 and fall back to one
+        request per object.
+        """
+        if self._batch_limit is None:
+            try:
+                response = requests.options(self.batch_url, headers=self.auth_header, timeout=10)
+            except Exception:
+                # Don't cache transient failures
+                return 0
+
+            self._batch_limit = self._parse_batch_limit(response)
+        return self._batch_limit or 0
+
+    def batch(self, sub_requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send sub-requests through /batch/v1, chunked at the server limit
+
+        Each sub-request is ``{'method', 'path', 'body'}`` with ``path``
+        relative to the REST root (e.g. ``/wp/v2/posts``). Returns one
+        ``{'status', 'body'}`` per sub-request, in order. If a whole chunk
+        fails, each of its items gets that chunk's status (and
+        ``retry_after``), so callers can retry just those items.
+        """
+        limit = self.get_batch_limit() or BATCH_DEFAULT_MAX_ITEMS
+        responses = []
+
+        for start in range(0, len(sub_requests), limit):
+            chunk = sub_requests[start:start + limit]
+            try:
+                response = requests.post(
+                    self.batch_url,
+                    headers={**self.auth_header, 'Content-Type': 'application/json'},
+                    data=json.dumps({'validation': 'normal', 'requests': chunk}),
+                    timeout=60
+                )
+            except Exception as e:
+                responses.extend({'status': 0, 'body': {'message': str(e)}} for _ in chunk)
+                continue
+
+            responses.extend(self._batch_chunk_responses(response, chunk))
+
+        return responses
+
+    def create_posts(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create several posts, batching them when the site supports it
+
+        ``posts`` holds create_post keyword arguments. Returns a create_post
+        style result for each, in the same order.
+        """
+        if not posts:
+            return []
+        if not self.get_batch_limit():
+            return [self.create_post(**kwargs) for kwargs in posts]
+
+        bodies = [self._build_post_data(**{'status': 'publish', **kwargs}) for kwargs in posts]
+        responses = self.batch(self._post_sub_requests(bodies))
+
+        results = []
+        for kwargs, body, response in zip(posts, bodies, responses):
+            if self._batch_not_allowed(response):
+                result = self.create_post(**kwargs)
+            else:
+                result = self._batched_post_result(body, response)
+            results.append(result)
+        return results
+
+    def create_terms(self, taxonomy: str, names: List[str]) -> List[Dict[str, Any]]:
+        """Create categories or tags by name, batching when supported
+
+        ``taxonomy`` is ``'categories'`` or ``'tags'``. Terms that already
+        exist are returned as successes with their existing id.
+        """
+        if not names:
+            return []
+
+        if self.get_batch_limit():
+            responses = self.batch(self._term_sub_requests(taxonomy, names))
+        else:
+            responses = [None] * len(names)
+
+        results = []
+        for name, response in zip(names, responses):
+            if response is None or self._batch_not_allowed(response):
+                response = self._create_term(taxonomy, name)
+            results.append(self._term_result(name, response))
+        return results
+
+    def _create_term(self, taxonomy: str, name: str) -> Dict[str, Any]:
+        """Create one term, returning it in batch sub-response form"""
+        try:
+            response = requests.post(
+                f"{self.api_base}/{taxonomy}",
+                headers={**self.auth_header, 'Content-Type': 'application/json'},
+                data=json.dumps({'name': name}),
+                timeout=30
+            )
+            return self._sub_response(response)
+        except Exception as e:
+            return {'status': 0, 'body': {'message': str(e)}}
+
+    # Request building and response parsing shared with AsyncWordPressService,
+    # which sends the same requests over its own transport
+
+    def _media_metadata(self, img_data: Dict[str, Any]) -> Dict[str, str]:
+        return {
+            'alt_text': img_data.get('alt_text', ''),
+            'caption': img_data.get('caption', ''),
+            'description': img_data.get('description', '')
+        }
+
+    def _batch_upload_result(self, img_data: Dict[str, Any], response) -> Dict[str, Any]:
+        if response.status_code == 201:
+            media = response.json()
+            return {
+                'success': True,
+                'media_id': media['id'],
+                'url': media['source_url'],
+                'wordpress_url': media['link']
+            }
+        return {'success': False, 'error': f"Failed to upload {img_data['filename']}"}
+
+    def _health_result(self, response, started: float) -> Dict[str, Any]:
+        latency_ms = (time.perf_counter() - started) * 1000
+        if response.status_code == 200:
+            return {'success': True, 'status_code': 200, 'latency_ms': latency_ms, 'error': ''}
+        return {
+            'success': False,
+            'status_code': response.status_code,
+            'latency_ms': latency_ms,
+            'error': self._parse_error_response(response)
+        }
+
+    def _posts_page_params(self, page: int, per_page: int, modified_after: Optional[str]) -> Dict[str, Any]:
+        params = {
+            'page': page,
+            'per_page': per_page,
+            'orderby': 'modified',
+            'order': 'asc'
+        }
+        if modified_after:
+            params['modified_after'] = modified_after
+        return params
+
+    def _posts_page_result(self, response) -> Dict[str, Any]:
+        if response.status_code == 200:
+            return {
+                'success': True,
+                'posts': response.json(),
+                'total': int(response.headers.get('X-WP-Total', 0)),
+                'total_pages': int(response.headers.get('X-WP-TotalPages', 0))
+            }
+        return self._error_result(response)
+
+    def _parse_batch_limit(self, response) -> Optional[int]:
+        """The limit from a /batch/v1 OPTIONS response; None if it is worth asking again"""
+        if response.status_code == 200:
+            try:
+                args = response.json()['endpoints'][0]['args']
+                return int(args['requests'].get('maxItems', BATCH_DEFAULT_MAX_ITEMS))
+            except (ValueError, KeyError, IndexError, TypeError):
+                return BATCH_DEFAULT_MAX_ITEMS
+        if response.status_code in (404, 405):
+            return 0
+        return None
+
+    def _batch_chunk_responses(self, response, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if response.status_code in (200, 207):
+            try:
+                items = response.json().get('responses') or []
+            except (ValueError, AttributeError):
+                items = []
+            responses = [
+                {'status': item.get('status', 0), 'body': item.get('body', {})}
+                for item in items[:len(chunk)]
+            ]
+            # Items the reply left out get an error, so every sub-request has a result
+            responses.extend(
+                {'status': 0, 'body': {'message': 'No response for this item in the batch reply'}}
+                for _ in chunk[len(responses):]
+            )
+            return responses
+        error = self._error_result(response)
+        return [
+            {
+                'status': response.status_code,
+                'body': {'message': error['error']},
+                'retry_after': error['retry_after']
+            }
+            for _ in chunk
+        ]
+
+    def _post_sub_requests(self, bodies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [
+            {'method': 'POST', 'path': f'/wp/v2/posts?_fields={CREATED_POST_FIELDS}', 'body': body}
+            for body in bodies
+        ]
+
+    def _batched_post_result(self, body: Dict[str, Any], response: Dict[str, Any]) -> Dict[str, Any]:
+        if response['status'] == 201:
+            result = self._created_post_result(response['body'])
+            result['field_hashes'] = self._hash_fields(body)
+            return result
+        return self._batch_error_result(response)
+
+    def _term_sub_requests(self, taxonomy: str, names: List[str]) -> List[Dict[str, Any]]:
+        return [
+            {'method': 'POST', 'path': f'/wp/v2/{taxonomy}', 'body': {'name': name}}
+            for name in names
+        ]
+
+    def _sub_response(self, response) -> Dict[str, Any]:
+        """A direct response in batch sub-response form"""
+        try:
+            body = response.json()
+        except ValueError:
+            body = {'message': response.text[:200]}
+        return {
+            'status': response.status_code,
+            'body': body,
+            'retry_after': self._parse_retry_after(response)
+        }
+
+    def _term_result(self, name: str, response: Dict[str, Any]) -> Dict[str, Any]:
+        body = response['body']
+        if response['status'] == 201:
+            return {'success': True, 'id': body['id'], 'name': body['name'], 'slug': body['slug']}
+        if isinstance(body, dict) and body.get('code') == 'term_exists':
+            return {'success': True, 'id': body['data']['term_id'], 'name': name, 'existing': True}
+        return self._batch_error_result(response)
+
+    def _batch_not_allowed(self, response: Dict[str, Any]) -> bool:
+        """True when the site refused to batch this route"""
+        body = response.get('body')
+        return isinstance(body, dict) and body.get('code') == 'rest_batch_not_allowed'
+
+    def _batch_error_result(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        body = response.get('body')
+        if isinstance(body, dict) and body.get('message'):
+            error = body['message']
+        else:
+            error = f"Status {response['status']}"
+        return {
+            'success': False,
+            'error': error,
+            'status_code': response['status'],
+            'retry_after': response.get('retry_after')
+        }
+
+    def _build_post_data(self, title: str, content: str, status: str,
+                         featured_media_id: Optional[int] = None,
+                         categories: Optional[List[int]] = None,
+                         tags: Optional[List[int]] = None,
+                         excerpt: Optional[str] = None,
+                         slug: Optional[str] = None,
+                         meta: Optional[Dict] = None,
+                         format: str = 'standard',
+                         date: Optional[str] = None) -> Dict[str, Any]:
+        """Build the JSON body for creating a post"""
+
+        # Prepare content for WordPress as block markup
+        formatted_content = self.format_content(content)
+
+        # Build post data
+        post_data = {
+            'title': title,
+            'content': formatted_content,
+            'status': status,
+            'format': format,
+            'comment_status': 'open',
+            'ping_status': 'open'
+        }
+
+        # Add optional fields
+        if featured_media_id:
+            post_data['featured_media'] = featured_media_id
+
+        if categories:
+            post_data['categories'] = categories
+
+        if tags:
+            post_data['tags'] = tags
+
+        if excerpt:
+            post_data['excerpt'] = excerpt
+
+        if slug:
+            post_data['slug'] = slug
+
+        if meta:
+            post_data['meta'] = meta
+
+        if date:
+            post_data['date'] = date
+
+        return post_data
+
+    def _hash_fields(self, data: Dict[str, Any]) -> Dict[str, str]:
+        """Hash each field of a post body as it would be sent"""
+        return {
+            field: hashlib.sha256(self._serialize_field(value).encode('utf-8')).hexdigest()
+            for field, value in data.items()
+        }
+
+    def _serialize_field(self, value: Any) -> str:
+        return json.dumps(value, sort_keys=True)
+
+    def _diff_fields(self, data: Dict[str, Any],
+                     field_hashes: Optional[Dict[str, str]]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Split an update body into changed fields and the resulting hash map"""
+        field_hashes = field_hashes or {}
+        current = self._hash_fields(data)
+        changed = {
+            field: value for field, value in data.items()
+            if field_hashes.get(field) != current[field]
+        }
+        return changed, {**field_hashes, **current}
+
+    def _update_stats(self, data: Dict[str, Any], changed: Dict[str, Any]) -> Dict[str, int]:
+        """Counts of the fields and bytes an update sent and skipped"""
+        sizes = {field: len(self._serialize_field(value)) for field, value in data.items()}
+        return {
+            'requests_sent': 1 if changed else 0,
+            'requests_skipped': 0 if changed else 1,
+            'fields_sent': len(changed),
+            'fields_skipped': len(data) - len(changed),
+            'bytes_sent': sum(size for field, size in sizes.items() if field in changed),
+            'bytes_skipped': sum(size for field, size in sizes.items() if field not in changed),
+        }
+
+    def _created_post_result(self, post: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the result for a newly created post"""
+        return {
+            'success': True,
+            'post_id': post['id'],
+            'url': post['link'],
+            'guid': post['guid']['rendered'],
+            'slug': post['slug'],
+            'status': post['status']
+        }
+
+    def _updated_post_result(self, post: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the result for an updated post"""
+        return {
+            'success': True,
+            'post_id': post['id'],
+            'url': post['link'],
+            'modified': post['modified']
+        }
+
+    def _media_result(self, media: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the result for an uploaded media item"""
+        return {
+            'success': True,
+            'media_id': media['id'],
+            'url': media['source_url'],
+            'wordpress_url': media['link']
+        }
+
+    def _terms_result(self, key: str, terms: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the result for a categories or tags listing"""
+        return {
+            'success': True,
+            key: [
+                {'id': term['id'], 'name': term['name'], 'slug': term['slug']}
+                for term in terms
+            ]
+        }
+
+    def format_content(self, content: str) -> str:
+        """Content as it is sent to WordPress: formatted, then serialized to blocks
+
+        Cached by content hash, so republishing unchanged content and
+        previewing it reuse the serialized markup.
+        """
+        return serialize_blocks(content, self._prepare_content_for_wordpress)
+
     def _prepare_content_for_wordpress(self, content: str) -> str:
-        """Prepare and enhance HTML content for WordPress"""
+        """Prepare and enhance HTML content for WordPress
+
+        One pass over the lines wraps plain text in paragraphs, then a
+        single combined scan rewrites image placeholders, tables,
+        blockquotes and links. Inline tags can span lines, so they are
+        rewritten only after the lines are rebuilt.
+        """
 
         # Remove any empty paragraphs
-        content = re.sub(r'<p>\s*</p>', '', content)
+        if '<p>' in content:
+            content = _EMPTY_PARAGRAPH_RE.sub('', content)
 
         # Ensure proper paragraph wrapping for plain text lines
-        lines = content.split('\n')
         formatted_lines = []
+        append = formatted_lines.append
         in_tag = False
 
-        for line in lines:
+        for line in content.split('\n'):
             line = line.strip()
             if not line:
                 continue
 
             # Check if line starts with HTML tag
-            if line.startswith('<'):
+            if line[0] == '<':
                 in_tag = True
-                formatted_lines.append(line)
-            elif line.endswith('>'):
+                append(line)
+            elif line[-1] == '>':
                 in_tag = False
-                formatted_lines.append(line)
-            elif not in_tag and not line.startswith('<'):
+                append(line)
+            elif not in_tag:
                 # Wrap plain text in paragraph tags
-                formatted_lines.append(f'<p>{line}</p>')
+                append(f'<p>{line}</p>')
             else:
-                formatted_lines.append(line)
+                append(line)
 
         content = '\n'.join(formatted_lines)
 
-        # Convert image placeholders to WordPress blocks
-        content = re.sub(
-            r'\[IMAGE:\s*(.*?)\]',
-            lambda m: self._create_wordpress_image_block(m.group(1)),
-            content
-        )
-
-        # Add WordPress-specific classes to tables
-        content = re.sub(
-            r'<table([^>]*)>',
-            r'<table\1 class="wp-block-table">',
-            content
-        )
-
-        # Format blockquotes
-        content = re.sub(
-            r'<blockquote([^>]*)>',
-            r'<blockquote\1 class="wp-block-quote">',
-            content
-        )
-
-        # Ensure affiliate links have proper attributes
-        content = re.sub(
-            r'<a\s+([^>]*href=["\'][^"\']*["\'][^>]*)>',
-            lambda m: self._format_affiliate_link(m.group(0), m.group(1)),
-            content
-        )
+        # Image blocks, table/blockquote classes and link attributes in one scan
+        return _INLINE_REWRITE_RE.sub(self._rewrite_inline, content).strip()
+
+    def _rewrite_inline(self, match: re.Match) -> str:
+        """Rewrite one token found by _INLINE_REWRITE_RE"""
+        kind = match.lastgroup
+        if kind == 'link':
+            # Ensure affiliate links have proper attributes
+            return self._format_affiliate_link(match.group(0), match.group('link'))
+        if kind == 'table':
+            # Add WordPress-specific classes to tables
+            return f'<table{match.group("table")} class="wp-block-table">'
+        if kind == 'quote':
+            return f'<blockquote{match.group("quote")} class="wp-block-quote">'
 
-        # Clean up extra whitespace
-        content = re.sub(r'\n{3,}', '\n\n', content)
-
-        return content.strip()
+        # Convert image placeholders to WordPress blocks
+        alt_text = match.group('image')
+        block = self._create_wordpress_image_block(alt_text)
+        if '<' in alt_text:
+            # Tags inside the alt text get the same treatment as the rest
+            block = _INLINE_TAG_RE.sub(self._rewrite_inline, block)
+        return block
 
     def _create_wordpress_image_block(self, alt_text: str) -> str:
         """Create a WordPress image block HTML"""
@@ -375,6 +777,15 @@ class WordPressService:
         </figure>
         <!-- /wp:image --> '''
 
+    def _uploaded_image_block(self, media: Dict[str, Any], alt_text: str) -> str:
+        """Create a WordPress image block for an uploaded media item"""
+        img_html = f'<!-- wp:image {{"id":{media["media_id"]},"sizeSlug":"large"}} -->'
+        img_html += f'<figure class="wp-block-image size-large">'
+        img_html += f'<img src="{media["url"]}" alt="{alt_text}" '
+        img_html += f'class="wp-image-{media["media_id"]}"/>'
+        img_html += f'</figure><!-- /wp:image -->'
+        return img_html
+
     def _format_affiliate_link(self, full_tag: str, attributes: str) -> str:
         """Ensure affiliate links have proper attributes"""
         if 'rel=' not in attributes:
@@ -408,15 +819,38 @@ class WordPressService:
         except:
             return f"Status {response.status_code}: {response.text[:200]}"
 
+    def _error_result(self, response) -> Dict[str, Any]:
+        """Build a failed result, keeping the status code so callers can back off"""
+        return {
+            'success': False,
+            'error': self._parse_error_response(response),
+            'status_code': response.status_code,
+            'retry_after': self._parse_retry_after(response)
+        }
+
+    def _parse_retry_after(self, response) -> Optional[float]:
+        """Read the Retry-After header (in seconds) if the server sent one"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
+
     def schedule_post(self, title: str, content: str,
                       publish_date: datetime, **kwargs) -> Dict[str, Any]:
         """Schedule a post for future publication"""
+        return self.create_post(title, content, **self._schedule_kwargs(publish_date, kwargs))
+
+    def _schedule_kwargs(self, publish_date: datetime, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Build create_post arguments for a scheduled post"""
         post_data = {
             'status': 'future',
             'date': publish_date.isoformat()
         }
         post_data.update(kwargs)
-        return self.create_post(title, content, **post_data)
+        return post_data
 
     def bulk_upload_media(self, image_paths: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
         """Bulk upload multiple images"""
@@ -436,19 +870,19 @@ class WordPressService:
                 response = requests.post(
                     f"{self.api_base}/media",
                     headers=self.auth_header,
+                    params={'_fields': MEDIA_FIELDS},
                     files=files,
                     data=data,
                     timeout=30
                 )
             if response.status_code == 201:
-                media = response.json()
+                return self._media_result(response.json())
+            else:
                 return {
-                    'success': True,
-                    'media_id': media['id'],
-                    'url': media['source_url'],
-                    'wordpress_url': media['link']
+                    'success': False,
+                    'error': f"Failed with status {response.status_code}",
+                    'status_code': response.status_code,
+                    'retry_after': self._parse_retry_after(response)
                 }
-            else:
-                return {'success': False, 'error': f"Failed with status {response.status_code}"}
         except Exception as e:
             return {'success': False, 'error': str(e)}
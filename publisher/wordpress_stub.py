@@ -0,0 +1,369 @@
+import base64
+import json
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+
+API_PREFIX = '/wp-json/wp/v2'
+BATCH_PATH = '/wp-json/batch/v1'
+
+# Logical clock for 'modified' times, so sync ordering is deterministic
+EPOCH = datetime(2024, 1, 1)
+
+
+class StubConfig:
+    """Behaviour of the stub: credentials, latency, faults and limits"""
+
+    def __init__(self, username: str = 'stub', app_password: str = 'stub',
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 500,
+                 rate_limit: int = 0, rate_window: float = 1.0,
+                 batch_max_items: int = 25, batch_refused_routes: Tuple[str, ...] = (),
+                 seed: int = 0):
+        self.username = username
+        self.app_password = app_password
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.batch_max_items = batch_max_items
+        # Route prefixes (e.g. '/wp/v2/posts') the batch endpoint refuses,
+        # as core does for routes registered without allow_batch
+        self.batch_refused_routes = batch_refused_routes
+        self.seed = seed
+
+
+class StubWordPress:
+    """In-memory WordPress REST API covering the endpoints WordPressService uses
+
+    ``dispatch`` answers one request and can be called directly; the HTTP
+    server below wraps it. Responses follow core's shapes closely enough
+    for the client code paths: pagination headers, term_exists, 207 batch
+    responses and Retry-After on 429.
+    """
+
+    def __init__(self, config: Optional[StubConfig] = None):
+        self.config = config or StubConfig()
+        self.posts: Dict[int, Dict[str, Any]] = {}
+        self.media: Dict[int, Dict[str, Any]] = {}
+        self.terms: Dict[str, Dict[int, Dict[str, Any]]] = {'categories': {}, 'tags': {}}
+        self.requests = 0
+        self.status_counts: Dict[int, int] = {}
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self._next_id = 1
+        self._clock = 0
+        self._recent = deque()
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests = 0
+            self.status_counts = {}
+            self.bytes_received = 0
+            self.bytes_sent = 0
+
+    def record_transfer(self, received: int, sent: int):
+        """Count request and response body bytes seen by the HTTP server"""
+        with self._lock:
+            self.bytes_received += received
+            self.bytes_sent += sent
+
+    def dispatch(self, method: str, url: str, headers: Dict[str, str],
+                 body: bytes = b'') -> Tuple[int, Dict[str, str], Any]:
+        """Answer one request: returns (status, headers, JSON body)"""
+        with self._lock:
+            self.requests += 1
+            delay, fault = self._draw_fault()
+            limited = self._rate_limited()
+        if delay:
+            time.sleep(delay)
+
+        if limited is not None:
+            result = (429, {'Retry-After': str(limited)}, self._error('rest_too_many_requests', 'Too many requests'))
+        elif fault:
+            result = (self.config.error_status, {}, self._error('stub_injected_error', 'Injected failure'))
+        elif not self._authorized(headers):
+            result = (401, {}, self._error('rest_not_logged_in', 'You are not currently logged in.'))
+        else:
+            parts = urlsplit(url)
+            query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+            with self._lock:
+                result = self._route(method.upper(), parts.path.rstrip('/'), query, headers, body)
+            if query.get('_fields') and 200 <= result[0] < 300:
+                result = (result[0], result[1], self._select_fields(result[2], query['_fields']))
+
+        with self._lock:
+            self.status_counts[result[0]] = self.status_counts.get(result[0], 0) + 1
+        return result
+
+    def _route(self, method: str, path: str, query: Dict[str, str],
+               headers: Dict[str, str], body: bytes) -> Tuple[int, Dict[str, str], Any]:
+        if path == BATCH_PATH and self.config.batch_max_items:
+            if method == 'OPTIONS':
+                return 200, {}, {'endpoints': [{'args': {'requests': {'maxItems': self.config.batch_max_items}}}]}
+            if method == 'POST':
+                return self._batch(json.loads(body or b'{}'))
+
+        if not path.startswith(API_PREFIX):
+            return 404, {}, self._error('rest_no_route', 'No route was found matching the URL and request method.')
+        route = path[len(API_PREFIX):].strip('/').split('/')
+
+        if route == ['users', 'me'] and method == 'GET':
+            return 200, {}, {'id': 1, 'name': self.config.username, 'capabilities': {'publish_posts': True}}
+        if route == ['posts']:
+            if method == 'GET':
+                return self._list_posts(query)
+            if method == 'POST':
+                return self._save_post(None, self._json(body))
+        if len(route) == 2 and route[0] == 'posts' and route[1].isdigit():
+            post_id = int(route[1])
+            if post_id not in self.posts:
+                return 404, {}, self._error('rest_post_invalid_id', 'Invalid post ID.')
+            if method == 'GET':
+                return 200, {}, self.posts[post_id]
+            if method in ('POST', 'PUT', 'PATCH'):
+                return self._save_post(post_id, self._json(body))
+            if method == 'DELETE':
+                return 200, {}, {'deleted': True, 'previous': self.posts.pop(post_id)}
+        if route == ['media'] and method == 'POST':
+            return self._upload_media(headers, body)
+        if len(route) == 1 and route[0] in self.terms:
+            if method == 'GET':
+                return self._paginate(list(self.terms[route[0]].values()), query)
+            if method == 'POST':
+                return self._create_term(route[0], self._json(body))
+
+        return 404, {}, self._error('rest_no_route', 'No route was found matching the URL and request method.')
+
+    def _batch(self, data: Dict[str, Any]) -> Tuple[int, Dict[str, str], Any]:
+        items = data.get('requests', [])
+        if len(items) > self.config.batch_max_items:
+            return 400, {}, self._error('rest_invalid_param', 'Too many requests in batch.')
+        responses = []
+        for item in items:
+            parts = urlsplit(item['path'])
+            if parts.path.startswith(self.config.batch_refused_routes):
+                responses.append({
+                    'status': 400, 'headers': {},
+                    'body': self._error('rest_batch_not_allowed', 'The requested route does not support batch requests.')
+                })
+                continue
+            query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+            status, _, item_body = self._route(
+                item.get('method', 'POST').upper(), '/wp-json' + parts.path.rstrip('/'), query,
+                {}, json.dumps(item.get('body', {})).encode('utf-8')
+            )
+            if query.get('_fields') and 200 <= status < 300:
+                item_body = self._select_fields(item_body, query['_fields'])
+            responses.append({'status': status, 'body': item_body, 'headers': {}})
+        return 207, {}, {'responses': responses}
+
+    def _list_posts(self, query: Dict[str, str]) -> Tuple[int, Dict[str, str], Any]:
+        posts = list(self.posts.values())
+        if query.get('modified_after'):
+            posts = [post for post in posts if post['modified'] > query['modified_after']]
+        if query.get('orderby') == 'modified':
+            posts.sort(key=lambda post: post['modified'], reverse=query.get('order') != 'asc')
+        else:
+            posts.sort(key=lambda post: post['id'], reverse=True)
+        return self._paginate(posts, query)
+
+    def _paginate(self, items: List[Dict[str, Any]], query: Dict[str, str]) -> Tuple[int, Dict[str, str], Any]:
+        per_page = min(100, max(1, int(query.get('per_page', 10))))
+        page = max(1, int(query.get('page', 1)))
+        total_pages = (len(items) + per_page - 1) // per_page
+        if page > 1 and page > total_pages:
+            return 400, {}, self._error('rest_post_invalid_page_number', 'The page number requested is larger than the number of pages available.')
+
+        page_items = items[(page - 1) * per_page:page * per_page]
+        return 200, {'X-WP-Total': str(len(items)), 'X-WP-TotalPages': str(total_pages)}, page_items
+
+    def _save_post(self, post_id: Optional[int], data: Dict[str, Any]) -> Tuple[int, Dict[str, str], Any]:
+        created = post_id is None
+        if created:
+            post_id = self._new_id()
+            post = {
+                'id': post_id,
+                'date': self._now(),
+                'date_gmt': self._now(),
+                'slug': f'post-{post_id}',
+                'status': 'publish',
+                'link': f'https://stub.local/?p={post_id}',
+                'guid': {'rendered': f'https://stub.local/?p={post_id}'},
+                'title': {'rendered': ''},
+                'content': {'rendered': ''},
+                'excerpt': {'rendered': ''},
+                'featured_media': 0,
+                'categories': [],
+                'tags': [],
+            }
+        else:
+            post = self.posts[post_id]
+
+        for key in ('title', 'content', 'excerpt'):
+            if key in data:
+                # Authenticated writes answer in the edit context: raw and rendered
+                post[key] = {'raw': data[key], 'rendered': data[key]}
+        for key in ('status', 'slug', 'featured_media', 'categories', 'tags', 'format', 'date', 'meta'):
+            if key in data:
+                post[key] = data[key]
+        post['modified'] = post['modified_gmt'] = self._tick()
+        self.posts[post_id] = post
+        return (201 if created else 200), {}, post
+
+    def _upload_media(self, headers: Dict[str, str], body: bytes) -> Tuple[int, Dict[str, str], Any]:
+        media_id = self._new_id()
+        media = {
+            'id': media_id,
+            'source_url': f'https://stub.local/wp-content/uploads/{media_id}.jpg',
+            'link': f'https://stub.local/?attachment_id={media_id}',
+            'media_type': 'image',
+            'size': len(body),
+        }
+        self.media[media_id] = media
+        return 201, {}, media
+
+    def _create_term(self, taxonomy: str, data: Dict[str, Any]) -> Tuple[int, Dict[str, str], Any]:
+        name = data.get('name', '')
+        for term in self.terms[taxonomy].values():
+            if term['name'].lower() == name.lower():
+                return 400, {}, {
+                    'code': 'term_exists',
+                    'message': 'A term with the name provided already exists.',
+                    'data': {'status': 400, 'term_id': term['id']}
+                }
+        term_id = self._new_id()
+        term = {'id': term_id, 'name': name, 'slug': name.lower().replace(' ', '-'), 'count': 0}
+        self.terms[taxonomy][term_id] = term
+        return 201, {}, term
+
+    def _draw_fault(self) -> Tuple[float, bool]:
+        config = self.config
+        delay = config.latency_ms
+        if config.jitter_ms:
+            delay += self._random.uniform(0, config.jitter_ms)
+        fault = bool(config.error_rate) and self._random.random() < config.error_rate
+        return delay / 1000, fault
+
+    def _rate_limited(self) -> Optional[int]:
+        """Seconds to wait if this request exceeds the rate limit, else None"""
+        if not self.config.rate_limit:
+            return None
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] >= self.config.rate_window:
+            self._recent.popleft()
+        if len(self._recent) >= self.config.rate_limit:
+            return max(1, round(self.config.rate_window - (now - self._recent[0])))
+        self._recent.append(now)
+        return None
+
+    def _authorized(self, headers: Dict[str, str]) -> bool:
+        expected = base64.b64encode(
+            f"{self.config.username}:{self.config.app_password}".encode()
+        ).decode()
+        auth = {key.lower(): value for key, value in headers.items()}.get('authorization', '')
+        return auth == f'Basic {expected}'
+
+    def _new_id(self) -> int:
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+
+    def _tick(self) -> str:
+        self._clock += 1
+        return (EPOCH + timedelta(seconds=self._clock)).isoformat()
+
+    def _now(self) -> str:
+        return (EPOCH + timedelta(seconds=self._clock)).isoformat()
+
+    def _select_fields(self, payload: Any, fields: str) -> Any:
+        """Apply ?_fields= to an object or a list of objects"""
+        keep = fields.split(',')
+        if isinstance(payload, list):
+            return [{key: item[key] for key in keep if key in item} for item in payload]
+        if isinstance(payload, dict):
+            return {key: payload[key] for key in keep if key in payload}
+        return payload
+
+    def _json(self, body: bytes) -> Dict[str, Any]:
+        try:
+            return json.loads(body or b'{}')
+        except ValueError:
+            return {}
+
+    def _error(self, code: str, message: str) -> Dict[str, Any]:
+        return {'code': code, 'message': message}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; don't let Nagle hold the body
+    disable_nagle_algorithm = True
+
+    def _handle(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        status, headers, payload = self.server.stub.dispatch(
+            self.command, self.path, dict(self.headers.items()), body
+        )
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.stub.record_transfer(len(body), len(data))
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WordPressStubServer:
+    """Serve a StubWordPress on localhost from a background thread
+
+        with WordPressStubServer(StubConfig(latency_ms=50)) as server:
+            wp = WordPressService(server.url, 'stub', 'stub')
+    """
+
+    def __init__(self, config: Optional[StubConfig] = None, host: str = '127.0.0.1', port: int = 0):
+        self.stub = StubWordPress(config)
+        self.httpd = ThreadingHTTPServer((host, port), _StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self.stub
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'WordPressStubServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='wp-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> 'WordPressStubServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()